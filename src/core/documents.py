@@ -0,0 +1,46 @@
+import os
+
+
+class DocumentRegistry:
+    """已打开文件的注册表：规范化路径 -> 标签页页面（编辑器或占位页）
+
+    open_file 通过它直接找到文件所在的标签页，不必逐个比较标签页的路径；
+    同一路径只对应一个页面，也就只有一份 Scintilla 文档，分屏视图共用这份文档。
+    """
+
+    def __init__(self):
+        self._pages = {} # 路径 -> 页面
+        self._keys = {} # 页面 -> 路径
+
+    @staticmethod
+    def key(file_path):
+        return os.path.normcase(os.path.realpath(file_path))
+
+    def register(self, file_path, page):
+        self.unregister(page)
+        key = self.key(file_path)
+        self._pages[key] = page
+        self._keys[page] = key
+
+    def unregister(self, page):
+        key = self._keys.pop(page, None)
+        if key is not None and self._pages.get(key) is page:
+            del self._pages[key]
+
+    def replace(self, old, new):
+        """页面被替换（占位页激活、标签页休眠或唤醒）"""
+        key = self._keys.pop(old, None)
+        if key is not None:
+            self._pages[key] = new
+            self._keys[new] = key
+
+    def page(self, file_path):
+        return self._pages.get(self.key(file_path))
+
+    def document(self, file_path):
+        """返回文件当前的 QsciDocument；文件未打开或尚未激活时返回 None"""
+        page = self.page(file_path)
+        return page.document() if hasattr(page, 'setDocument') else None
+
+
+document_registry = DocumentRegistry()
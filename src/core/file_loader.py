@@ -0,0 +1,65 @@
+import os, codecs
+from PyQt6.QtCore import pyqtSignal, QThread
+
+# 每次送往编辑器的数据量
+CHUNK_SIZE = 1024 * 1024
+
+
+class FileLoadWorker(QThread):
+    """在后台线程中分块读取大文件，编辑器逐块追加，界面不会被阻塞
+
+    普通模式按文本方式读取（UTF-8 校验、统一换行符，与 open(..., 'r') 一致）；
+    raw 为 True 时按原样读取字节（只做 UTF-8 校验，不解码再编码），用于只读查看。
+    """
+    chunkLoaded = pyqtSignal(bytes) # UTF-8 编码的数据块
+    progress = pyqtSignal(int) # 百分比
+    finished = pyqtSignal(bool, str) # 成功, 错误信息
+
+    def __init__(self, file_path, raw=False, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.raw = raw
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def run(self):
+        try:
+            size = os.path.getsize(self.file_path)
+            if self.raw:
+                self._read_raw(size)
+            else:
+                self._read_text(size)
+            if not self.is_cancelled:
+                self.finished.emit(True, "")
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            self.finished.emit(False, str(e))
+
+    def _emit(self, data, loaded, size):
+        self.chunkLoaded.emit(data)
+        self.progress.emit(min(100, loaded * 100 // size) if size else 100)
+
+    def _read_text(self, size):
+        loaded = 0
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            while not self.is_cancelled:
+                text = f.read(CHUNK_SIZE)
+                if not text:
+                    break
+                data = text.encode('utf-8')
+                loaded += len(data)
+                self._emit(data, loaded, size)
+
+    def _read_raw(self, size):
+        # 只做 UTF-8 校验，数据块原样送往编辑器
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        loaded = 0
+        with open(self.file_path, 'rb') as f:
+            while not self.is_cancelled:
+                data = f.read(CHUNK_SIZE)
+                decoder.decode(data, final=not data)
+                if not data:
+                    break
+                loaded += len(data)
+                self._emit(data, loaded, size)
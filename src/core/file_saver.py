@@ -0,0 +1,138 @@
+import os, time, tempfile, threading
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from src.core.local_history import local_history
+
+
+def write_in_place(file_path, text):
+    """直接覆盖写入原文件（保留硬链接和属主，但不是原子的）"""
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def atomic_write(file_path, text):
+    """先写入同目录下的临时文件并刷到磁盘，再整体替换目标文件
+
+    写入中途崩溃或断电时，原文件保持不变，不会出现被截断的文件。
+    符号链接写入它指向的文件；有多个硬链接或无法保留属主时改为直接覆盖写入。
+    """
+    # 替换链接指向的文件，而不是把符号链接本身换成普通文件
+    file_path = os.path.realpath(file_path)
+    try:
+        old_stat = os.stat(file_path)
+    except FileNotFoundError:
+        old_stat = None
+    if old_stat is not None and old_stat.st_nlink > 1:
+        # 替换会断开其他硬链接
+        write_in_place(file_path, text)
+        return
+    directory = os.path.dirname(file_path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if old_stat is not None:
+            temp_stat = os.stat(temp_path)
+            if hasattr(os, 'chown') and (temp_stat.st_uid, temp_stat.st_gid) != (old_stat.st_uid, old_stat.st_gid):
+                try:
+                    os.chown(temp_path, old_stat.st_uid, old_stat.st_gid)
+                except OSError:
+                    # 编辑别人的文件（例如有写权限的共享文件）时无法保留属主，改为直接覆盖写入
+                    os.remove(temp_path)
+                    write_in_place(file_path, text)
+                    return
+            try:
+                # 保留原文件的权限（mkstemp 创建的文件只有属主可读写）
+                os.chmod(temp_path, old_stat.st_mode & 0o7777)
+            except OSError:
+                pass
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+class SaveWorker(QThread):
+    """依次处理保存队列，直到队列为空"""
+
+    def __init__(self, service):
+        super().__init__(service)
+        self.service = service
+
+    def run(self):
+        while True:
+            job = self.service._take()
+            if job is None:
+                return
+            file_path, text, owner = job
+            start = time.perf_counter()
+            try:
+                atomic_write(file_path, text)
+                error = ""
+            except Exception as e:
+                error = str(e)
+            if not error:
+                try:
+                    # 保存成功后顺带记录本地历史，同样不占用界面线程
+                    local_history.record(file_path, text)
+                except (OSError, ValueError):
+                    pass
+            self.service.saveFinished.emit(owner, file_path, not error, error, time.perf_counter() - start)
+
+
+class SaveService(QObject):
+    """在后台线程中保存文件，避免网络文件系统等慢速磁盘卡住编辑器
+
+    保存时只在界面线程中取一份文本快照。同一路径尚未开始写入的保存请求会被合并，
+    只写最新的内容；连续按 Ctrl+S 时最多再多写一次。
+    """
+    saveFinished = pyqtSignal(object, str, bool, str, float) # 所属编辑器, 路径, 成功, 错误信息, 耗时（秒）
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._pending = {} # 路径 -> (文本, 所属编辑器)，按请求顺序排列
+        self._worker = None
+        self._running = False
+
+    def save(self, file_path, text, owner=None):
+        with self._lock:
+            # 合并：重新插入，使其排到队尾并只保留最新的文本
+            self._pending.pop(file_path, None)
+            self._pending[file_path] = (text, owner)
+            if self._running:
+                return
+            self._running = True
+        if self._worker is not None:
+            # 上一个线程已取完队列，等它真正退出
+            self._worker.wait()
+            self._worker.deleteLater()
+        self._worker = SaveWorker(self)
+        self._worker.start()
+
+    def _take(self):
+        with self._lock:
+            if not self._pending:
+                self._running = False
+                return None
+            file_path = next(iter(self._pending))
+            text, owner = self._pending.pop(file_path)
+            return file_path, text, owner
+
+    def is_pending(self, file_path):
+        with self._lock:
+            return file_path in self._pending
+
+    def wait(self):
+        """等待所有保存完成（退出程序前调用）"""
+        if self._worker is not None:
+            self._worker.wait()
+
+
+save_service = SaveService()
@@ -0,0 +1,259 @@
+import os, re, time, zlib, threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from src.core.workspace import file_cache
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:
+    # Python 3.10 及更早
+    import sre_parse, sre_constants
+
+# 超过这个大小的文件不搜索
+MAX_FILE_SIZE = 4 * 1024 * 1024
+
+# 一次搜索最多返回的匹配数量，单个文件最多返回的匹配数量
+MAX_RESULTS = 10000
+MAX_MATCHES_PER_FILE = 1000
+
+# 每个任务处理的文件数量，以及同时提交给进程池的任务数量
+BATCH_FILES = 16
+MAX_PENDING = 64
+
+# 三元组位图的位数：每个文件 512 字节，查找内容有几个三元组时误判率就很低
+BITMAP_BITS = 1 << 12
+
+# 只索引标识符中的三元组（按文件中不重复的单词计算，比逐字节快得多）
+_WORD = re.compile(rb'\w{3,}')
+_WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789_')
+
+# 忽略大小写时这些字母也匹配非 ASCII 字符（İ ı K ſ），不能用于筛选
+_UNICODE_CASE_CHARS = frozenset('iks')
+
+
+def trigram_bitmap(data):
+    """文件内容（转为小写）的单词中出现的三元组位图"""
+    words = set(_WORD.findall(data.lower()))
+    trigrams = {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+    bits = bytearray(BITMAP_BITS // 8)
+    for bit in {crc & (BITMAP_BITS - 1) for crc in map(zlib.crc32, trigrams)}:
+        bits[bit >> 3] |= 1 << (bit & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def required_mask(pattern, flags=0):
+    """从正则表达式中找出匹配必须包含的字面文本，返回它们的三元组位图；找不到时返回 0（需要搜索所有文件）"""
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except (re.error, RecursionError, OverflowError):
+        return 0
+    ignore_case = bool(parsed.state.flags & re.IGNORECASE)
+    runs, run = [], []
+    # 只看最外层连续的单词字符，分支、重复、标点等都视为断开
+    for op, value in parsed:
+        char = chr(value).lower() if op is sre_constants.LITERAL else ""
+        if char in _WORD_CHARS and not (ignore_case and char in _UNICODE_CASE_CHARS):
+            run.append(char)
+        else:
+            runs.append(run)
+            run = []
+    runs.append(run)
+    mask = 0
+    for run in runs:
+        data = "".join(run).encode('ascii')
+        for i in range(len(data) - 2):
+            mask |= 1 << (zlib.crc32(data[i:i + 3]) & (BITMAP_BITS - 1))
+    return mask
+
+
+def scan_files(jobs, pattern, flags):
+    """在工作进程中搜索一批文件，jobs 为 [(路径, 是否计算三元组位图)]
+
+    返回 [(路径, 位图或 None, [(行, 列, 长度, 行文本)])]，二进制文件的位图为 0。
+    """
+    regex = re.compile(pattern, flags)
+    results = []
+    for path, want_bitmap in jobs:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read(MAX_FILE_SIZE + 1)
+        except OSError:
+            results.append((path, None, []))
+            continue
+        if b'\0' in data[:8192]:
+            results.append((path, 0 if want_bitmap else None, []))
+            continue
+        bitmap = trigram_bitmap(data) if want_bitmap else None
+        text = data.decode('utf-8', errors='replace')
+        matches = []
+        # 大多数文件没有匹配，先整体搜索一次
+        if regex.search(text):
+            # 只按 \n 分行（与编辑器一致）：splitlines 还会在换页符等字符处分行，行号会对不上
+            for number, line in enumerate(text.split('\n')):
+                if line.endswith('\r'):
+                    line = line[:-1]
+                for match in regex.finditer(line):
+                    if match.end() > match.start():
+                        matches.append((number, match.start(), match.end() - match.start(), line.strip()[:300]))
+                if len(matches) >= MAX_MATCHES_PER_FILE:
+                    break
+        results.append((path, bitmap, matches))
+    return results
+
+
+class TrigramIndex:
+    """按文件记录内容中出现的三元组，重复搜索时跳过不可能匹配的文件；文件的 mtime 或大小变化后失效"""
+
+    def __init__(self):
+        self._entries = {} # 路径 -> (mtime, 大小, 位图)
+        self._lock = threading.Lock()
+
+    def get(self, path, mtime, size):
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or entry[0] != mtime or entry[1] != size:
+            return None
+        return entry[2]
+
+    def store(self, path, mtime, size, bitmap):
+        with self._lock:
+            self._entries[path] = (mtime, size, bitmap)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SearchJob(QThread):
+    """一次搜索：遍历文件夹，分批交给进程池搜索，结果陆续发出"""
+    resultsFound = pyqtSignal(object) # [(路径, 行, 列, 长度, 行文本)]
+    completed = pyqtSignal(int, int, float) # 搜索的文件数, 匹配数, 耗时
+
+    def __init__(self, executor, index, root, pattern, flags, parent=None):
+        super().__init__(parent)
+        self.executor = executor
+        self.index = index # 不使用索引时为 None
+        self.root = root
+        self.pattern = pattern
+        self.flags = flags
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        self._started_at = time.monotonic()
+        mask = required_mask(self.pattern, self.flags) if self.index is not None else 0
+        pending = {} # Future -> {路径: (mtime, 大小, 是否计算位图)}
+        self.scanned = self.matches = 0
+        batch = {}
+        for path, mtime, size in file_cache.walk(self.root):
+            if self.cancelled:
+                break
+            if size > MAX_FILE_SIZE:
+                continue
+            bitmap = None
+            if self.index is not None:
+                # 目录监视器不报告文件内容的变化（其他程序原地修改），使用位图前重新取一次文件状态
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                mtime, size = stat.st_mtime, stat.st_size
+                if size > MAX_FILE_SIZE:
+                    continue
+                bitmap = self.index.get(path, mtime, size)
+                if bitmap is not None and mask and bitmap & mask != mask:
+                    continue
+            batch[path] = (mtime, size, bitmap is None and self.index is not None)
+            if len(batch) >= BATCH_FILES:
+                self._submit(pending, batch)
+                batch = {}
+            while len(pending) >= MAX_PENDING and not self.cancelled:
+                self._collect(pending, wait(pending, timeout=0.1, return_when=FIRST_COMPLETED).done)
+        if batch and not self.cancelled:
+            self._submit(pending, batch)
+        while pending and not self.cancelled:
+            self._collect(pending, wait(pending, timeout=0.1, return_when=FIRST_COMPLETED).done)
+        for future in pending:
+            future.cancel()
+        if not self.cancelled:
+            self.completed.emit(self.scanned, self.matches, time.monotonic() - self._started_at)
+
+    def _submit(self, pending, batch):
+        jobs = [(path, want_bitmap) for path, (_, _, want_bitmap) in batch.items()]
+        pending[self.executor.submit(scan_files, jobs, self.pattern, self.flags)] = batch
+
+    def _collect(self, pending, done):
+        for future in done:
+            batch = pending.pop(future)
+            try:
+                results = future.result()
+            except Exception:
+                continue
+            found = []
+            for path, bitmap, matches in results:
+                self.scanned += 1
+                if bitmap is not None and self.index is not None:
+                    mtime, size, _ = batch[path]
+                    self.index.store(path, mtime, size, bitmap)
+                found.extend((path, line, column, length, text) for line, column, length, text in matches)
+            if found and not self.cancelled:
+                found = found[:MAX_RESULTS - self.matches]
+                self.matches += len(found)
+                self.resultsFound.emit(found)
+                if self.matches >= MAX_RESULTS:
+                    # 达到上限后停止，也算正常结束
+                    self.cancelled = True
+                    self.completed.emit(self.scanned, self.matches, time.monotonic() - self._started_at)
+
+
+class FileSearchService(QObject):
+    """在当前文件夹中搜索（查找文件内容）
+
+    同一时间只有一个搜索，开始新的搜索时取消旧的。可选的三元组索引在第一次搜索时顺带建立，
+    之后的搜索只读取可能匹配的文件；文件列表来自 file_cache，变化的目录由监视器标记后重新列出。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.index = TrigramIndex()
+        self.job = None
+        self._executor = None
+        self._root = ""
+
+    def search(self, root, pattern, flags=0, use_index=True):
+        self.cancel()
+        if root != self._root:
+            self._root = root
+            self.index.clear()
+        if self._executor is None:
+            # spawn：不复制界面进程的状态，各平台行为一致
+            self._executor = ProcessPoolExecutor(
+                max_workers=max(1, (os.cpu_count() or 2) - 1), mp_context=multiprocessing.get_context('spawn'))
+        self.job = SearchJob(self._executor, self.index if use_index else None, root, pattern, flags, self)
+        self.job.start()
+        return self.job
+
+    def cancel(self):
+        job, self.job = self.job, None
+        if job is not None:
+            job.cancel()
+            if job.isFinished():
+                job.deleteLater()
+            else:
+                job.finished.connect(job.deleteLater)
+
+    def shutdown(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job.wait()
+        self.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+file_search = FileSearchService()
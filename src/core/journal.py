@@ -0,0 +1,264 @@
+import os, json, uuid, queue, struct
+from PyQt6.QtCore import QObject, QThread, QTimer
+from PyQt6.Qsci import QsciScintilla
+from src.config import CONFIG_FILE, config
+
+# 未保存缓冲区的恢复日志目录（与配置文件同级）
+RECOVERY_DIR = os.path.join(os.path.dirname(CONFIG_FILE), 'recovery')
+
+SC_MOD_INSERTTEXT = 0x1
+SC_MOD_DELETETEXT = 0x2
+
+# 每条记录：类型(1 字节) + 两个 32 位整数 + 可选数据
+_RECORD = struct.Struct('<cII')
+OP_SNAPSHOT = b'S' # (元数据长度, 文本长度) + 元数据 + 文本
+OP_INSERT = b'I' # (位置, 长度) + 插入的字节
+OP_DELETE = b'D' # (位置, 长度)
+OP_META = b'M' # (0, 长度) + 元数据
+
+# 日志超过该大小且超过文档两倍大小时压缩为一个快照
+COMPACT_MIN_BYTES = 256 * 1024
+
+
+def _encode_meta(journal):
+    return json.dumps({'title': journal.title, 'path': journal.file_path}, ensure_ascii=False).encode('utf-8')
+
+
+def replay(data):
+    """重放日志，返回 (元数据, 文本字节)；末尾不完整的记录（写入时崩溃）被忽略"""
+    meta = None
+    text = bytearray()
+    offset = 0
+    while offset + _RECORD.size <= len(data):
+        op, a, b = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        if op == OP_SNAPSHOT:
+            if offset + a + b > len(data):
+                break
+            meta = json.loads(data[offset:offset + a])
+            text = bytearray(data[offset + a:offset + a + b])
+            offset += a + b
+        elif op == OP_INSERT:
+            if offset + b > len(data):
+                break
+            text[a:a] = data[offset:offset + b]
+            offset += b
+        elif op == OP_DELETE:
+            del text[a:a + b]
+        elif op == OP_META:
+            if offset + b > len(data):
+                break
+            meta = json.loads(data[offset:offset + b])
+            offset += b
+        else:
+            break
+    return meta, bytes(text)
+
+
+class JournalWriter(QThread):
+    """按顺序执行日志文件的追加、替换和删除，磁盘再慢也不会阻塞界面"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            action, path, data = job
+            try:
+                if action == 'append':
+                    with open(path, 'ab') as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                elif action == 'replace':
+                    temp_path = path + '.tmp'
+                    with open(temp_path, 'wb') as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(temp_path, path)
+                elif os.path.exists(path):
+                    os.remove(path)
+            except OSError:
+                # 恢复日志只是尽力而为，写入失败不影响编辑
+                pass
+
+
+class BufferJournal:
+    """单个编辑器缓冲区的日志状态"""
+
+    def __init__(self, editor, title, file_path):
+        self.editor = editor
+        self.title = title
+        self.file_path = file_path
+        self.path = os.path.join(RECOVERY_DIR, f"{uuid.uuid4().hex}.journal")
+        self.pending = [] # 尚未写入的增量记录
+        self.started = False # 日志文件中是否已有快照
+        self.meta_changed = False
+        self.written = 0
+        self.seq = 0 # 修改计数，用于判断保存的是否为最新内容
+
+
+class RecoveryJournal(QObject):
+    """未保存缓冲区的崩溃恢复日志
+
+    编辑时只把 SCN_MODIFIED 的增量（位置 + 插入的字节或删除的长度）追加到内存列表，
+    定时器每隔几秒批量交给后台线程追加写入。缓冲区第一次变脏或日志过大时才取一次
+    全文快照重写日志。保存成功或关闭标签页后删除对应的日志；程序异常退出后，
+    下次启动时可从剩余的日志中恢复。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.buffers = {} # 编辑器 -> BufferJournal
+        self.writer = None
+        self.timer = QTimer(self)
+        self.timer.setInterval(config.get('recovery_flush_interval', 2000))
+        self.timer.timeout.connect(self.flush)
+
+    def _submit(self, action, path, data=b""):
+        if self.writer is None:
+            os.makedirs(RECOVERY_DIR, exist_ok=True)
+            self.writer = JournalWriter(self)
+            self.writer.start()
+        self.writer.jobs.put((action, path, data))
+
+    def attach(self, editor, title, file_path="", dirty=False):
+        """开始记录编辑器的修改；dirty 为 True 时（恢复的缓冲区）立即视为未保存"""
+        if not config.get('recovery_journal', True):
+            return
+        journal = BufferJournal(editor, title, file_path)
+        self.buffers[editor] = journal
+        self._connect(journal)
+        if dirty:
+            journal.meta_changed = True
+            self.timer.start()
+
+    def _connect(self, journal):
+        journal.editor.SCN_MODIFIED.connect(lambda *args: self._on_modified(journal, *args))
+
+    def rebind(self, old, new):
+        """标签页休眠或唤醒时把日志转交给新的页面；休眠的占位页不是编辑器，期间不会有修改"""
+        journal = self.buffers.get(old)
+        if journal is None:
+            return
+        if journal.pending:
+            self.flush()
+        del self.buffers[old]
+        journal.editor = new
+        self.buffers[new] = journal
+        if isinstance(new, QsciScintilla):
+            self._connect(journal)
+
+    def detach(self, editor):
+        """停止记录并删除日志（关闭标签页）"""
+        journal = self.buffers.pop(editor, None)
+        if journal is not None and journal.started:
+            self._submit('remove', journal.path)
+
+    def set_meta(self, editor, title, file_path):
+        """标签页标题或文件路径改变（另存为、复用未命名标签页）"""
+        journal = self.buffers.get(editor)
+        if journal is not None and (journal.title, journal.file_path) != (title, file_path):
+            journal.title = title
+            journal.file_path = file_path
+            journal.meta_changed = journal.started
+
+    def seq(self, editor):
+        journal = self.buffers.get(editor)
+        return journal.seq if journal is not None else None
+
+    def mark_clean(self, editor, seq=None):
+        """缓冲区内容已与磁盘一致（打开或保存成功）；seq 不是最新时说明保存后又有修改"""
+        journal = self.buffers.get(editor)
+        if journal is None or (seq is not None and seq != journal.seq):
+            return
+        journal.pending.clear()
+        journal.meta_changed = False
+        if journal.started:
+            journal.started = False
+            self._submit('remove', journal.path)
+
+    def _on_modified(self, journal, position, modification_type, text, length, *args):
+        if modification_type & SC_MOD_INSERTTEXT:
+            if text is None or len(text) != length:
+                text = bytes(journal.editor.bytes(position, position + length))[:length]
+            journal.pending.append((OP_INSERT, position, text))
+        elif modification_type & SC_MOD_DELETETEXT:
+            journal.pending.append((OP_DELETE, position, length))
+        else:
+            return
+        journal.seq += 1
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        """把积累的增量交给后台线程写入"""
+        self.timer.stop()
+        for journal in self.buffers.values():
+            if not journal.pending and not journal.meta_changed:
+                continue
+            if not isinstance(journal.editor, QsciScintilla):
+                # 休眠中的标签页，唤醒后再写入
+                continue
+            editor = journal.editor
+            size = editor.length()
+            if not journal.started or journal.written > max(COMPACT_MIN_BYTES, 2 * size):
+                # 第一次写入或日志过大：用全文快照重写
+                meta = _encode_meta(journal)
+                data = _RECORD.pack(OP_SNAPSHOT, len(meta), size) + meta + bytes(editor.bytes(0, size))[:size]
+                self._submit('replace', journal.path, data)
+                journal.written = len(data)
+                journal.started = True
+            else:
+                parts = []
+                if journal.meta_changed:
+                    meta = _encode_meta(journal)
+                    parts.append(_RECORD.pack(OP_META, 0, len(meta)) + meta)
+                for op, position, value in journal.pending:
+                    if op == OP_INSERT:
+                        parts.append(_RECORD.pack(op, position, len(value)) + value)
+                    else:
+                        parts.append(_RECORD.pack(op, position, value))
+                data = b"".join(parts)
+                self._submit('append', journal.path, data)
+                journal.written += len(data)
+            journal.pending.clear()
+            journal.meta_changed = False
+
+    def recoverable(self):
+        """返回上次运行留下的日志 [(日志路径, 元数据, 文本)]"""
+        own = {journal.path for journal in self.buffers.values()}
+        result = []
+        if not os.path.isdir(RECOVERY_DIR):
+            return result
+        for name in sorted(os.listdir(RECOVERY_DIR)):
+            path = os.path.join(RECOVERY_DIR, name)
+            if not name.endswith('.journal') or path in own:
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    meta, text = replay(f.read())
+            except (OSError, ValueError):
+                continue
+            if meta is not None:
+                result.append((path, meta, text.decode('utf-8', errors='replace')))
+        return result
+
+    def discard(self, path):
+        self._submit('remove', path)
+
+    def shutdown(self):
+        """退出前写入剩余的增量并等待后台线程结束"""
+        self.flush()
+        if self.writer is not None:
+            self.writer.jobs.put(None)
+            self.writer.wait()
+            self.writer = None
+
+
+recovery_journal = RecoveryJournal()
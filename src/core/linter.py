@@ -0,0 +1,176 @@
+import ast, builtins, hashlib, multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+try:
+    from pyflakes import checker as pyflakes_checker
+except ImportError:
+    pyflakes_checker = None
+
+# 最多缓存的检查结果数量（按缓冲区内容哈希）
+MAX_CACHED_RESULTS = 64
+
+# 模块级别总是存在的名称
+MODULE_NAMES = {'__file__', '__name__', '__doc__', '__builtins__', '__spec__', '__loader__',
+                '__package__', '__path__', '__annotations__', '__dict__', '__debug__'}
+
+
+def lintable(file_path):
+    """未命名标签页和 .py 文件才检查"""
+    return not file_path or file_path.lower().endswith(('.py', '.pyw'))
+
+
+def _builtin_checks(tree):
+    """未安装 pyflakes 时的简化检查：未使用的导入和未定义的名称
+
+    不区分作用域和先后顺序，只报告在整个文件中都找不到的名称，宁可漏报也不误报。
+    """
+    bound = set(MODULE_NAMES) | set(dir(builtins))
+    used = set()
+    imports = []
+    star_import = False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Load):
+                used.add(node.id)
+            else:
+                bound.add(node.id)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            if isinstance(node, ast.ImportFrom) and node.module == '__future__':
+                continue
+            for alias in node.names:
+                if alias.name == '*':
+                    star_import = True
+                    continue
+                name = alias.asname or alias.name.split('.')[0]
+                bound.add(name)
+                imports.append((node, name))
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            bound.add(node.rest)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            # __all__ 和字符串形式的类型注解中引用的名称
+            used.update(node.value.replace('.', ' ').replace('[', ' ').replace(']', ' ').replace(',', ' ').split())
+        elif hasattr(ast, 'TypeVar') and isinstance(node, (ast.TypeVar, ast.ParamSpec, ast.TypeVarTuple)):
+            bound.add(node.name)
+
+    diagnostics = []
+    for node, name in imports:
+        if name not in used:
+            diagnostics.append((node.lineno - 1, node.col_offset, 'warning', f"'{name}' imported but unused"))
+    if not star_import:
+        reported = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load) and node.id not in bound and node.id not in reported:
+                reported.add(node.id)
+                diagnostics.append((node.lineno - 1, node.col_offset, 'warning', f"undefined name '{node.id}'"))
+    return diagnostics
+
+
+def check(data):
+    """在工作进程中检查一份缓冲区快照，返回 [(行, 列, 'error'|'warning', 消息)]，行列从 0 开始"""
+    source = data.decode('utf-8', errors='replace')
+    try:
+        tree = ast.parse(source)
+        # 编译才能发现函数外的 return 等错误
+        compile(tree, '<buffer>', 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        return [(max((e.lineno or 1) - 1, 0), max((e.offset or 1) - 1, 0), 'error', e.msg)]
+    except (ValueError, RecursionError) as e:
+        return [(0, 0, 'error', str(e))]
+    if pyflakes_checker is None:
+        diagnostics = _builtin_checks(tree)
+    else:
+        diagnostics = [
+            (message.lineno - 1, message.col, 'warning', message.message % message.message_args)
+            for message in pyflakes_checker.Checker(tree, '<buffer>').messages
+        ]
+    return sorted(diagnostics)
+
+
+class LintService(QObject):
+    """后台语法检查
+
+    编辑器停止输入一段时间后把缓冲区快照交给工作进程检查，界面线程只负责取快照和计算哈希。
+    结果按内容哈希缓存；同一编辑器有新的请求时取消尚未开始的旧任务，已开始的任务结果被丢弃。
+    """
+    checked = pyqtSignal(object, str, object) # 编辑器, 内容哈希, 检查结果（工作进程异常退出时为 None）
+
+    def __init__(self):
+        super().__init__()
+        self._executor = None
+        self._jobs = {} # 编辑器 -> (内容哈希, Future)
+        self._cache = OrderedDict()
+        # 回调在执行器的线程中发出信号，排队回到界面线程处理
+        self.checked.connect(self._on_checked)
+
+    def request(self, editor):
+        size = editor.length()
+        data = bytes(editor.bytes(0, size))[:size]
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        job = self._jobs.get(editor)
+        if job is not None:
+            if job[0] == digest:
+                return
+            job[1].cancel()
+            del self._jobs[editor]
+        if digest in self._cache:
+            self._cache.move_to_end(digest)
+            editor.set_diagnostics(self._cache[digest])
+            return
+        if self._executor is None:
+            # spawn：不复制界面进程的状态，各平台行为一致
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        future = self._executor.submit(check, data)
+        self._jobs[editor] = (digest, future)
+        future.add_done_callback(lambda f: self._done(editor, digest, f))
+
+    def _done(self, editor, digest, future):
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception:
+            result = None
+        self.checked.emit(editor, digest, result)
+
+    def _on_checked(self, editor, digest, diagnostics):
+        if diagnostics is None:
+            # 工作进程异常退出，下次请求时重新创建
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+        else:
+            self._cache[digest] = diagnostics
+            if len(self._cache) > MAX_CACHED_RESULTS:
+                self._cache.popitem(last=False)
+        job = self._jobs.get(editor)
+        if job is None or job[0] != digest:
+            # 已有更新的请求，或编辑器已关闭
+            return
+        del self._jobs[editor]
+        if diagnostics is not None:
+            editor.set_diagnostics(diagnostics)
+
+    def forget(self, editor):
+        """编辑器关闭或休眠时取消它的任务"""
+        job = self._jobs.pop(editor, None)
+        if job is not None:
+            job[1].cancel()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+lint_service = LintService()
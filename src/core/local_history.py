@@ -0,0 +1,209 @@
+import os, json, time, zlib, hashlib, threading
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+from src.config import CONFIG_FILE, config
+
+# 本地历史目录（与配置文件同级）
+HISTORY_DIR = os.path.join(os.path.dirname(CONFIG_FILE), 'history')
+OBJECTS_DIR = os.path.join(HISTORY_DIR, 'objects')
+INDEX_DIR = os.path.join(HISTORY_DIR, 'index')
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# 增量快照：魔数 + 上一个版本的哈希（64 个十六进制字符）+ 链长度（1 字节）+ 以上一个版本为字典压缩的数据
+DELTA_MAGIC = b'PSDELTA1'
+DELTA_HEADER = len(DELTA_MAGIC) + 65
+
+# 增量链的最大长度：超过后存储一份完整快照，读取任何版本最多解压这么多个快照
+MAX_CHAIN = 16
+
+
+def _compress(data, base=None):
+    """压缩快照；给出 base 时以其内容为字典（zstd 为原始内容字典，zlib 为 zdict，只用到最后 32 KB）"""
+    if zstd is not None:
+        if base is None:
+            return zstd.ZstdCompressor(level=10).compress(data)
+        dictionary = zstd.ZstdCompressionDict(base, dict_type=zstd.DICT_TYPE_RAWCONTENT)
+        return zstd.ZstdCompressor(level=10, dict_data=dictionary).compress(data)
+    compressor = zlib.compressobj(9) if base is None else zlib.compressobj(9, zdict=base)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data, base=None):
+    # 根据魔数区分，未安装 zstandard 时写入的 zlib 对象和之后的 zstd 对象可以共存
+    if data.startswith(ZSTD_MAGIC):
+        if zstd is None:
+            raise ValueError("zstandard is required to read this snapshot")
+        if base is None:
+            return zstd.ZstdDecompressor().decompress(data)
+        dictionary = zstd.ZstdCompressionDict(base, dict_type=zstd.DICT_TYPE_RAWCONTENT)
+        return zstd.ZstdDecompressor(dict_data=dictionary).decompress(data)
+    try:
+        decompressor = zlib.decompressobj() if base is None else zlib.decompressobj(zdict=base)
+        return decompressor.decompress(data) + decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(str(e))
+
+
+class LocalHistory:
+    """已保存文件的本地历史
+
+    快照按内容的 SHA-256 存储并压缩（有 zstandard 时用 zstd，否则用 zlib），相同内容只存一份。
+    快照通常是增量：以同一文件的上一个版本为字典压缩，只占改动部分的空间；增量链达到 MAX_CHAIN
+    时存一份完整快照。每个文件有一份时间线索引（JSON Lines，每行一条：时间、哈希、大小、上一个版本），
+    浏览历史时只读索引，打开某个版本时才读取并解压对应的快照。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latest = {} # 路径 -> (哈希, 内容)，保存时不必解压上一个版本
+
+    def _index_path(self, file_path):
+        key = hashlib.sha256(os.path.normcase(os.path.abspath(file_path)).encode('utf-8')).hexdigest()[:32]
+        return os.path.join(INDEX_DIR, f"{key}.jsonl")
+
+    def _object_path(self, digest):
+        return os.path.join(OBJECTS_DIR, digest[:2], digest)
+
+    def record(self, file_path, text):
+        """记录一次保存（在保存线程中调用）；内容与上一个版本相同时不记录"""
+        if not config.get('local_history', True):
+            return
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entries = self._read_index(self._index_path(file_path))
+            if entries and entries[-1]['hash'] == digest:
+                return
+            object_path = self._object_path(digest)
+            if os.path.exists(object_path):
+                base = self._header(digest)[0]
+            else:
+                base, blob = self._encode(file_path, data, entries)
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                temp_path = object_path + '.tmp'
+                with open(temp_path, 'wb') as f:
+                    f.write(blob)
+                os.replace(temp_path, object_path)
+            self._latest[file_path] = (digest, data)
+            entry = {'time': time.time(), 'hash': digest, 'size': len(data), 'path': file_path}
+            if base:
+                # 记在索引中，清理旧版本时不会删除仍被依赖的快照
+                entry['base'] = base
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            with open(self._index_path(file_path), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            limit = config.get('local_history_max_entries', 200)
+            if sum(1 for item in entries if not item.get('base_only')) + 1 > limit:
+                self._prune(file_path, entries + [entry], limit)
+
+    def _encode(self, file_path, data, entries):
+        """返回 (上一个版本的哈希或 None, 快照数据)；增量链太长或上一个版本读不到时存储完整快照"""
+        if entries:
+            parent = entries[-1]['hash']
+            try:
+                depth = self._header(parent)[1] + 1
+                if depth <= MAX_CHAIN:
+                    latest = self._latest.get(file_path)
+                    base = latest[1] if latest and latest[0] == parent else self._read_bytes(parent)
+                    return parent, DELTA_MAGIC + parent.encode('ascii') + bytes([depth]) + _compress(data, base)
+            except (OSError, ValueError):
+                pass
+        return None, _compress(data)
+
+    def _header(self, digest):
+        """返回 (上一个版本的哈希, 链长度)；完整快照为 (None, 0)"""
+        with open(self._object_path(digest), 'rb') as f:
+            header = f.read(DELTA_HEADER)
+        if not header.startswith(DELTA_MAGIC):
+            return None, 0
+        return header[len(DELTA_MAGIC):-1].decode('ascii'), header[-1]
+
+    def timeline(self, file_path):
+        """返回文件的历史版本列表（按时间先后），只读取索引"""
+        return [entry for entry in self._read_index(self._index_path(file_path)) if not entry.get('base_only')]
+
+    @staticmethod
+    def _read_index(path):
+        entries = []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # 写入时中断留下的半行
+                        continue
+        except OSError:
+            pass
+        return entries
+
+    def _read_bytes(self, digest):
+        # 沿增量链找到完整快照，再依次应用各个增量
+        deltas = []
+        while True:
+            with open(self._object_path(digest), 'rb') as f:
+                data = f.read()
+            if not data.startswith(DELTA_MAGIC):
+                break
+            if len(deltas) > MAX_CHAIN:
+                raise ValueError("snapshot chain is broken")
+            deltas.append(data[DELTA_HEADER:])
+            digest = data[len(DELTA_MAGIC):DELTA_HEADER - 1].decode('ascii')
+        content = _decompress(data)
+        for delta in reversed(deltas):
+            content = _decompress(delta, content)
+        return content
+
+    def read(self, digest):
+        """读取并解压一个快照"""
+        return self._read_bytes(digest).decode('utf-8')
+
+    def _prune(self, file_path, entries, limit):
+        """只保留最近的 limit 个版本，并删除不再被任何时间线引用的快照
+
+        被保留的版本沿增量链依赖的旧版本不显示在时间线中，但以 base_only 记录在索引里，之后可以继续清理。
+        """
+        index_path = self._index_path(file_path)
+        visible = [entry for entry in entries if not entry.get('base_only')]
+        kept = {id(entry) for entry in visible[-limit:]}
+        # 保留的版本（包括其他文件中相同内容的版本）沿增量链依赖的快照都不能删除
+        bases = {entry['hash']: entry.get('base') for entry in entries}
+        pending = [entry['hash'] for entry in visible[-limit:]]
+        for name in os.listdir(INDEX_DIR):
+            path = os.path.join(INDEX_DIR, name)
+            if path == index_path or not name.endswith('.jsonl'):
+                continue
+            for entry in self._read_index(path):
+                bases.setdefault(entry['hash'], entry.get('base'))
+                if not entry.get('base_only'):
+                    pending.append(entry['hash'])
+        needed = set()
+        while pending:
+            digest = pending.pop()
+            if digest and digest not in needed:
+                needed.add(digest)
+                pending.append(bases.get(digest))
+
+        rewritten = []
+        base_only = set()
+        for entry in entries:
+            if id(entry) in kept:
+                rewritten.append(entry)
+            elif entry['hash'] in needed and entry['hash'] not in base_only:
+                base_only.add(entry['hash'])
+                rewritten.append(dict(entry, base_only=True))
+        temp_path = index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in rewritten)
+        os.replace(temp_path, index_path)
+
+        for digest in {entry['hash'] for entry in entries} - needed:
+            try:
+                os.remove(self._object_path(digest))
+            except OSError:
+                pass
+
+
+local_history = LocalHistory()
@@ -0,0 +1,139 @@
+import re, mmap, tempfile
+from array import array
+
+_NEWLINE_RE = re.compile(b'\n')
+
+
+class OutputLog:
+    """终端输出的磁盘日志
+
+    从终端顶部裁剪掉的行按原始 UTF-8 字节追加写入临时文件，同时维护行首偏移索引；
+    读取时通过内存映射按行号取出，内存占用只与索引大小有关，与输出总量无关。
+    临时文件在关闭（或进程退出）时自动删除。
+    """
+
+    def __init__(self):
+        self._file = None
+        self._map = None
+        self._offsets = array('Q', [0])
+        self.size = 0
+
+    @property
+    def line_count(self):
+        return len(self._offsets) - 1
+
+    def append(self, data):
+        """追加若干完整的行（data 以换行结尾）"""
+        if not data:
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='pystart-output-', suffix='.log')
+        # Windows 上文件被映射时不能随意改变大小，写入前先解除映射，读取时再重新映射
+        self._close_map()
+        self._file.seek(0, 2)
+        self._file.write(data)
+        base = self.size
+        self._offsets.extend(base + match.end() for match in _NEWLINE_RE.finditer(data))
+        self.size += len(data)
+
+    def _close_map(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _mapped(self):
+        if self._map is None and self.size:
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def read_bytes(self, first, count):
+        """按行号读取 [first, first + count) 行的原始字节"""
+        first = max(0, min(first, self.line_count))
+        last = max(first, min(first + count, self.line_count))
+        if first == last:
+            return b""
+        return self._mapped()[self._offsets[first]:self._offsets[last]]
+
+    def read_lines(self, first, count):
+        """按行号读取若干行文本（不含换行符）"""
+        data = self.read_bytes(first, count)
+        if not data:
+            return []
+        return data.decode('utf-8', errors='replace').split('\n')[:-1]
+
+    def line_of_offset(self, offset):
+        """返回字节偏移所在的行号"""
+        low, high = 0, self.line_count
+        while low < high:
+            mid = (low + high) // 2
+            if self._offsets[mid + 1] <= offset:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def snapshot(self):
+        """返回当前内容的只读映射，供后台线程读取（之后的追加不影响该映射）"""
+        if not self.size:
+            return None
+        self._file.flush()
+        return mmap.mmap(self._file.fileno(), self.size, access=mmap.ACCESS_READ)
+
+    def clear(self):
+        """删除日志文件并清空索引"""
+        self._close_map()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._offsets = array('Q', [0])
+        self.size = 0
+
+
+class SearchPattern:
+    """查找条件，直接在 UTF-8 字节上搜索，无需解码
+
+    普通文本用 bytes.find 查找，比正则快得多；忽略大小写时先把数据转为小写
+    （与 bytes 正则一样只对 ASCII 生效）。正则表达式无效时抛出 re.error。
+    """
+
+    def __init__(self, text, regex=False, case_sensitive=False):
+        needle = text.encode('utf-8')
+        self.regex = re.compile(needle, 0 if case_sensitive else re.IGNORECASE) if regex else None
+        self.case_sensitive = case_sensitive
+        self.needle = needle if case_sensitive else needle.lower()
+
+    def spans(self, data):
+        """依次产生非空匹配的 (起, 止) 字节偏移"""
+        if self.regex is not None:
+            for match in self.regex.finditer(data):
+                if match.end() > match.start():
+                    yield match.start(), match.end()
+            return
+        if not self.needle:
+            return
+        if not self.case_sensitive:
+            data = data.lower()
+        size = len(self.needle)
+        pos = data.find(self.needle)
+        while pos != -1:
+            yield pos, pos + size
+            pos = data.find(self.needle, pos + size)
+
+
+def iter_line_matches(data, pattern, base_line=0):
+    """在一段以行为单位的字节数据中查找匹配，依次产生 (行号, 行内字节偏移, 字节长度)
+
+    pattern 为 SearchPattern；行号从 base_line 开始，通过增量计数换行符得到，
+    整体只扫描数据一遍。
+    """
+    line = base_line
+    line_start = 0
+    last = 0
+    for start, end in pattern.spans(data):
+        newlines = data.count(b'\n', last, start)
+        if newlines:
+            line += newlines
+            line_start = data.rfind(b'\n', last, start) + 1
+        last = start
+        yield line, start - line_start, end - start
@@ -0,0 +1,396 @@
+import os, re, time, queue, bisect, itertools
+from array import array
+from PyQt6.QtCore import QThread, pyqtSignal
+from src.core.workspace import file_cache
+
+# 最多验证的候选数量，以及返回的结果数量
+MAX_CANDIDATES = 1000
+MAX_RESULTS = 50
+
+# 候选不超过这个数量时验证全部候选：得到的全部匹配用于筛选更长的查找内容
+FULL_MATCH_LIMIT = 20000
+
+# 每批验证的候选数量，以及先显示已找到的结果之前最多用的时间（秒）
+VERIFY_BATCH = 2048
+FIRST_RESULTS_TIME = 0.005
+
+# 增删的路径超过总数的这个比例时重建索引，而不是逐个更新
+REBUILD_RATIO = 0.1
+
+# 最近打开的文件最多记录的数量
+MAX_RECENT_FILES = 50
+
+# 文件名中这些字符之后算作单词的开头
+_WORD_BREAKS = frozenset('_-. ')
+
+_BIT_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+_NONZERO_BYTE = re.compile(rb'[^\x00]')
+
+
+def bitset(flags):
+    """[是否, ...] 转为整数位集，第 i 项对应第 i 位"""
+    if not flags:
+        return 0
+    return int(bytes(flags).translate(_BIT_DIGITS)[::-1], 2)
+
+
+# 每个字节值中为 1 的位
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+
+
+def iter_bits(bits):
+    """按从小到大的顺序生成位集中的序号"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+    for match in _NONZERO_BYTE.finditer(data):
+        base = match.start() * 8
+        for bit in _BYTE_BITS[data[match.start()]]:
+            yield base + bit
+
+
+def to_bitset(indices, size):
+    """序号转为整数位集"""
+    data = bytearray((size + 7) // 8)
+    for i in indices:
+        data[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(data, 'little')
+
+
+def fuzzy_pattern(query):
+    """查找内容的字符按顺序出现（中间可以有其他字符）的正则表达式
+
+    字符之间用否定字符类而不是 .*?：匹配失败时不回溯，每个路径最多扫描一遍。
+    """
+    parts = [re.escape(query[0])]
+    for char in query[1:]:
+        char = re.escape(char)
+        parts.append(f'[^{char}]*{char}')
+    return ''.join(parts)
+
+
+class Query:
+    """编译好的查找内容（转为小写，忽略空格，路径分隔符统一为 /）"""
+
+    def __init__(self, text):
+        self.text = text.lower().replace('\\', '/').replace(' ', '')
+        self.chars = set(self.text)
+        self.fuzzy_regex = re.compile(fuzzy_pattern(self.text)) if self.text else None
+
+    def score(self, lower, name_start=None):
+        """匹配的等级，越大越好；不匹配时返回 -1"""
+        if not self.text:
+            return 0
+        if name_start is None:
+            name_start = lower.rfind('/') + 1
+        text = self.text
+        pos = lower.find(text, name_start)
+        if pos == name_start:
+            return 5
+        if pos > name_start:
+            return 4 if lower[pos - 1] in _WORD_BREAKS else 3
+        if self.fuzzy_regex.search(lower, name_start):
+            return 2
+        if text in lower:
+            return 1
+        return 0 if self.fuzzy_regex.search(lower) else -1
+
+
+class PathIndex:
+    """一个文件夹下所有文件的相对路径，以及每个字符出现在哪些路径（文件名）中的位集
+
+    查找时先用位集的与运算得到包含全部字符的路径，只对它们用正则表达式验证顺序，
+    不必逐个路径调用 Python。路径按长度排序，先验证的更短，候选足够时提前停止。
+    新增的路径追加在末尾，删除的路径从 alive 中去掉。
+    """
+
+    def __init__(self, root, paths):
+        self.root = root
+        paths = sorted(paths)
+        paths.sort(key=len)
+        self.paths = paths
+        self.lower = [path.lower() for path in paths]
+        self.name_starts = [path.rfind('/') + 1 for path in self.lower]
+        self.positions = {path: i for i, path in enumerate(paths)}
+        self.alive = (1 << len(paths)) - 1
+        self.removed = set()
+        # 全部路径拼接成一个文本：连续出现的查找内容用 str.find 查找，不必逐个路径比较
+        self.text = '\n'.join(self.lower) + '\n'
+        self.offsets = array('q', itertools.accumulate((len(path) + 1 for path in self.lower), initial=0))
+        self.path_bits = self._char_bits(self.lower)
+        self.name_bits = self._char_bits([path[start:] for path, start in zip(self.lower, self.name_starts)])
+
+    @staticmethod
+    def _char_bits(strings):
+        chars = set()
+        for text in strings:
+            chars.update(text)
+        return {char: bitset([char in text for text in strings]) for char in chars}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def update(self, added, removed):
+        """增删路径；变化太多时返回 False，由调用者重建索引"""
+        if len(added) + len(removed) > len(self.paths) * REBUILD_RATIO:
+            return False
+        for path in removed:
+            i = self.positions.pop(path, None)
+            if i is not None:
+                self.alive &= ~(1 << i)
+                self.removed.add(i)
+        added = [path for path in added if path not in self.positions]
+        self.text += ''.join(path.lower() + '\n' for path in added)
+        for path in added:
+            i = len(self.paths)
+            lower = path.lower()
+            start = lower.rfind('/') + 1
+            self.paths.append(path)
+            self.lower.append(lower)
+            self.name_starts.append(start)
+            self.positions[path] = i
+            self.offsets.append(self.offsets[-1] + len(lower) + 1)
+            bit = 1 << i
+            self.alive |= bit
+            for char in set(lower):
+                self.path_bits[char] = self.path_bits.get(char, 0) | bit
+            for char in set(lower[start:]):
+                self.name_bits[char] = self.name_bits.get(char, 0) | bit
+        return True
+
+    @staticmethod
+    def _intersect(char_bits, chars, bits):
+        for char in chars:
+            bits &= char_bits.get(char, 0)
+            if not bits:
+                break
+        return bits
+
+    def _substrings(self, text, within=None):
+        """按序号从小到大分批生成连续出现 text 的路径的序号，每批最多验证 VERIFY_BATCH 个路径"""
+        if within is not None:
+            lower = self.lower
+            for chunk in _chunks(within & self.alive):
+                yield [i for i in chunk if text in lower[i]]
+            return
+        joined, offsets, removed = self.text, self.offsets, self.removed
+        rows = len(offsets) - 1
+        # 查找内容不含换行，不会跨越两个路径，可以按行分段查找
+        for first in range(0, rows, VERIFY_BATCH):
+            end = offsets[min(first + VERIFY_BATCH, rows)]
+            batch = []
+            pos = joined.find(text, offsets[first], end)
+            while pos >= 0:
+                row = bisect.bisect_right(offsets, pos) - 1
+                if row not in removed:
+                    batch.append(row)
+                # 同一个路径只需要找到一次
+                pos = joined.find(text, offsets[row + 1], end)
+            yield batch
+
+    def candidates(self, query, narrow):
+        """按优先顺序分批生成匹配的序号；每验证 VERIFY_BATCH 个候选至少生成一批（可能为空），调用者可以在批之间停止
+
+        narrow 为 {'names' | 'substrings' | 'paths': 位集}，是更短的查找内容在文件名、连续出现、路径中的全部匹配：
+        输入时查找内容越来越长，只需要在上一次的匹配中继续筛选。每一步验证完的全部匹配写回 narrow。
+        """
+        search = query.fuzzy_regex.search
+        lower, name_starts, size = self.lower, self.name_starts, len(self.paths)
+        paths = narrow.pop('paths', None)
+        path_bits = self._intersect(self.path_bits, query.chars, self.alive if paths is None else paths & self.alive)
+        names = narrow.pop('names', None)
+        name_bits = self._intersect(self.name_bits, query.chars, path_bits if names is None else names & path_bits)
+        substrings = narrow.pop('substrings', None)
+        found = {}
+        # 先找文件名中匹配的（最可能是要找的文件）
+        for chunk in _chunks(name_bits):
+            batch = [i for i in chunk if search(lower[i], name_starts[i])]
+            found.update(dict.fromkeys(batch))
+            if len(found) >= MAX_CANDIDATES:
+                yield batch[:len(batch) - (len(found) - MAX_CANDIDATES)]
+                return
+            yield batch
+        narrow['names'] = to_bitset(found, size)
+        count = bin(path_bits).count('1')
+        # 文件名中的匹配不够时找路径中连续出现的（如 http/client）；候选不多时逐个比较，不必查找整个文本
+        if len(found) < MAX_RESULTS and path_bits and paths is None:
+            if substrings is None and count <= FULL_MATCH_LIMIT:
+                substrings = path_bits
+            hits = []
+            for batch in self._substrings(query.text, substrings):
+                hits.extend(batch)
+                batch = [i for i in batch if i not in found][:MAX_CANDIDATES - len(found)]
+                found.update(dict.fromkeys(batch))
+                yield batch
+                if len(found) >= MAX_CANDIDATES:
+                    return
+            narrow['substrings'] = to_bitset(hits, size)
+        # 再逐个验证路径中的模糊匹配；候选很多而已有更好的匹配时，只补足显示的数量（路径按长度排序，先找到的更短）
+        limit = MAX_RESULTS if found and count > FULL_MATCH_LIMIT else MAX_CANDIDATES
+        if len(found) >= limit:
+            return
+        for chunk in _chunks(path_bits):
+            batch = [i for i in chunk if i not in found and search(lower[i])]
+            found.update(dict.fromkeys(batch))
+            if len(found) >= limit:
+                yield batch[:len(batch) - (len(found) - limit)]
+                return
+            yield batch
+        narrow['paths'] = to_bitset(found, size)
+
+
+def _chunks(bits):
+    """把位集中的序号按 VERIFY_BATCH 个一组生成"""
+    bits = iter_bits(bits)
+    while chunk := list(itertools.islice(bits, VERIFY_BATCH)):
+        yield chunk
+
+
+class QuickOpenMatcher(QThread):
+    """快速打开的后台线程：维护当前文件夹的路径索引并匹配，连续输入时只处理最新的查找内容
+
+    路径列表来自 file_cache，只重新列出有变化的目录；索引只增删变化的路径。
+    """
+    matched = pyqtSignal(str, object) # 查找内容, [(路径, 显示的路径, 是否为最近打开的文件)]
+    indexed = pyqtSignal(int) # 文件数量
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+        self.index = None
+        self._walked = None # 上次遍历得到的路径列表
+        self._narrow = ("", {}) # (查找内容, 全部匹配)，见 PathIndex.candidates
+        self._match_job = None
+        self._stopping = False
+
+    def refresh(self, root):
+        self._put(('refresh', root))
+
+    def match(self, text, root, recent):
+        self._put(('match', text, root, list(recent)))
+
+    def _put(self, job):
+        self.jobs.put(job)
+        if not self.isRunning():
+            self._stopping = False
+            self.start()
+
+    def stop(self):
+        if self.isRunning():
+            self._stopping = True
+            self.jobs.put(None)
+            self.wait()
+
+    def run(self):
+        while True:
+            jobs = [self.jobs.get()]
+            while not self.jobs.empty():
+                jobs.append(self.jobs.get_nowait())
+            if any(job is None for job in jobs):
+                break
+            # 只处理最新的查找内容；先用现有的索引匹配，再更新索引
+            matches = [job for job in jobs if job[0] == 'match']
+            refresh = [job[1] for job in jobs if job[0] == 'refresh']
+            if matches:
+                self._match_job = matches[-1]
+                self._match(*self._match_job[1:])
+            if refresh and self._refresh(refresh[-1]) and self._match_job is not None:
+                self._match(*self._match_job[1:])
+
+    def _refresh(self, root):
+        """重新遍历文件夹并更新索引；返回索引是否变化"""
+        if not root:
+            changed = self.index is not None
+            self.index = self._walked = None
+            self._narrow = ("", {})
+            return changed
+        prefix = len(os.path.join(root, ''))
+        paths = []
+        for path, _, _ in file_cache.walk(root):
+            if self._stopping:
+                return False
+            paths.append(path[prefix:])
+        if os.sep != '/':
+            paths = [path.replace(os.sep, '/') for path in paths]
+        index = self.index
+        if index is not None and index.root == root:
+            if paths == self._walked:
+                return False
+            walked = set(paths)
+            previous = set(self._walked)
+            if not index.update(walked - previous, previous - walked):
+                index = None
+        else:
+            index = None
+        self._walked = paths
+        self._narrow = ("", {})
+        self.index = index or PathIndex(root, paths)
+        self.indexed.emit(len(self.index))
+        return True
+
+    def _match(self, text, root, recent):
+        """匹配并发出结果；FIRST_RESULTS_TIME 内没有验证完时先发出已找到的结果（路径短的先验证），再继续验证并发出完整的结果
+
+        还没有找到任何匹配时不先发出，列表中保留上一次的结果。超过 FIRST_RESULTS_TIME 后有新的查找内容时放弃这一次。
+        """
+        query = Query(text)
+        deadline = time.perf_counter() + FIRST_RESULTS_TIME
+        found = []
+        shown = False
+        for batch in self._candidates(query, root, recent):
+            found.extend(batch)
+            if time.perf_counter() > deadline:
+                if not self.jobs.empty():
+                    return
+                if found and not shown:
+                    shown = True
+                    self.matched.emit(text, self._results(query, root, recent, found))
+        self.matched.emit(text, self._results(query, root, recent, found))
+
+    def search(self, text, root, recent):
+        """匹配最近打开的文件和当前文件夹中的文件，返回前 MAX_RESULTS 个 (路径, 显示的路径, 是否为最近打开的文件)"""
+        query = Query(text)
+        found = [i for batch in self._candidates(query, root, recent) for i in batch]
+        return self._results(query, root, recent, found)
+
+    def _index(self, root):
+        return self.index if self.index is not None and self.index.root == root else None
+
+    def _candidates(self, query, root, recent):
+        """分批生成索引中匹配的序号，见 PathIndex.candidates"""
+        index = self._index(root)
+        if index is None:
+            return
+        if not query.text:
+            # 没有查找内容时列出最短的路径
+            yield list(itertools.islice(iter_bits(index.alive), MAX_RESULTS + len(recent)))
+            return
+        text, narrow = self._narrow
+        narrow = dict(narrow) if query.text.startswith(text) else {}
+        # 中途放弃时 narrow 中只有验证完的步骤，下一次仍然可以用来筛选
+        self._narrow = (query.text, narrow)
+        yield from index.candidates(query, narrow)
+
+    def _results(self, query, root, recent, candidates):
+        """按匹配等级排序，等级相同时最近打开的在前，其余的路径短的在前"""
+        index = self._index(root)
+        inside = os.path.join(root, '') if root else None
+        ranked = []
+        for order, path in enumerate(recent):
+            shown = path[len(inside):] if inside and path.startswith(inside) else path
+            rank = query.score(shown.lower().replace('\\', '/'))
+            if rank >= 0:
+                ranked.append((-rank, False, order, path, shown))
+        if index is not None:
+            ranked.extend((-query.score(index.lower[i], index.name_starts[i]), True, i, None, None) for i in candidates)
+        ranked.sort()
+        results = []
+        seen = set()
+        for _, indexed, i, path, shown in ranked:
+            if indexed:
+                shown = index.paths[i]
+                path = os.path.join(root, shown)
+            if os.path.normcase(path) not in seen:
+                seen.add(os.path.normcase(path))
+                results.append((path, shown, not indexed))
+                if len(results) >= MAX_RESULTS:
+                    break
+        return results
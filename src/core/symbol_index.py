@@ -0,0 +1,350 @@
+import os, ast, queue, sqlite3, hashlib, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PyQt6.QtCore import QObject, QThread, pyqtSignal
+from src.config import CONFIG_FILE
+from src.core.workspace import walk_files
+
+# 每个文件夹一个索引数据库（与配置文件同级）
+SYMBOLS_DIR = os.path.join(os.path.dirname(CONFIG_FILE), 'symbols')
+
+# 一批写入多少个文件后提交一次事务
+COMMIT_EVERY = 200
+
+# 未保存或不在索引中的缓冲区，超过这个大小时不在界面线程中解析
+MAX_BUFFER_PARSE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, path TEXT UNIQUE, mtime REAL, size INTEGER, hash TEXT);
+CREATE TABLE IF NOT EXISTS symbols (file_id INTEGER, name TEXT, kind TEXT, line INTEGER, col INTEGER, container TEXT);
+CREATE TABLE IF NOT EXISTS refs (file_id INTEGER, name TEXT, line INTEGER, col INTEGER);
+CREATE TABLE IF NOT EXISTS imports (file_id INTEGER, name TEXT, module TEXT, line INTEGER);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_file ON symbols (file_id);
+CREATE INDEX IF NOT EXISTS refs_name ON refs (name);
+CREATE INDEX IF NOT EXISTS refs_file ON refs (file_id);
+CREATE INDEX IF NOT EXISTS imports_file ON imports (file_id);
+"""
+
+
+class _Collector(ast.NodeVisitor):
+    """收集定义（类、函数、模块级变量）、导入和名称引用"""
+
+    def __init__(self):
+        self.symbols = [] # (名称, 类型, 行, 列, 所在的类或函数)
+        self.refs = [] # (名称, 行, 列)
+        self.imports = [] # (绑定的名称, 模块, 行)
+        self.scope = [] # [(名称, 是否为类)]
+
+    def _container(self):
+        return ".".join(name for name, _ in self.scope)
+
+    def _in_class_or_module(self):
+        return not self.scope or self.scope[-1][1]
+
+    def _define(self, node, kind):
+        self.symbols.append((node.name, kind, node.lineno - 1, node.col_offset, self._container()))
+
+    def visit_ClassDef(self, node):
+        self._define(node, 'class')
+        self._visit_scope(node, True)
+
+    def visit_FunctionDef(self, node):
+        self._define(node, 'method' if self.scope and self.scope[-1][1] else 'function')
+        self._visit_scope(node, False)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _visit_scope(self, node, is_class):
+        for child in node.decorator_list:
+            self.visit(child)
+        self.scope.append((node.name, is_class))
+        for child in node.body:
+            self.visit(child)
+        self.scope.pop()
+        for field in ('args', 'bases', 'keywords', 'returns'):
+            value = getattr(node, field, None)
+            if isinstance(value, list):
+                for child in value:
+                    self.visit(child)
+            elif value is not None:
+                self.visit(value)
+
+    def visit_Assign(self, node):
+        if self._in_class_or_module():
+            # 模块级变量和类属性
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.symbols.append((target.id, 'variable', target.lineno - 1, target.col_offset, self._container()))
+        self.generic_visit(node)
+
+    def visit_AnnAssign(self, node):
+        if isinstance(node.target, ast.Name) and self._in_class_or_module():
+            self.symbols.append((node.target.id, 'variable', node.lineno - 1, node.col_offset, self._container()))
+        self.generic_visit(node)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.imports.append((alias.asname or alias.name.split('.')[0], alias.name, node.lineno - 1))
+
+    def visit_ImportFrom(self, node):
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            if alias.name != '*':
+                self.imports.append((alias.asname or alias.name, f"{module}.{alias.name}" if node.module else module + alias.name, node.lineno - 1))
+
+    def visit_Name(self, node):
+        self.refs.append((node.id, node.lineno - 1, node.col_offset))
+
+    def visit_Attribute(self, node):
+        self.generic_visit(node)
+        if node.end_col_offset is not None and node.end_lineno == node.lineno:
+            self.refs.append((node.attr, node.lineno - 1, node.end_col_offset - len(node.attr)))
+
+
+def collect(source):
+    """解析源码，返回 (定义, 引用, 导入)；有语法错误时返回空列表"""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError, RecursionError):
+        return [], [], []
+    collector = _Collector()
+    try:
+        collector.visit(tree)
+    except RecursionError:
+        return [], [], []
+    return collector.symbols, collector.refs, collector.imports
+
+
+def parse_file(path, known_hash=None):
+    """在工作进程中解析一个文件；内容哈希与索引中相同时只返回新的 mtime"""
+    try:
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return path, None
+    digest = hashlib.sha1(data).hexdigest()
+    if digest == known_hash:
+        return path, (stat.st_mtime, stat.st_size, digest, None)
+    return path, (stat.st_mtime, stat.st_size, digest, collect(data))
+
+
+def database_path(root):
+    key = hashlib.sha256(os.path.normcase(root).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(SYMBOLS_DIR, f"{key}.sqlite")
+
+
+class SymbolIndexer(QThread):
+    """后台建立和维护一个文件夹的符号索引
+
+    启动时按 mtime 和大小找出变化的 .py 文件，交给进程池并行解析，结果在本线程写入 SQLite；
+    之后等待保存文件时提交的增量更新。
+    """
+    progress = pyqtSignal(int, int) # 已处理, 总数
+    updated = pyqtSignal(object) # 更新过的文件路径列表
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.jobs = queue.Queue()
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+        self.jobs.put(None)
+
+    def run(self):
+        os.makedirs(SYMBOLS_DIR, exist_ok=True)
+        db = sqlite3.connect(database_path(self.root))
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(_SCHEMA)
+        try:
+            self._full_scan(db)
+            while not self._stopped:
+                path = self.jobs.get()
+                if path is None:
+                    break
+                paths = {path}
+                # 合并连续保存的多个文件
+                while not self.jobs.empty():
+                    path = self.jobs.get()
+                    if path is None:
+                        self._stopped = True
+                        break
+                    paths.add(path)
+                for path in paths:
+                    self._store(db, *parse_file(path, self._known_hash(db, path)))
+                db.commit()
+                self.updated.emit(sorted(paths))
+        finally:
+            db.close()
+
+    def _known_hash(self, db, path):
+        row = db.execute("SELECT hash FROM files WHERE path = ?", (path,)).fetchone()
+        return row[0] if row else None
+
+    def _full_scan(self, db):
+        known = {path: (mtime, size, digest) for path, mtime, size, digest in db.execute("SELECT path, mtime, size, hash FROM files")}
+        changed = []
+        present = set()
+        for path in walk_files(self.root, ('.py', '.pyw')):
+            if self._stopped:
+                return
+            present.add(path)
+            entry = known.get(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if entry is None or entry[0] != stat.st_mtime or entry[1] != stat.st_size:
+                changed.append(path)
+        for path in set(known) - present:
+            self._store(db, path, None)
+        db.commit()
+
+        total = len(changed)
+        self.progress.emit(0, total)
+        if changed:
+            workers = max(1, min(len(changed) // 50 + 1, (os.cpu_count() or 2) - 1))
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                hashes = [known.get(path, (None, None, None))[2] for path in changed]
+                for done, result in enumerate(executor.map(parse_file, changed, hashes, chunksize=32), 1):
+                    if self._stopped:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        return
+                    self._store(db, *result)
+                    if done % COMMIT_EVERY == 0:
+                        db.commit()
+                        self.progress.emit(done, total)
+            db.commit()
+        self.progress.emit(total, total)
+        self.updated.emit(changed)
+
+    def _store(self, db, path, result):
+        row = db.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+        if result is None:
+            # 文件已删除
+            if row:
+                self._delete(db, row[0])
+                db.execute("DELETE FROM files WHERE id = ?", (row[0],))
+            return
+        mtime, size, digest, parsed = result
+        if row is None:
+            file_id = db.execute("INSERT INTO files (path, mtime, size, hash) VALUES (?, ?, ?, ?)", (path, mtime, size, digest)).lastrowid
+        else:
+            file_id = row[0]
+            db.execute("UPDATE files SET mtime = ?, size = ?, hash = ? WHERE id = ?", (mtime, size, digest, file_id))
+        if parsed is None:
+            # 内容没有变化
+            return
+        self._delete(db, file_id)
+        symbols, refs, imports = parsed
+        db.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?)", ((file_id, *symbol) for symbol in symbols))
+        db.executemany("INSERT INTO refs VALUES (?, ?, ?, ?)", ((file_id, *ref) for ref in refs))
+        db.executemany("INSERT INTO imports VALUES (?, ?, ?, ?)", ((file_id, *item) for item in imports))
+
+    def _delete(self, db, file_id):
+        for table in ('symbols', 'refs', 'imports'):
+            db.execute(f"DELETE FROM {table} WHERE file_id = ?", (file_id,))
+
+
+class SymbolIndex(QObject):
+    """当前文件夹的符号索引：大纲、转到定义、查找引用
+
+    查询直接读 SQLite（WAL 模式下与后台写入互不阻塞），按名称的查询走索引，几千个文件的项目也只需几毫秒。
+    """
+    progress = pyqtSignal(int, int)
+    updated = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.root = ""
+        self.indexer = None
+        self._db = None
+
+    def open(self, root):
+        """切换到新的文件夹（空字符串表示关闭）"""
+        self.close()
+        self.root = root
+        if not root:
+            return
+        self.indexer = SymbolIndexer(root, self)
+        self.indexer.progress.connect(self.progress)
+        self.indexer.updated.connect(self.updated)
+        self.indexer.start()
+
+    def close(self):
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer.wait()
+            self.indexer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        self.root = ""
+
+    def update_file(self, path):
+        """文件保存后增量更新"""
+        path = os.path.abspath(path)
+        if self.indexer is not None and path.lower().endswith(('.py', '.pyw')) and path.startswith(self.root + os.sep):
+            self.indexer.jobs.put(path)
+
+    def _query(self, sql, params):
+        if not self.root:
+            return []
+        if self._db is None:
+            path = database_path(self.root)
+            if not os.path.exists(path):
+                return []
+            self._db = sqlite3.connect(path)
+        try:
+            return self._db.execute(sql, params).fetchall()
+        except sqlite3.Error:
+            # 索引尚未建好表
+            return []
+
+    def outline(self, path):
+        """返回 [(名称, 类型, 行, 列, 所在的类或函数)]，按行排序"""
+        return self._query(
+            "SELECT s.name, s.kind, s.line, s.col, s.container FROM symbols s JOIN files f ON s.file_id = f.id "
+            "WHERE f.path = ? ORDER BY s.line", (os.path.abspath(path),))
+
+    def is_indexed(self, path):
+        return bool(self._query("SELECT 1 FROM files WHERE path = ?", (os.path.abspath(path),)))
+
+    def definitions(self, name, from_path=""):
+        """返回 [(路径, 行, 列, 类型, 所在的类或函数)]；同一文件和被导入模块中的定义排在前面"""
+        rows = self._query(
+            "SELECT f.path, s.line, s.col, s.kind, s.container FROM symbols s JOIN files f ON s.file_id = f.id "
+            "WHERE s.name = ? LIMIT 1000", (name,))
+        if not rows or not from_path:
+            return rows
+        from_path = os.path.abspath(from_path)
+        modules = [module for (module,) in self._query(
+            "SELECT i.module FROM imports i JOIN files f ON i.file_id = f.id WHERE f.path = ? AND i.name = ?", (from_path, name))]
+        suffixes = []
+        for module in modules:
+            parts = module.lstrip('.').split('.')
+            # from pkg.mod import name -> pkg/mod.py；import pkg.mod -> pkg/mod.py 或 pkg/mod/__init__.py
+            for count in (len(parts) - 1, len(parts)):
+                if count > 0:
+                    base = os.sep + os.path.join(*parts[:count])
+                    suffixes += [base + '.py', os.path.join(base, '__init__.py')]
+
+        def rank(row):
+            if row[0] == from_path:
+                return 0
+            if any(row[0].endswith(suffix) for suffix in suffixes):
+                return 1
+            return 2
+        return sorted(rows, key=lambda row: (rank(row), row[0], row[1]))
+
+    def references(self, name):
+        """返回名称的所有定义和引用 [(路径, 行, 列)]"""
+        return self._query(
+            "SELECT f.path, r.line, r.col FROM refs r JOIN files f ON r.file_id = f.id WHERE r.name = ? "
+            "UNION SELECT f.path, s.line, s.col FROM symbols s JOIN files f ON s.file_id = f.id WHERE s.name = ? "
+            "ORDER BY 1, 2, 3 LIMIT 10000", (name, name))
+
+
+symbol_index = SymbolIndex()
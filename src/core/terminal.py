@@ -0,0 +1,401 @@
+import os, re, codecs, signal, platform
+
+# 检测操作系统
+IS_WINDOWS = platform.system() == 'Windows'
+
+# 需要按终端语义解释的控制字符：回车、退格、ESC
+_CONTROL_RE = re.compile(r'[\r\x08\x1b]')
+# 将一行拆分为普通文本与控制序列（CSI 序列或单个控制字符）
+_TOKEN_RE = re.compile(r'(\r|\x08|\x1b\[[0-?]*[ -/]*[@-~]|\x1b[@-Z\\-_]?)')
+# 被读取边界截断的转义序列，留到下一段输出再处理
+_PARTIAL_ESCAPE_RE = re.compile(r'\x1b(\[[0-?]*[ -/]*)?$')
+
+# 颜色值约定：0-255 为 xterm 调色板索引，TRUECOLOR 位表示 24 位 RGB
+TRUECOLOR = 0x1000000
+ANSI_RED = 1
+
+# 16 色调色板（浅色 / 深色背景各一套，保证可读性）
+ANSI_PALETTE_LIGHT = [
+    "#000000", "#cd3131", "#00a36c", "#949800", "#0451a5", "#bc05bc", "#0598bc", "#555555",
+    "#666666", "#e51400", "#14a30a", "#b5ba00", "#0451a5", "#bc05bc", "#0598bc", "#a5a5a5",
+]
+ANSI_PALETTE_DARK = [
+    "#808080", "#f14c4c", "#23d18b", "#f5f543", "#3b8eea", "#d670d6", "#29b8db", "#e5e5e5",
+    "#9e9e9e", "#f14c4c", "#23d18b", "#f5f543", "#3b8eea", "#d670d6", "#29b8db", "#ffffff",
+]
+
+
+def ansi_color_rgb(value, dark=False):
+    """把颜色值转换为 (r, g, b)"""
+    if value & TRUECOLOR:
+        return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+    if value < 16:
+        palette = ANSI_PALETTE_DARK if dark else ANSI_PALETTE_LIGHT
+        hex_color = palette[value]
+        return int(hex_color[1:3], 16), int(hex_color[3:5], 16), int(hex_color[5:7], 16)
+    if value < 232:
+        # 6x6x6 色立方
+        value -= 16
+        levels = (0, 95, 135, 175, 215, 255)
+        return levels[value // 36], levels[(value // 6) % 6], levels[value % 6]
+    gray = 8 + (value - 232) * 10
+    return gray, gray, gray
+
+
+def suspend_process(pid):
+    """暂停子进程（POSIX 发送 SIGSTOP，Windows 调用 NtSuspendProcess），成功返回 True"""
+    return _signal_process(pid, suspend=True)
+
+
+def resume_process(pid):
+    """恢复被 suspend_process 暂停的子进程"""
+    return _signal_process(pid, suspend=False)
+
+
+def _signal_process(pid, suspend):
+    if not pid:
+        return False
+    if not IS_WINDOWS:
+        try:
+            os.kill(pid, signal.SIGSTOP if suspend else signal.SIGCONT)
+            return True
+        except OSError:
+            return False
+    try:
+        import ctypes
+        PROCESS_SUSPEND_RESUME = 0x0800
+        kernel32 = ctypes.windll.kernel32
+        ntdll = ctypes.windll.ntdll
+        handle = kernel32.OpenProcess(PROCESS_SUSPEND_RESUME, False, pid)
+        if not handle:
+            return False
+        try:
+            status = ntdll.NtSuspendProcess(handle) if suspend else ntdll.NtResumeProcess(handle)
+            return status == 0
+        finally:
+            kernel32.CloseHandle(handle)
+    except (OSError, AttributeError):
+        return False
+
+
+class StreamDecoder:
+    """增量解码子进程输出，多字节字符被读取边界截断时不会乱码
+
+    每块数据优先按 UTF-8 解码；只有无法按 UTF-8 解码的那一块改用备选编码
+    （Windows 为 cp936，其它系统为 latin-1），之后的输出仍先尝试 UTF-8，
+    一个非法字节不会让整条流都变成乱码。
+    """
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback or ('cp936' if IS_WINDOWS else 'latin-1')
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._carry = b"" # 备选编码解码时末尾被截断的字节（备选编码的或 UTF-8 的）
+
+    def decode(self, data):
+        data = self._carry + bytes(data)
+        self._carry = b""
+        try:
+            return self._decoder.decode(data)
+        except UnicodeDecodeError:
+            # 解码失败时增量解码器内部缓冲保持不变，连同本次数据一起交给备选编码
+            data = self._decoder.getstate()[0] + data
+            self._decoder.reset()
+            # 末尾被截断的 UTF-8 字符留到下一块，和后面的字节一起先尝试 UTF-8
+            tail = _utf8_tail(data)
+            decoder = codecs.getincrementaldecoder(self.fallback)(errors="replace")
+            text = decoder.decode(data[:len(data) - tail])
+            self._carry = decoder.getstate()[0] + data[len(data) - tail:]
+            return text
+
+
+def _utf8_tail(data):
+    """末尾不完整的 UTF-8 多字节字符的字节数（没有时为 0）"""
+    for i in range(1, min(4, len(data)) + 1):
+        byte = data[-i]
+        if 0x80 <= byte < 0xC0:
+            # 后续字节，继续向前找首字节
+            continue
+        if 0xC2 <= byte < 0xE0:
+            length = 2
+        elif 0xE0 <= byte < 0xF0:
+            length = 3
+        elif 0xF0 <= byte < 0xF5:
+            length = 4
+        else:
+            return 0
+        return i if i < length else 0
+    return 0
+
+
+class OutputRenderer:
+    """把子进程输出按终端语义解释为文本和颜色区间
+
+    只保留"当前行"（最后一个换行之后的内容）的可变状态：\\r、\\b 和擦除行序列
+    只会改写当前行，因此进度条刷新成千上万次也只占一行。
+    SGR 颜色以区间 (起, 止, 颜色值) 表示，按文本片段而不是逐字符处理。
+    超过 max_line_length 的行会被切分为多行（软换行），切出的行号记录在 soft_breaks 中。
+    """
+
+    def __init__(self, max_line_length=0):
+        self.max_line_length = max_line_length
+        self.soft_breaks = []
+        self.reset()
+
+    @property
+    def max_line_length(self):
+        return self._max_line_length
+
+    @max_line_length.setter
+    def max_line_length(self, value):
+        self._max_line_length = value
+        # 用于快速判断输出中是否有超长行
+        self._long_line_re = re.compile(r'[^\n]{%d}' % (value + 1)) if value else None
+
+    def reset(self):
+        self.line = ""        # 尚未换行的当前行
+        self.col = 0          # 光标所在列（字符）
+        self.line_runs = []   # 当前行的颜色区间，字符偏移
+        self.fg = None        # SGR 前景色，None 表示默认
+        self.bold = False
+        self._default = None  # 当前流的默认颜色（如 stderr）
+        self._partial = ""
+
+    def feed(self, text, color=None):
+        """处理一段输出，返回 (已完成的行, 新的当前行, 颜色区间)
+
+        已完成的行从旧的当前行开头算起，以换行结尾（可能为空）；
+        调用方用 已完成的行 + 新的当前行 替换文档中旧的当前行即可。
+        颜色区间相对于替换文本的开头，按起点排序且互不重叠。
+        color 为该流的默认颜色，SGR 设置的颜色优先。
+        soft_breaks 为已完成的行中以软换行结尾的行的序号（从 0 开始）。
+        """
+        self._default = color
+        self.soft_breaks = []
+        if self._partial:
+            text = self._partial + text
+            self._partial = ""
+        if '\x1b' in text[-32:]:
+            match = _PARTIAL_ESCAPE_RE.search(text, max(0, len(text) - 32))
+            if match:
+                self._partial = text[match.start():]
+                text = text[:match.start()]
+
+        if '\r' in text:
+            # Windows 换行先规整掉，避免每一行都走慢路径
+            text = text.replace('\r\n', '\n')
+
+        if not _CONTROL_RE.search(text) and self.col == len(self.line) and not self._has_long_line(self.line + text):
+            # 快速路径：没有控制字符和超长行，直接在当前行后追加
+            start = len(self.line)
+            full = self.line + text
+            self._paint(start, len(full), self._color())
+            runs = self.line_runs
+            index = full.rfind('\n')
+            self.line = full[index + 1:]
+            self.col = len(self.line)
+            self.line_runs = self._shift(runs, index + 1)
+            return full[:index + 1], self.line, runs
+
+        committed = []
+        runs = []
+        offset = 0
+        segments = text.split('\n')
+        for segment in segments[:-1]:
+            self._write(segment)
+            offset = self._break_long_line(committed, runs, offset)
+            runs.extend(self._shift(self.line_runs, -offset))
+            color = self._color()
+            if color is not None:
+                # 颜色跨行时换行符也上色，便于相邻区间合并
+                runs.append((offset + len(self.line), offset + len(self.line) + 1, color))
+            committed.append(self.line)
+            committed.append('\n')
+            offset += len(self.line) + 1
+            self.line = ""
+            self.col = 0
+            self.line_runs = []
+        self._write(segments[-1])
+        offset = self._break_long_line(committed, runs, offset)
+        runs.extend(self._shift(self.line_runs, -offset))
+        return "".join(committed), self.line, self._merge(runs)
+
+    def _has_long_line(self, text):
+        return self._long_line_re is not None and len(text) > self._max_line_length \
+            and self._long_line_re.search(text) is not None
+
+    def _break_long_line(self, committed, runs, offset):
+        """把超长的当前行按 max_line_length 切分，除最后一段外都作为软换行行提交"""
+        limit = self._max_line_length
+        line = self.line
+        if not limit or len(line) <= limit:
+            return offset
+        # 保留一段非空的尾部作为新的当前行
+        cut = (len(line) - 1) // limit * limit
+        for start in range(0, cut, limit):
+            committed.append(line[start:start + limit])
+            committed.append('\n')
+            self.soft_breaks.append(len(committed) // 2 - 1)
+        # 颜色区间随插入的换行符右移，跨段的区间按段拆开
+        for run_start, run_end, color in self.line_runs:
+            run_end = min(run_end, cut)
+            while run_start < run_end:
+                piece_end = min(run_end, (run_start // limit + 1) * limit)
+                shift = offset + run_start // limit
+                runs.append((run_start + shift, piece_end + shift, color))
+                run_start = piece_end
+        self.line = line[cut:]
+        self.line_runs = self._shift(self.line_runs, cut)
+        self.col = max(0, self.col - cut)
+        return offset + cut + cut // limit
+
+    def _color(self):
+        if self.fg is None:
+            return self._default
+        if self.bold and self.fg < 8:
+            return self.fg + 8
+        return self.fg
+
+    @staticmethod
+    def _shift(runs, offset):
+        """把区间整体左移 offset，丢弃完全移到 0 之前的区间"""
+        shifted = []
+        for start, end, color in runs:
+            if end > offset:
+                shifted.append((max(0, start - offset), end - offset, color))
+        return shifted
+
+    @staticmethod
+    def _merge(runs):
+        merged = []
+        for run in runs:
+            if merged and merged[-1][1] == run[0] and merged[-1][2] == run[2]:
+                merged[-1] = (merged[-1][0], run[1], run[2])
+            else:
+                merged.append(run)
+        return merged
+
+    def _paint(self, start, end, color):
+        """把当前行 [start, end) 设为指定颜色（None 表示默认色）"""
+        if start >= end:
+            return
+        runs = self.line_runs
+        if not runs or runs[-1][1] <= start:
+            # 常见情况：在行尾追加
+            if color is not None:
+                if runs and runs[-1][1] == start and runs[-1][2] == color:
+                    runs[-1] = (runs[-1][0], end, color)
+                else:
+                    runs.append((start, end, color))
+            return
+        result = []
+        for run_start, run_end, run_color in runs:
+            if run_end <= start or run_start >= end:
+                result.append((run_start, run_end, run_color))
+                continue
+            if run_start < start:
+                result.append((run_start, start, run_color))
+            if run_end > end:
+                result.append((end, run_end, run_color))
+        if color is not None:
+            result.append((start, end, color))
+        result.sort()
+        self.line_runs = self._merge(result)
+
+    def _write(self, segment):
+        if not segment:
+            return
+        if not _CONTROL_RE.search(segment):
+            self._put(segment)
+            return
+        for token in _TOKEN_RE.split(segment):
+            if not token:
+                continue
+            if token == '\r':
+                self.col = 0
+            elif token == '\x08':
+                self.col = max(0, self.col - 1)
+            elif token.startswith('\x1b'):
+                self._control(token)
+            else:
+                self._put(token)
+
+    def _put(self, text):
+        line = self.line
+        col = self.col
+        if col == len(line):
+            self.line = line + text
+        elif col > len(line):
+            self.line = line + " " * (col - len(line)) + text
+        else:
+            self.line = line[:col] + text + line[col + len(text):]
+        self.col = col + len(text)
+        self._paint(col, self.col, self._color())
+
+    def _control(self, sequence):
+        if not sequence.startswith('\x1b[') or len(sequence) < 3:
+            return
+        final = sequence[-1]
+        params = sequence[2:-1]
+        if params.startswith('?'):
+            # 光标显示/隐藏等私有模式，对文本无影响
+            return
+        if final == 'm':
+            self._sgr(params)
+            return
+        try:
+            number = int(params) if params else 0
+        except ValueError:
+            number = 0
+
+        if final == 'K':
+            # 擦除行：0 光标到行尾，1 行首到光标，2 整行
+            col = self.col
+            if number == 0:
+                self.line = self.line[:col]
+                self.line_runs = [(s, min(e, col), c) for s, e, c in self.line_runs if s < col]
+            elif number == 1:
+                self.line = " " * col + self.line[col:]
+                self._paint(0, col, None)
+            elif number == 2:
+                self.line = " " * col
+                self.line_runs = []
+        elif final == 'G':
+            # 光标移动到指定列（从 1 开始）
+            self.col = max(0, (number or 1) - 1)
+        elif final == 'C':
+            self.col += number or 1
+        elif final == 'D':
+            self.col = max(0, self.col - (number or 1))
+        # 其余序列（光标上移、清屏等）无法映射到只追加的文档，直接丢弃
+
+    def _sgr(self, params):
+        """解析 SGR 参数，只处理前景色与粗体"""
+        codes = [int(p) if p.isdigit() else 0 for p in params.split(';')] if params else [0]
+        i = 0
+        while i < len(codes):
+            code = codes[i]
+            if code == 0:
+                self.fg = None
+                self.bold = False
+            elif code == 1:
+                self.bold = True
+            elif code == 22:
+                self.bold = False
+            elif 30 <= code <= 37:
+                self.fg = code - 30
+            elif 90 <= code <= 97:
+                self.fg = code - 90 + 8
+            elif code == 39:
+                self.fg = None
+            elif code in (38, 48):
+                # 扩展颜色：38;5;n 或 38;2;r;g;b（背景色 48 只跳过参数）
+                if i + 2 < len(codes) and codes[i + 1] == 5:
+                    if code == 38:
+                        self.fg = codes[i + 2] & 0xFF
+                    i += 2
+                elif i + 4 < len(codes) and codes[i + 1] == 2:
+                    if code == 38:
+                        r, g, b = (c & 0xFF for c in codes[i + 2:i + 5])
+                        self.fg = TRUECOLOR | (r << 16) | (g << 8) | b
+                    i += 4
+            i += 1
@@ -0,0 +1,139 @@
+import os, re, time, hashlib
+from PyQt6.QtCore import QObject, QProcess, QProcessEnvironment, pyqtSignal
+from src.config import CONFIG_FILE, config
+from src.core.interpreter import InterpreterManager
+
+# dmypy 守护进程的状态文件目录（与配置文件同级）
+STATUS_DIR = os.path.join(os.path.dirname(CONFIG_FILE), 'dmypy')
+
+# 当前解释器没有安装 mypy
+MYPY_MISSING = "mypy is not installed"
+
+# path:line:column: severity: message
+_LINE = re.compile(r'^(.+?):(\d+):(\d+): (error|warning|note): (.*)$')
+
+
+class TypeCheckService(QObject):
+    """用常驻的 mypy 守护进程 (dmypy) 做类型检查
+
+    守护进程由配置的解释器启动并保留上次检查的结果，保存文件后只增量检查改动的部分，
+    不必每次冷启动 mypy。空闲超过 type_check_idle_timeout 秒后守护进程自行退出释放内存，
+    下次检查时再启动。
+    """
+    started = pyqtSignal()
+    finished = pyqtSignal(object, str, float) # [(路径, 行, 列, 严重程度, 消息)], 错误信息（成功时为空）, 耗时
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = False # 类型检查面板打开时才在保存后检查
+        self.files = set() # 已加入检查的文件
+        self.process = None
+        self.pending = False
+        self._interpreter = None # 守护进程使用的解释器
+        self._cwd = None
+        self._started_at = 0.0
+
+    @staticmethod
+    def _status_file(interpreter):
+        # 每个解释器一个守护进程，切换解释器时停止旧的和启动新的互不干扰
+        key = hashlib.sha256(os.path.normcase(interpreter).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(STATUS_DIR, f"{key}.json")
+
+    def _args(self, interpreter, *args):
+        return ['-m', 'mypy.dmypy', '--status-file', self._status_file(interpreter), *args]
+
+    def check(self, paths=()):
+        """把文件加入检查并重新检查；正在检查时等这次结束后再检查一次"""
+        self.files.update(os.path.abspath(path) for path in paths if path.lower().endswith(('.py', '.pyi')))
+        self.files = {path for path in self.files if os.path.isfile(path)}
+        if not self.files:
+            return
+        if self.process is not None:
+            self.pending = True
+            return
+
+        interpreter = InterpreterManager.get_interpreter()
+        if not interpreter:
+            self.finished.emit([], "No Python interpreter configured.", 0.0)
+            return
+        if self._interpreter and self._interpreter != interpreter:
+            # 解释器已切换，旧的守护进程检查的是另一套环境
+            self.stop()
+        self._interpreter = interpreter
+        os.makedirs(STATUS_DIR, exist_ok=True)
+
+        try:
+            self._cwd = os.path.commonpath([os.path.dirname(path) for path in self.files])
+        except ValueError:
+            # Windows 上文件位于不同的驱动器，没有公共目录：使用工作区或当前文件所在的目录
+            workspace = config.get('workspace', '')
+            if workspace and os.path.isdir(workspace):
+                self._cwd = workspace
+            else:
+                current = [os.path.abspath(path) for path in paths if os.path.abspath(path) in self.files]
+                self._cwd = os.path.dirname(current[0] if current else min(self.files))
+        self.process = QProcess(self)
+        self.process.setWorkingDirectory(self._cwd)
+        env = QProcessEnvironment.systemEnvironment()
+        env.insert("PYTHONUTF8", "1")
+        self.process.setProcessEnvironment(env)
+        self.process.finished.connect(self._on_finished)
+        self.process.errorOccurred.connect(self._on_error)
+        timeout = str(config.get('type_check_idle_timeout', 600))
+        self._started_at = time.monotonic()
+        self.process.start(interpreter, self._args(
+            interpreter, 'run', '--timeout', timeout, '--',
+            '--show-column-numbers', '--no-error-summary', '--hide-error-context', '--no-color-output',
+            *sorted(self.files),
+        ))
+        self.started.emit()
+
+    def _on_error(self, error):
+        if error == QProcess.ProcessError.FailedToStart:
+            self._on_finished(-1, QProcess.ExitStatus.CrashExit)
+
+    def _on_finished(self, exit_code, exit_status):
+        process = self.process
+        if process is None:
+            return
+        self.process = None
+        elapsed = time.monotonic() - self._started_at
+        output = bytes(process.readAllStandardOutput()).decode('utf-8', errors='replace')
+        errors = bytes(process.readAllStandardError()).decode('utf-8', errors='replace')
+        process.deleteLater()
+
+        diagnostics = []
+        for line in output.splitlines():
+            match = _LINE.match(line.strip())
+            if match:
+                path, row, column, severity, message = match.groups()
+                path = os.path.normpath(os.path.join(self._cwd, path))
+                diagnostics.append((path, int(row) - 1, int(column) - 1, severity, message))
+
+        error = ""
+        if re.search(r"No module named '?mypy", errors):
+            error = MYPY_MISSING
+        elif exit_status != QProcess.ExitStatus.NormalExit or (exit_code not in (0, 1)) or (exit_code == 1 and not diagnostics):
+            # 0：没有错误，1：有类型错误，其他为 dmypy 自身出错
+            error = (errors or output).strip() or f"exit code {exit_code}"
+        self.finished.emit(diagnostics, error, elapsed)
+
+        if self.pending:
+            self.pending = False
+            self.check()
+
+    def stop(self):
+        """停止守护进程（不等待）"""
+        if self._interpreter and os.path.exists(self._status_file(self._interpreter)):
+            QProcess.startDetached(self._interpreter, self._args(self._interpreter, 'stop'))
+        self._interpreter = None
+
+    def shutdown(self):
+        process, self.process = self.process, None
+        if process is not None:
+            process.kill()
+            process.waitForFinished(500)
+        self.stop()
+
+
+type_check_service = TypeCheckService()
@@ -0,0 +1,213 @@
+import os, queue, threading
+from PyQt6.QtCore import QObject, QThread, QFileSystemWatcher, pyqtSignal
+from src.config import config
+
+# 最多监视的目录数量（inotify 等的监视数量有限），超出的目录每次遍历时重新列出
+MAX_WATCHED_DIRS = 4096
+
+# 遍历文件夹时跳过的目录（版本控制、缓存、依赖）
+IGNORED_DIRS = {
+    '.git', '.hg', '.svn', '__pycache__', '.mypy_cache', '.pytest_cache', '.ruff_cache', '.tox', '.nox',
+    '.idea', '.vscode', 'node_modules', 'venv', '.venv', 'env', '.env', 'site-packages',
+}
+
+
+def is_ignored_dir(name, path):
+    # 虚拟环境不一定叫 venv，根目录下有 pyvenv.cfg 的都跳过
+    return name in IGNORED_DIRS or name.endswith('.egg-info') or os.path.isfile(os.path.join(path, 'pyvenv.cfg'))
+
+
+def walk_files(root, extensions=None):
+    """遍历文件夹下的文件（跳过 IGNORED_DIRS 和虚拟环境），extensions 为小写扩展名元组"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [name for name in dirnames if not is_ignored_dir(name, os.path.join(dirpath, name))]
+        for name in filenames:
+            if extensions is None or name.lower().endswith(extensions):
+                yield os.path.join(dirpath, name)
+
+
+class FileCache(QObject):
+    """当前文件夹的文件列表缓存，遍历时不必每次都重新列出整个目录树
+
+    列出过的目录加入文件系统监视器，目录中有文件新建、删除或重命名（大多数编辑器和 git 保存文件的方式）时
+    标记为需要重新列出；本程序保存文件时也会标记。walk 可以在后台线程中调用。
+    """
+    _watchRequested = pyqtSignal(object)
+
+    def __init__(self):
+        super().__init__()
+        self.root = ""
+        self._dirs = {} # 目录 -> ([子目录名], [(文件名, mtime, 大小)])
+        self._dirty = set()
+        self._unwatched = set()
+        self._lock = threading.Lock()
+        # 第一次监视时才创建：工作进程导入本模块时不需要监视器
+        self.watcher = None
+        # 监视器只能在界面线程中使用，后台线程通过信号请求监视
+        self._watchRequested.connect(self._watch)
+
+    def reset(self, root):
+        with self._lock:
+            self.root = root
+            self._dirs.clear()
+            self._dirty.clear()
+            self._unwatched.clear()
+        if self.watcher is not None and self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+
+    def invalidate_dir(self, path):
+        with self._lock:
+            self._dirty.add(path)
+
+    def invalidate(self, file_path):
+        """文件被修改后调用（目录监视器不报告文件内容的变化）"""
+        self.invalidate_dir(os.path.dirname(os.path.abspath(file_path)))
+
+    def _list(self, path):
+        subdirs, files = [], []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not is_ignored_dir(entry.name, entry.path):
+                                subdirs.append(entry.name)
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            files.append((entry.name, stat.st_mtime, stat.st_size))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        subdirs.sort()
+        files.sort()
+        return subdirs, files
+
+    def walk(self, root):
+        """遍历 root 下的文件，生成 (路径, mtime, 大小)；只重新列出有变化或未被监视的目录"""
+        stack = [root]
+        listed = []
+        while stack:
+            path = stack.pop()
+            with self._lock:
+                entry = self._dirs.get(path)
+                if entry is None or path in self._dirty or path in self._unwatched:
+                    entry = None
+                    self._dirty.discard(path)
+            if entry is None:
+                entry = self._list(path)
+                with self._lock:
+                    if self.root == root:
+                        self._dirs[path] = entry
+                listed.append(path)
+                if len(listed) >= 256:
+                    self._watchRequested.emit(listed)
+                    listed = []
+            subdirs, files = entry
+            for name, mtime, size in files:
+                yield os.path.join(path, name), mtime, size
+            stack.extend(os.path.join(path, name) for name in reversed(subdirs))
+        if listed:
+            self._watchRequested.emit(listed)
+
+    def _watch(self, paths):
+        with self._lock:
+            paths = [path for path in paths if path not in self._unwatched and os.path.commonpath([self.root, path]) == self.root] if self.root else []
+        if self.watcher is None:
+            self.watcher = QFileSystemWatcher(self)
+            self.watcher.directoryChanged.connect(self.invalidate_dir)
+        watched = set(self.watcher.directories())
+        # 重新列出的目录仍在监视中
+        paths = [path for path in paths if path not in watched]
+        room = MAX_WATCHED_DIRS - len(watched)
+        failed = self.watcher.addPaths(paths[:room]) if paths and room > 0 else []
+        with self._lock:
+            self._unwatched.update(failed)
+            self._unwatched.update(paths[max(room, 0):])
+
+
+file_cache = FileCache()
+
+
+def list_directory(path):
+    """列出目录，返回按“文件夹在前、名称不区分大小写”排序的 [(名称, 是否为文件夹)]"""
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            entries.append((entry.name, is_dir))
+    # 字符串键比元组键排序快得多，十万个条目时也不会长时间占用 GIL
+    entries.sort(key=lambda item: ('1' if not item[1] else '0') + item[0].lower() + '\0' + item[0])
+    return entries
+
+
+class DirectoryLister(QThread):
+    """在后台线程中列出目录（网络文件系统上列出大目录可能需要几秒），同一目录的重复请求合并"""
+    listed = pyqtSignal(str, object, str) # 路径, [(名称, 是否为文件夹)], 错误信息
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = queue.Queue()
+        self._queued = set()
+        self._lock = threading.Lock()
+
+    def request(self, path):
+        with self._lock:
+            if path in self._queued:
+                return
+            self._queued.add(path)
+        self.jobs.put(path)
+        if not self.isRunning():
+            self.start()
+
+    def stop(self):
+        if self.isRunning():
+            self.jobs.put(None)
+            self.wait()
+
+    def run(self):
+        while True:
+            path = self.jobs.get()
+            if path is None:
+                break
+            with self._lock:
+                self._queued.discard(path)
+            try:
+                self.listed.emit(path, list_directory(path), "")
+            except OSError as e:
+                self.listed.emit(path, [], e.strerror or str(e))
+
+
+class Workspace(QObject):
+    """当前打开的文件夹；符号索引、文件搜索等都以它为根目录"""
+    folderChanged = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self.root = ""
+
+    def open(self, path):
+        path = os.path.abspath(path) if path else ""
+        if path and not os.path.isdir(path):
+            return False
+        if path != self.root:
+            self.root = path
+            file_cache.reset(path)
+            config.set('workspace', path)
+            self.folderChanged.emit(path)
+        return True
+
+    def contains(self, file_path):
+        if not self.root:
+            return False
+        try:
+            return os.path.commonpath([self.root, os.path.abspath(file_path)]) == self.root
+        except ValueError:
+            # Windows 下不同盘符
+            return False
+
+
+workspace = Workspace()
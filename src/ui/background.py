@@ -0,0 +1,127 @@
+import os, time
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QObject, QThread, QSize, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPainter, QPixmap
+from src.config import config
+
+# 最多缓存的背景图数量（不同尺寸各占一项）
+MAX_CACHED_PIXMAPS = 8
+# 背景图文件修改时间的检查间隔（秒）
+STAT_INTERVAL = 1.0
+
+
+class BackgroundLoader(QThread):
+    loaded = pyqtSignal(object, QImage) # 缓存键, 处理好的图片
+
+    def __init__(self, key, parent=None):
+        super().__init__(parent)
+        self.key = key
+
+    def run(self):
+        path, _, width, height, opacity = self.key
+        size = QSize(width, height)
+        reader = QImageReader(path)
+        reader.setAutoTransform(True)
+        source_size = reader.size()
+        if source_size.isValid():
+            # 让解码器直接按目标尺寸解码，大图不必先完整解码再缩放
+            reader.setScaledSize(source_size.scaled(size, Qt.AspectRatioMode.KeepAspectRatioByExpanding))
+        image = reader.read()
+        if image.isNull():
+            self.loaded.emit(self.key, QImage())
+            return
+        if image.size() != image.size().scaled(size, Qt.AspectRatioMode.KeepAspectRatioByExpanding):
+            image = image.scaled(size, Qt.AspectRatioMode.KeepAspectRatioByExpanding, Qt.TransformationMode.SmoothTransformation)
+
+        # 预先裁剪到视口大小并把透明度混合进 alpha 通道，绘制时直接贴图即可
+        result = QImage(size, QImage.Format.Format_ARGB32_Premultiplied)
+        result.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(result)
+        painter.setOpacity(opacity)
+        painter.drawImage((width - image.width()) // 2, (height - image.height()) // 2, image)
+        painter.end()
+        self.loaded.emit(self.key, result)
+
+
+class BackgroundCache(QObject):
+    """进程内共享的背景图缓存，所有编辑器和终端共用
+
+    缓存键为 (路径, 修改时间, 视口宽, 视口高, 透明度)。缺少当前尺寸时在后台线程解码缩放，
+    期间先使用同一图片的上一个尺寸，绘制时只贴一张现成的位图。
+    """
+    updated = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+        self._pixmaps = OrderedDict()
+        self._fallback = {} # 路径 -> 最近一次生成的位图
+        self._worker = None
+        self._stat = {} # 路径 -> (检查时间, 修改时间)
+
+    def _mtime(self, path):
+        now = time.monotonic()
+        checked = self._stat.get(path)
+        if checked is None or now - checked[0] > STAT_INTERVAL:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = None
+            checked = self._stat[path] = (now, mtime)
+        return checked[1]
+
+    def pixmap(self, size):
+        """返回与视口大小匹配的背景位图；尚未生成时返回旧尺寸的位图或 None"""
+        path = config.get('background_image', '')
+        if not path or size.isEmpty():
+            return None
+        mtime = self._mtime(path)
+        if mtime is None:
+            return None
+        key = (path, mtime, size.width(), size.height(), config.get('background_opacity', 0.3))
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(key)
+            return pixmap
+        # 同一时间只处理一个请求，拖动调整窗口大小时自然合并为最后一个尺寸
+        if self._worker is None:
+            self._worker = BackgroundLoader(key, self)
+            self._worker.loaded.connect(self._on_loaded)
+            self._worker.finished.connect(self._worker.deleteLater)
+            self._worker.start()
+        fallback = self._fallback.get(path)
+        if fallback is not None and fallback[0] == mtime:
+            return fallback[1]
+        return None
+
+    def _on_loaded(self, key, image):
+        self._worker = None
+        if key[0] != config.get('background_image', ''):
+            # 加载期间背景已被更换
+            self.updated.emit()
+            return
+        pixmap = QPixmap.fromImage(image)
+        self._pixmaps[key] = pixmap
+        self._fallback[key[0]] = (key[1], pixmap)
+        while len(self._pixmaps) > MAX_CACHED_PIXMAPS:
+            self._pixmaps.popitem(last=False)
+        self.updated.emit()
+
+    def invalidate(self):
+        """背景图或透明度设置改变后清空缓存"""
+        self._pixmaps.clear()
+        self._fallback.clear()
+        self._stat.clear()
+        self.updated.emit()
+
+    def paint(self, viewport):
+        """在视口上绘制背景图"""
+        pixmap = self.pixmap(viewport.size())
+        if pixmap is None or pixmap.isNull():
+            return
+        painter = QPainter(viewport)
+        # 旧尺寸的位图居中绘制，等待新尺寸生成
+        painter.drawPixmap((viewport.width() - pixmap.width()) // 2, (viewport.height() - pixmap.height()) // 2, pixmap)
+        painter.end()
+
+
+background_cache = BackgroundCache()
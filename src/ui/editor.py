@@ -1,9 +1,84 @@
-import os
-from PyQt6.Qsci import QsciScintilla, QsciLexerPython
-from PyQt6.QtGui import QColor, QFont, QAction, QPainter, QPen, QPixmap
-from PyQt6.QtCore import Qt, QPoint
+import zlib
+from PyQt6.Qsci import QsciScintilla, QsciLexerPython, QsciDocument
+from PyQt6.QtGui import QColor, QAction, QPainter, QPen
+from PyQt6.QtCore import Qt, QPoint, QLineF, QTimer, QEvent
+from PyQt6.QtWidgets import QWidget, QToolTip
+from qfluentwidgets import ProgressBar
 from src.config import config
+from src.ui.background import background_cache
+from src.ui.theme_engine import theme_engine, is_dark
 from src.core.translator import translator
+from src.core.linter import lint_service
+
+SC_MOD_INSERTTEXT = 0x1
+SC_MOD_DELETETEXT = 0x2
+
+# 语法检查结果在符号栏中的标记
+MARKER_LINT_ERROR = 8
+MARKER_LINT_WARNING = 9
+# 类型检查 (dmypy) 的错误标记
+MARKER_TYPE_ERROR = 10
+
+class IndentGuideModel:
+    """编辑器视图的缩进缓存（分屏换文档时重建）
+
+    记录每行的缩进量（空行为 -1，未知为 None）。文档修改时只把被修改的行标记为未知，
+    绘制时按需向 Scintilla 查询，之后的重绘完全不需要再查询。
+    """
+    # 空行向上/向下寻找非空行的最大距离
+    SEARCH_RANGE = 50
+
+    def __init__(self, editor):
+        self.editor = editor
+        self.tab_width = 0
+        self.indents = [None]
+
+    def reset(self, line_count, tab_width):
+        self.tab_width = tab_width
+        self.indents = [None] * line_count
+
+    def lines_changed(self, line, lines_added):
+        """line 行被修改，并在其后插入（正数）或删除（负数）了若干行"""
+        if lines_added > 0:
+            self.indents[line + 1:line + 1] = [None] * lines_added
+        elif lines_added < 0:
+            del self.indents[line + 1:line + 1 - lines_added]
+        for target in range(line, min(line + max(lines_added, 0) + 1, len(self.indents))):
+            self.indents[target] = None
+
+    def indent(self, line):
+        value = self.indents[line]
+        if value is None:
+            editor = self.editor
+            end = editor.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, line)
+            indent_end = editor.SendScintilla(QsciScintilla.SCI_GETLINEINDENTPOSITION, line)
+            value = editor.SendScintilla(QsciScintilla.SCI_GETLINEINDENTATION, line) if indent_end < end else -1
+            self.indents[line] = value
+        return value
+
+    def _nearby_indent(self, line, direction):
+        """寻找附近非空行的缩进量"""
+        for i in range(1, self.SEARCH_RANGE):
+            target = line + i * direction
+            if not 0 <= target < len(self.indents):
+                break
+            value = self.indent(target)
+            if value >= 0:
+                return value
+        return 0
+
+    def guide_depths(self, first, last):
+        """返回 [first, last] 各行需要绘制参考线的深度"""
+        depths = []
+        for line in range(first, min(last, len(self.indents) - 1) + 1):
+            value = self.indent(line)
+            if value < 0:
+                # 空行取上下非空行缩进的较小值，确保参考线在块结束时正确收拢
+                prev_indent = self._nearby_indent(line, -1)
+                next_indent = self._nearby_indent(line, 1)
+                value = min(prev_indent, next_indent) if next_indent > 0 else prev_indent
+            depths.append(value)
+        return depths
 
 class CodeEditor(QsciScintilla):
     def __init__(self, parent=None):
@@ -30,6 +105,17 @@ class CodeEditor(QsciScintilla):
         
         # 设置行号栏与代码之间的间距
         self.SendScintilla(2155, 0, 8) # 设置左边距
+
+        # 语法错误和警告标记（符号栏）
+        self.markerDefine(QsciScintilla.MarkerSymbol.Circle, MARKER_LINT_ERROR)
+        self.setMarkerBackgroundColor(QColor("#e51400"), MARKER_LINT_ERROR)
+        self.setMarkerForegroundColor(QColor("#e51400"), MARKER_LINT_ERROR)
+        self.markerDefine(QsciScintilla.MarkerSymbol.Circle, MARKER_LINT_WARNING)
+        self.setMarkerBackgroundColor(QColor("#f0a30a"), MARKER_LINT_WARNING)
+        self.setMarkerForegroundColor(QColor("#f0a30a"), MARKER_LINT_WARNING)
+        self.markerDefine(QsciScintilla.MarkerSymbol.RightTriangle, MARKER_TYPE_ERROR)
+        self.setMarkerBackgroundColor(QColor("#1ba1e2"), MARKER_TYPE_ERROR)
+        self.setMarkerForegroundColor(QColor("#1ba1e2"), MARKER_TYPE_ERROR)
         
         # 光标
         self.setCaretForegroundColor(QColor("black"))
@@ -39,7 +125,7 @@ class CodeEditor(QsciScintilla):
         # 括号匹配
         self.setBraceMatching(QsciScintilla.BraceMatch.SloppyBraceMatch)
 
-        self.setup_styles()
+        self.theme_key = None
         self.update_preferences()
         
         # 右键菜单策略
@@ -48,125 +134,44 @@ class CodeEditor(QsciScintilla):
         
         # 缓存参考线颜色
         self.guide_color = None
-
-    def _is_dark(self, color):
-        """判断颜色是否为深色"""
-        # 使用亮度公式
-        brightness = (color.red() * 299 + color.green() * 587 + color.blue() * 114) / 1000
-        return brightness < 128
-
-    def setup_styles(self):
-        """设置语法高亮颜色和加粗"""
-        if not self.lexer:
-            return
-
-        theme_color = QColor(config.get('theme_color', '#ffffff'))
-        is_dark = self._is_dark(theme_color)
-
-        font_normal = QFont(self.font_family, self.font_size)
-        font_bold = QFont(self.font_family, self.font_size, QFont.Weight.Bold)
-        font_italic_bold = QFont(self.font_family, self.font_size, QFont.Weight.Bold)
-        font_italic_bold.setItalic(True)
-
-        # 默认字体强制加粗
-        self.lexer.setDefaultFont(font_bold)
-        
-        # 根据背景亮度调整颜色
-        if is_dark:
-            # 深色背景下的颜色 
-            keyword_color = QColor("#C586C0")   # 浅紫色
-            class_color = QColor("#4EC9B0")     # 青色
-            func_color = QColor("#DCDCAA")      # 浅黄色
-            string_color = QColor("#CE9178")    # 橙红色
-            comment_color = QColor("#6A9955")   # 浅绿色
-            number_color = QColor("#B5CEA8")    # 浅绿
-            operator_color = QColor("#D4D4D4")  # 浅灰
-            identifier_color = QColor("#9CDCFE") # 天蓝色
-            default_fg = QColor("#D4D4D4")
-        else:
-            # 浅色背景下的颜色
-            keyword_color = QColor("#AF00DB")
-            class_color = QColor("#267F99")
-            func_color = QColor("#795E26")
-            string_color = QColor("#A31515")
-            comment_color = QColor("#008000")
-            number_color = QColor("#098658")
-            operator_color = QColor("#0000FF")
-            identifier_color = QColor("#001080")
-            default_fg = QColor("#000000")
-
-        self.lexer.setDefaultColor(default_fg)
-        self.lexer.setColor(keyword_color, QsciLexerPython.Keyword)
-        self.lexer.setFont(font_bold, QsciLexerPython.Keyword)
-        
-        self.lexer.setColor(class_color, QsciLexerPython.ClassName)
-        self.lexer.setFont(font_bold, QsciLexerPython.ClassName)
         
-        self.lexer.setColor(func_color, QsciLexerPython.FunctionMethodName)
-        self.lexer.setFont(font_bold, QsciLexerPython.FunctionMethodName)
-        
-        self.lexer.setColor(string_color, QsciLexerPython.SingleQuotedString)
-        self.lexer.setColor(string_color, QsciLexerPython.DoubleQuotedString)
-        self.lexer.setColor(string_color, QsciLexerPython.TripleSingleQuotedString)
-        self.lexer.setColor(string_color, QsciLexerPython.TripleDoubleQuotedString)
-        self.lexer.setColor(string_color, QsciLexerPython.UnclosedString)
-        self.lexer.setFont(font_bold, QsciLexerPython.SingleQuotedString)
-        
-        self.lexer.setColor(comment_color, QsciLexerPython.Comment)
-        self.lexer.setColor(comment_color, QsciLexerPython.CommentBlock)
-        self.lexer.setFont(font_italic_bold, QsciLexerPython.Comment)
-        self.lexer.setFont(font_italic_bold, QsciLexerPython.CommentBlock)
-        
-        self.lexer.setColor(number_color, QsciLexerPython.Number)
-        self.lexer.setFont(font_bold, QsciLexerPython.Number)
-        
-        self.lexer.setColor(operator_color, QsciLexerPython.Operator)
-        self.lexer.setFont(font_bold, QsciLexerPython.Operator)
-        
-        self.lexer.setColor(identifier_color, QsciLexerPython.Identifier)
-        self.lexer.setFont(font_bold, QsciLexerPython.Identifier)
+        # 缩进参考线缓存，随文档修改增量更新
+        self.indent_guides = IndentGuideModel(self)
+        self.SCN_MODIFIED.connect(self._on_modified)
+        
+        # 大文件模式：超过阈值后关闭开销大的功能
+        self.show_guides = True
+        self.large_file = False
+        self.read_only_file = False
+        self.loader = None
+        self.loading_bar = None
+        self._event_mask = 0
+        # 最近一次后台保存的耗时（秒）
+        self.save_latency = None
+        # 加载完成后要恢复的光标和滚动位置
+        self._pending_view_state = None
 
-        self.lexer.setColor(keyword_color, QsciLexerPython.Decorator)
-        self.lexer.setFont(font_bold, QsciLexerPython.Decorator)
-        
-        # 更新光标和行高亮
-        if is_dark:
-            self.setCaretForegroundColor(QColor("white"))
-            self.setCaretLineBackgroundColor(QColor(60, 60, 60, 100))
-        else:
-            self.setCaretForegroundColor(QColor("black"))
-            self.setCaretLineBackgroundColor(QColor("#e8e8ff"))
-        
-        # 重置参考线颜色，触发重新计算
-        self.guide_color = None
+        # 停止输入一段时间后在后台检查语法；按键时只重启定时器
+        self.lint_enabled = True
+        self.diagnostics = {} # 行 -> [消息]
+        self.type_diagnostics = {} # 类型检查结果，行 -> [消息]
+        self.lint_timer = QTimer(self)
+        self.lint_timer.setSingleShot(True)
+        self.lint_timer.timeout.connect(self.request_lint)
+        self.textChanged.connect(self.schedule_lint)
+        
+        # 背景图在后台生成完成后重绘
+        background_cache.updated.connect(self.viewport().update)
 
     def paintEvent(self, event):
         # 先让 Scintilla 绘制其内容（包括文字和默认背景色）
         super().paintEvent(event)
         
-        # 获取背景图片路径
-        bg_image_path = config.get('background_image', '')
-        if bg_image_path and os.path.exists(bg_image_path):
-            painter = QPainter(self.viewport())
-            pixmap = QPixmap(bg_image_path)
-            if not pixmap.isNull():
-                # 使用透明度绘制，使文字依然可见
-                opacity = config.get('background_opacity', 0.3)
-                painter.setOpacity(opacity)
-                
-                # 缩放图片以适应窗口，保持比例
-                scaled_pixmap = pixmap.scaled(self.viewport().size(), 
-                                            Qt.AspectRatioMode.KeepAspectRatioByExpanding, 
-                                            Qt.TransformationMode.SmoothTransformation)
-                
-                # 居中绘制
-                x = (self.viewport().width() - scaled_pixmap.width()) // 2
-                y = (self.viewport().height() - scaled_pixmap.height()) // 2
-                painter.drawPixmap(x, y, scaled_pixmap)
-            painter.end()
+        # 背景图由全局缓存在后台生成，这里只贴图
+        background_cache.paint(self.viewport())
         
         # 自定义绘制参考线
-        if config.get('show_indent_guides', True):
+        if self.show_guides and config.get('show_indent_guides', True):
             self.paint_indent_guides()
 
     def paint_indent_guides(self):
@@ -175,9 +180,9 @@ class CodeEditor(QsciScintilla):
         # 颜色计算
         if not self.guide_color:
             bg = QColor(config.get('theme_color', '#ffffff'))
-            is_dark = self._is_dark(bg)
+            dark = is_dark(bg)
             
-            if is_dark:
+            if dark:
                 # 深色背景下，参考线比背景稍亮
                 ratio = 0.2
                 r = min(255, int(bg.red() + (255 - bg.red()) * ratio))
@@ -205,115 +210,122 @@ class CodeEditor(QsciScintilla):
         last_line = min(first_line + lines_on_screen, max_lines - 1)
         
         tab_width = self.tabWidth() or 4
+        if tab_width != self.indent_guides.tab_width or len(self.indent_guides.indents) != max_lines:
+            self.indent_guides.reset(max_lines, tab_width)
         line_height = self.SendScintilla(QsciScintilla.SCI_TEXTHEIGHT, 0)
         # 获取单字符宽度以计算空行的 X 坐标
         char_width = self.SendScintilla(QsciScintilla.SCI_TEXTWIDTH, QsciLexerPython.Default, b" ")
         
-        # 遍历行进行绘制
-        for line in range(first_line, last_line + 1):
-            # 获取实际逻辑缩进（不受光标或虚拟空格影响）
-            indent = self.SendScintilla(QsciScintilla.SCI_GETLINEINDENTATION, line)
-            
-            # 判断是否为空行
-            end_pos = self.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, line)
-            indent_end_pos = self.SendScintilla(QsciScintilla.SCI_GETLINEINDENTPOSITION, line)
-            is_empty = (indent_end_pos == end_pos)
-            
-            draw_indent = indent
-            if is_empty:
-                # 向上/向下寻找非空行以确定稳定的参考线深度
-                prev_indent = self._get_nearby_non_empty_indent(line, -1)
-                next_indent = self._get_nearby_non_empty_indent(line, 1)
-                # 取最小值确保参考线在块结束时正确收拢
-                draw_indent = min(prev_indent, next_indent) if next_indent > 0 else prev_indent
-            
+        # 所有行的列 0 横坐标相同，行高固定，只需查询首行的位置
+        line_start_pos = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, first_line)
+        origin = self.viewport().mapFrom(self, QPoint(
+            self.SendScintilla(QsciScintilla.SCI_POINTXFROMPOSITION, 0, line_start_pos),
+            self.SendScintilla(QsciScintilla.SCI_POINTYFROMPOSITION, 0, line_start_pos)))
+        
+        # 收集所有参考线，一次性绘制
+        segments = []
+        for row, draw_indent in enumerate(self.indent_guides.guide_depths(first_line, last_line)):
             if draw_indent > 0:
-                first_char_col = self.SendScintilla(QsciScintilla.SCI_GETCOLUMN, indent_end_pos)
-                line_start_pos = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
-                y_window = self.SendScintilla(QsciScintilla.SCI_POINTYFROMPOSITION, 0, line_start_pos)
-                y = self.viewport().mapFrom(self, QPoint(0, y_window)).y()
-                
-                # 获取该行起始位置的 X 坐标 (即列 0 的 X)
-                x_start_window = self.SendScintilla(QsciScintilla.SCI_POINTXFROMPOSITION, 0, line_start_pos)
-                x_start_vp = self.viewport().mapFrom(self, QPoint(x_start_window, 0)).x()
-
+                y = origin.y() + row * line_height
                 for col in range(0, draw_indent, tab_width):
-                    # 关键：非空行时，参考线绝不绘制在首个字符及以后
-                    if not is_empty and col >= first_char_col:
-                        break
-                        
                     # 直接计算 X 坐标，避免空行时 SCI_FINDCOLUMN 返回错误位置
-                    x_vp = x_start_vp + int(col * char_width)
-                    
-                    # 绘制垂直线
-                    painter.drawLine(x_vp - 1, y, x_vp - 1, y + line_height)
+                    x_vp = origin.x() + int(col * char_width) - 1
+                    segments.append(QLineF(x_vp, y, x_vp, y + line_height))
+        if segments:
+            painter.drawLines(segments)
         
         painter.end()
 
-    def _get_nearby_non_empty_indent(self, line, direction):
-        """寻找附近非空行的缩进量"""
-        max_lines = self.SendScintilla(2154)
-        for i in range(1, 50):
-            target = line + i * direction
-            if 0 <= target < max_lines:
-                end = self.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, target)
-                indent_end = self.SendScintilla(QsciScintilla.SCI_GETLINEINDENTPOSITION, target)
-                if indent_end < end:
-                    return self.SendScintilla(QsciScintilla.SCI_GETLINEINDENTATION, target)
-            else:
-                break
-        return 0
+    def _on_modified(self, position, modification_type, text, length, lines_added, *args):
+        # 只让被修改的行的参考线缓存失效
+        if modification_type & (SC_MOD_INSERTTEXT | SC_MOD_DELETETEXT):
+            line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+            self.indent_guides.lines_changed(line, lines_added)
+
+    def schedule_lint(self):
+        if self.lint_enabled and not self.large_file and self.loader is None and config.get('lint', True):
+            self.lint_timer.start(config.get('lint_delay', 500))
+
+    def request_lint(self):
+        if self.lint_enabled and not self.large_file and self.loader is None:
+            lint_service.request(self)
+
+    def set_diagnostics(self, diagnostics):
+        """用检查结果更新符号栏标记"""
+        self.markerDeleteAll(MARKER_LINT_ERROR)
+        self.markerDeleteAll(MARKER_LINT_WARNING)
+        self.diagnostics = {}
+        for line, column, severity, message in diagnostics:
+            self.diagnostics.setdefault(line, []).append(message)
+            self.markerAdd(line, MARKER_LINT_ERROR if severity == 'error' else MARKER_LINT_WARNING)
+
+    def set_type_diagnostics(self, diagnostics):
+        """用类型检查结果 [(行, 列, 严重程度, 消息)] 更新标记；note 只附加在提示中"""
+        self.markerDeleteAll(MARKER_TYPE_ERROR)
+        self.type_diagnostics = {}
+        for line, column, severity, message in diagnostics:
+            self.type_diagnostics.setdefault(line, []).append(f"{severity}: {message}")
+            if severity == 'error':
+                self.markerAdd(line, MARKER_TYPE_ERROR)
+
+    def clear_diagnostics(self):
+        self.lint_timer.stop()
+        lint_service.forget(self)
+        self.set_diagnostics([])
+
+    def viewportEvent(self, event):
+        # 鼠标停在符号栏的标记上时显示检查消息
+        if event.type() == QEvent.Type.ToolTip and (self.diagnostics or self.type_diagnostics):
+            pos = event.pos()
+            margins = self.marginWidth(0) + self.marginWidth(1)
+            if pos.x() < margins:
+                position = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMPOINT, margins, pos.y())
+                line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, position)
+                messages = self.diagnostics.get(line, []) + self.type_diagnostics.get(line, [])
+                if messages:
+                    QToolTip.showText(event.globalPos(), "\n".join(messages), self)
+                else:
+                    QToolTip.hideText()
+                return True
+        return super().viewportEvent(event)
 
     def update_preferences(self):
         """更新编辑器配置"""
-        # 更新字体和主题色
-        self.font_family = config.get('font_family', 'Consolas')
-        self.font_size = config.get('font_size', 12)
-        theme_color_str = config.get('theme_color', '#ffffff')
-        theme_color = QColor(theme_color_str)
-        is_dark = self._is_dark(theme_color)
-        default_fg = QColor("#D4D4D4") if is_dark else QColor("#000000")
-        
-        # 1. 设置默认样式 (style 32) 并清除所有样式以实现继承
-        # 这确保了所有样式首先继承正确的背景色和字体
-        font_name_bytes = self.font_family.encode('utf-8')
-        self.SendScintilla(QsciScintilla.SCI_STYLESETFONT, 32, font_name_bytes)
-        self.SendScintilla(QsciScintilla.SCI_STYLESETSIZE, 32, self.font_size)
-        self.SendScintilla(QsciScintilla.SCI_STYLESETBACK, 32, theme_color)
-        self.SendScintilla(QsciScintilla.SCI_STYLESETFORE, 32, default_fg)
-        self.SendScintilla(QsciScintilla.SCI_STYLECLEARALL)
-        
-        # 2. 应用 Lexer 样式
-        font = QFont(self.font_family, self.font_size)
-        self.lexer.setDefaultFont(font)
-        self.lexer.setFont(font)
-        # 为所有可能样式设置字体
-        for i in range(128):
-            self.lexer.setFont(font, i)
-        
-        # 重新应用具体的语法高亮颜色
-        self.setup_styles()
-
-        # 更新背景颜色
-        self.setPaper(theme_color)
-        self.lexer.setDefaultPaper(theme_color)
-        for i in range(128):
-            self.lexer.setPaper(theme_color, i)
+        # 1. 字体和主题色：同一组合的样式表只计算一次
+        table = theme_engine.table()
+        self.font_family = table.font_family
+        self.font_size = table.font_size
+        table.apply(self)
+        self.theme_key = table.key
+        # 重置参考线颜色，触发重新计算
+        self.guide_color = None
 
-        # 3. 辅助组件设置
+        # 2. 辅助组件设置
         self.setMarginsBackgroundColor(QColor("#f0f0f0"))
         self.setMarginsForegroundColor(QColor("black"))
         self.setMarginWidth(0, "0000")
 
-        show_guides = config.get('show_indent_guides', True)
         self.setIndentationGuides(False)
         self.SendScintilla(2132, 0)
-        
-        # 4. 强制重新着色所有文本并重绘
-        self.SendScintilla(QsciScintilla.SCI_COLOURISE, 0, -1)
+
+        # 3. 样式编号没有变化，只需重新着色可见范围，其余部分滚动到时由 Scintilla 按需着色
+        self.colourise_visible()
         self.viewport().update()
         self.update()
 
+    def ensure_theme(self):
+        """隐藏期间主题或字体改变过时，在显示前补上"""
+        if self.theme_key != theme_engine.key():
+            self.update_preferences()
+
+    def colourise_visible(self):
+        first = self.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE, self.firstVisibleLine())
+        last = self.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE,
+                                  self.firstVisibleLine() + self.SendScintilla(QsciScintilla.SCI_LINESONSCREEN))
+        start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, first)
+        end = self.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, last)
+        self.SendScintilla(QsciScintilla.SCI_COLOURISE, start, end)
+
     def show_context_menu(self, pos):
         menu = self.createStandardContextMenu()
         menu.clear() # 清除默认的英文菜单
@@ -364,14 +376,173 @@ class CodeEditor(QsciScintilla):
         action_select_all.setShortcut("Ctrl+A")
         action_select_all.triggered.connect(self.selectAll)
         menu.addAction(action_select_all)
-        
+
+        # 转到定义/查找引用由主窗口通过符号索引完成
+        window = self.window()
+        if hasattr(window, 'go_to_definition') and window.editor_tabs.currentWidget() is self:
+            menu.addSeparator()
+            action_definition = QAction(translator.get("symbols.definition", "Go to Definition"), self)
+            action_definition.setShortcut("F12")
+            action_definition.triggered.connect(window.go_to_definition)
+            menu.addAction(action_definition)
+
+            action_references = QAction(translator.get("symbols.references", "Find References"), self)
+            action_references.setShortcut("Shift+F12")
+            action_references.triggered.connect(window.find_references)
+            menu.addAction(action_references)
+
         menu.exec(self.mapToGlobal(pos))
 
     def removeSelectedText(self):
         self.replaceSelectedText("")
 
+    def apply_size_limits(self, size):
+        """按文件大小关闭语法高亮、参考线和括号匹配（阈值可配置）"""
+        mb = 1024 * 1024
+        self.large_file = size > config.get('large_file_threshold', 5 * mb)
+        if size > config.get('large_file_lexer_limit', 5 * mb):
+            self.setLexer(None)
+        self.show_guides = size <= config.get('large_file_guides_limit', 5 * mb)
+        if size > config.get('large_file_brace_limit', 5 * mb):
+            self.setBraceMatching(QsciScintilla.BraceMatch.NoBraceMatch)
+
+    def begin_loading(self, worker):
+        """开始后台分块加载：加载期间只读且不记录撤销"""
+        self.loader = worker
+        self.clear()
+        self.setReadOnly(True)
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 0)
+        # 加载期间不发送修改通知：QScintilla 每次插入都会从文档开头统计字符数，
+        # 逐块追加会退化为平方级
+        self._event_mask = self.SendScintilla(QsciScintilla.SCI_GETMODEVENTMASK)
+        self.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK, 0)
+        self.loading_bar = ProgressBar(self)
+        self.loading_bar.setRange(0, 100)
+        self.loading_bar.setGeometry(0, 0, self.width(), 4)
+        self.loading_bar.show()
+        worker.chunkLoaded.connect(self.append_chunk)
+        worker.progress.connect(self.loading_bar.setValue)
+        worker.finished.connect(self.end_loading)
+
+    def append_chunk(self, data):
+        # 直接追加 UTF-8 字节，不经过 QString 转换；只读状态会拦截追加，临时解除
+        self.SendScintilla(QsciScintilla.SCI_SETREADONLY, 0)
+        self.SendScintilla(QsciScintilla.SCI_APPENDTEXT, len(data), data)
+        self.SendScintilla(QsciScintilla.SCI_SETREADONLY, 1)
+
+    def end_loading(self, success=True, error=""):
+        self.loader = None
+        if self.loading_bar is not None:
+            self.loading_bar.deleteLater()
+            self.loading_bar = None
+        self.SendScintilla(QsciScintilla.SCI_SETMODEVENTMASK, self._event_mask)
+        self.indent_guides.reset(self.lines(), self.tabWidth() or 4)
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 1)
+        self.SendScintilla(QsciScintilla.SCI_EMPTYUNDOBUFFER)
+        self.SendScintilla(QsciScintilla.SCI_SETSAVEPOINT)
+        self.SendScintilla(QsciScintilla.SCI_GOTOPOS, 0)
+        self.setReadOnly(self.read_only_file)
+        if self._pending_view_state is not None:
+            self.restore_view_state(self._pending_view_state)
+            self._pending_view_state = None
+
+    def cancel_loading(self):
+        """关闭标签页时停止加载"""
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader.wait()
+            self.loader = None
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.loading_bar is not None:
+            self.loading_bar.setGeometry(0, 0, self.width(), 4)
+
+    def memory_usage(self):
+        """估算文档占用的内存（字节）：文本、每个字符的样式字节和行索引，不含撤销历史"""
+        size = self.length()
+        return size * 2 + self.lines() * 16
+
+    def share_document(self, other):
+        """显示另一个编辑器的文档（分屏），两个视图共用同一份文本
+
+        样式保存在文档中，所以词法分析器、参考线和括号匹配也与对方保持一致。
+        """
+        self.setDocument(other.document())
+        lexer = self.lexer if QsciScintilla.lexer(other) is not None else None
+        if QsciScintilla.lexer(self) is not lexer:
+            # 样式已在对方视图中着色，不切换词法分析器时无需重新着色
+            self.setLexer(lexer)
+            if lexer is not None:
+                # setLexer 会换回词法分析器自带的样式
+                self.update_preferences()
+        self.show_guides = other.show_guides
+        self.setBraceMatching(other.braceMatching())
+        # 参考线缓存属于本视图，换文档后行数可能相同，必须重建
+        self.indent_guides.reset(self.lines(), self.tabWidth() or 4)
+
+    def release_document(self):
+        """换回一个空文档，不再引用其他编辑器的文档"""
+        self.setDocument(QsciDocument())
+        self.indent_guides.reset(self.lines(), self.tabWidth() or 4)
+
+    def view_state(self):
+        """返回光标和滚动位置，用于会话保存"""
+        line, index = self.getCursorPosition()
+        return {'line': line, 'index': index, 'first_line': self.firstVisibleLine()}
+
+    def restore_view_state(self, state):
+        if self.loader is not None:
+            # 大文件仍在加载，等加载完成后再恢复
+            self._pending_view_state = state
+            return
+        self.setCursorPosition(state.get('line', 0), state.get('index', 0))
+        self.setFirstVisibleLine(state.get('first_line', 0))
+
     def set_text(self, text):
         self.setText(text)
 
     def get_text(self):
         return self.text()
+
+
+class EditorPlaceholder(QWidget):
+    """尚未激活（恢复会话）或已休眠的标签页
+
+    只记录文件路径以及光标、滚动位置，不创建编辑器；第一次切换到该标签页时才由主窗口
+    替换为真正的 CodeEditor。休眠的标签页另外保存内容：有撤销历史时保留 Scintilla 文档
+    （撤销历史在文档中，只释放编辑器控件），否则只保留压缩后的文本。
+    """
+
+    def __init__(self, file_path, view_state=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.state = view_state or {}
+        self.document = None # QsciDocument
+        self.compressed = None # zlib 压缩的 UTF-8 文本
+        self.size = 0
+        self.modified = False
+        self.read_only_file = False
+
+    @property
+    def hibernated(self):
+        return self.document is not None or self.compressed is not None
+
+    def view_state(self):
+        return self.state
+
+    def memory_usage(self):
+        if self.compressed is not None:
+            return len(self.compressed)
+        if self.document is not None:
+            return self.size * 2
+        return 0
+
+    def compress(self):
+        """丢弃撤销历史：把保留的文档换成压缩后的文本"""
+        # 文档不属于任何控件时无法读取，借一个临时视图
+        view = QsciScintilla()
+        view.setDocument(self.document)
+        self.compressed = zlib.compress(bytes(view.bytes(0, self.size))[:self.size], 1)
+        self.document = None
+        view.deleteLater()
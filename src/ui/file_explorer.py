@@ -0,0 +1,239 @@
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QMenu, QFileIconProvider
+from PyQt6.QtCore import Qt, QFileSystemWatcher, QTimer, pyqtSignal
+from PyQt6.QtGui import QAction, QStandardItemModel, QStandardItem
+from qfluentwidgets import BodyLabel, TreeView
+from src.core.workspace import DirectoryLister, MAX_WATCHED_DIRS
+from src.core.translator import translator
+
+# 每次事件循环最多插入的行数：列出十万个条目的目录时界面仍能响应
+INSERT_CHUNK = 2000
+
+# 一次变化超过这个数量时整体替换子项，而不是逐个插入和删除
+MAX_DIFF_CHANGES = 2000
+
+PATH_ROLE = Qt.ItemDataRole.UserRole
+IS_DIR_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class FileTreeModel(QStandardItemModel):
+    """按需列出目录的文件树模型
+
+    节点保存在 C++ 的 QStandardItem 中：十万行的文件夹重新布局时视图不必逐行回调 Python。
+    展开文件夹时才在后台线程中列出，结果分批插入；已列出的文件夹加入文件系统监视器，
+    有变化时重新列出并只插入和删除变化的条目，已展开的子文件夹保持不变。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root_path = ""
+        self._items = {} # 路径 -> 已列出或正在列出的文件夹项
+        self._entries = {} # 路径 -> 当前显示的 [(名称, 是否为文件夹)]，与子项顺序一致
+        self._pending = {} # 路径 -> 等待分批插入的条目
+        self._stale = set() # 插入过程中又有变化的文件夹
+        self.lister = DirectoryLister(self)
+        self.lister.listed.connect(self.on_listed)
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        self._insert_timer = QTimer(self)
+        self._insert_timer.setInterval(0)
+        self._insert_timer.timeout.connect(self.insert_pending)
+        provider = QFileIconProvider()
+        # 不按文件取图标：网络文件系统上每个文件都要访问磁盘
+        self.folder_icon = provider.icon(QFileIconProvider.IconType.Folder)
+        self.file_icon = provider.icon(QFileIconProvider.IconType.File)
+
+    def set_root(self, path):
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+        self._items.clear()
+        self._entries.clear()
+        self._pending.clear()
+        self._stale.clear()
+        self.clear()
+        self.root_path = path
+        if path:
+            self.fetch(self.invisibleRootItem(), path)
+
+    def create_item(self, parent_path, name, is_dir):
+        item = QStandardItem(self.folder_icon if is_dir else self.file_icon, name)
+        item.setEditable(False)
+        item.setData(os.path.join(parent_path, name), PATH_ROLE)
+        item.setData(is_dir, IS_DIR_ROLE)
+        if is_dir:
+            # 占位子项让视图显示展开箭头，展开时才列出
+            item.appendRow(QStandardItem())
+        return item
+
+    def fetch(self, item, path):
+        if path not in self._items:
+            self._items[path] = item
+            self.lister.request(path)
+
+    def expand_item(self, item):
+        """文件夹第一次展开时列出"""
+        if item.data(IS_DIR_ROLE):
+            self.fetch(item, item.data(PATH_ROLE))
+
+    def refresh(self, path):
+        if path in self._entries:
+            self.lister.request(path)
+
+    def on_directory_changed(self, path):
+        if path not in self._items:
+            return
+        if not os.path.isdir(path):
+            # 文件夹已删除，由上级文件夹的变化移除
+            self.watcher.removePath(path)
+            return
+        self.refresh(path)
+
+    def on_listed(self, path, entries, error):
+        item = self._items.get(path)
+        if item is None:
+            return
+        if path in self._pending:
+            # 上一次的结果还没插入完，插入完后再列出一次
+            self._stale.add(path)
+            return
+        if path not in self._entries:
+            # 第一次列出：去掉占位子项后分批插入
+            if item is not self.invisibleRootItem():
+                item.removeRows(0, item.rowCount())
+            self._entries[path] = []
+            self._watch(path)
+            self._start_insert(path, entries)
+        else:
+            self.apply_changes(path, entries)
+
+    def _watch(self, path):
+        if len(self.watcher.directories()) < MAX_WATCHED_DIRS:
+            self.watcher.addPath(path)
+
+    def _start_insert(self, path, entries):
+        self._pending[path] = entries
+        self._insert_timer.start()
+
+    def insert_pending(self):
+        """分批插入列出的条目"""
+        budget = INSERT_CHUNK
+        while self._pending and budget > 0:
+            path = next(iter(self._pending))
+            item = self._items[path]
+            shown = self._entries[path]
+            batch = self._pending[path][len(shown):len(shown) + budget]
+            if batch:
+                item.appendRows([self.create_item(path, name, is_dir) for name, is_dir in batch])
+                shown.extend(batch)
+                budget -= len(batch)
+            if len(shown) >= len(self._pending[path]):
+                del self._pending[path]
+                if path in self._stale:
+                    self._stale.discard(path)
+                    self.refresh(path)
+        if not self._pending:
+            self._insert_timer.stop()
+
+    def apply_changes(self, path, entries):
+        """只插入和删除变化的条目，保留其余的项（包括已展开的子文件夹）"""
+        item = self._items[path]
+        shown = self._entries[path]
+        if shown == entries:
+            return
+        listed = set(entries)
+        removed = set(shown) - listed
+        added = listed.difference(shown)
+        if len(removed) + len(added) > MAX_DIFF_CHANGES:
+            # 大量变化：移除全部子项后重新分批插入
+            for name, is_dir in shown:
+                if is_dir:
+                    self._forget(os.path.join(path, name))
+            item.removeRows(0, item.rowCount())
+            self._entries[path] = []
+            self._start_insert(path, entries)
+            return
+        # 从后往前删除，前面的行号不变
+        for row in range(len(shown) - 1, -1, -1):
+            if shown[row] in removed:
+                name, is_dir = shown[row]
+                if is_dir:
+                    self._forget(os.path.join(path, name))
+                item.removeRow(row)
+        # 两个列表的排序方式相同，按新列表中的位置依次插入
+        for row, (name, is_dir) in enumerate(entries):
+            if (name, is_dir) in added:
+                item.insertRow(row, self.create_item(path, name, is_dir))
+        self._entries[path] = list(entries)
+
+    def _forget(self, path):
+        """文件夹被移除时停止监视它和已列出的子文件夹"""
+        if path not in self._items:
+            return
+        del self._items[path]
+        self._pending.pop(path, None)
+        for name, is_dir in self._entries.pop(path, []):
+            if is_dir:
+                self._forget(os.path.join(path, name))
+        if path in self.watcher.directories():
+            self.watcher.removePath(path)
+
+    def shutdown(self):
+        self._insert_timer.stop()
+        self.lister.stop()
+
+
+class FileExplorer(QWidget):
+    """文件浏览器：显示当前文件夹（未打开文件夹时为用户目录），双击打开文件"""
+    fileOpenRequested = pyqtSignal(str)
+    folderOpenRequested = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 4, 4, 4)
+        self.title_label = BodyLabel(self)
+        layout.addWidget(self.title_label)
+
+        self.model = FileTreeModel(self)
+        self.tree = TreeView(self)
+        self.tree.setHeaderHidden(True)
+        # 行高相同时视图不必逐行计算大小，十万行也能流畅滚动
+        self.tree.setUniformRowHeights(True)
+        self.tree.setModel(self.model)
+        self.tree.expanded.connect(lambda index: self.model.expand_item(self.model.itemFromIndex(index)))
+        self.tree.doubleClicked.connect(self.on_double_clicked)
+        self.tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.tree.customContextMenuRequested.connect(self.show_context_menu)
+        layout.addWidget(self.tree)
+
+    def set_root(self, path):
+        self.model.set_root(path)
+        self.title_label.setText(os.path.basename(path) or path)
+        self.title_label.setToolTip(path)
+
+    def on_double_clicked(self, index):
+        if index.data(PATH_ROLE) and not index.data(IS_DIR_ROLE):
+            self.fileOpenRequested.emit(index.data(PATH_ROLE))
+
+    def show_context_menu(self, pos):
+        index = self.tree.indexAt(pos)
+        path = index.data(PATH_ROLE)
+        menu = QMenu(self)
+        if path and not index.data(IS_DIR_ROLE):
+            action_open = QAction(translator.get("open", "Open"), self)
+            action_open.triggered.connect(lambda: self.fileOpenRequested.emit(path))
+            menu.addAction(action_open)
+            path = os.path.dirname(path)
+        elif path:
+            action_folder = QAction(translator.get("workspace.open_here", "Open as Folder"), self)
+            action_folder.triggered.connect(lambda: self.folderOpenRequested.emit(path))
+            menu.addAction(action_folder)
+        else:
+            path = self.model.root_path
+        action_refresh = QAction(translator.get("explorer.refresh", "Refresh"), self)
+        action_refresh.triggered.connect(lambda: self.model.refresh(path))
+        menu.addAction(action_refresh)
+        menu.exec(self.tree.viewport().mapToGlobal(pos))
+
+    def shutdown(self):
+        self.model.shutdown()
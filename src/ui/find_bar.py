@@ -0,0 +1,362 @@
+import re
+from PyQt6.QtCore import Qt, QThread, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QFrame, QHBoxLayout
+from PyQt6.Qsci import QsciScintilla
+from qfluentwidgets import LineEdit, TransparentTogglePushButton, TransparentToolButton, CaptionLabel, FluentIcon
+from src.config import config
+from src.core.output_log import SearchPattern, iter_line_matches
+from src.core.translator import translator
+
+# 查找结果使用的指示器（ANSI 颜色使用 20）
+FIND_INDICATOR = 21
+# 后台搜索时每次处理的数据量，块之间检查是否已取消
+SEARCH_CHUNK = 4 * 1024 * 1024
+# 可见区域内最多高亮的匹配数
+MAX_VISIBLE_HIGHLIGHTS = 2000
+
+
+class OutputSearchWorker(QThread):
+    matchesFound = pyqtSignal(list) # [(全局行号, 行内字节偏移, 字节长度)]
+    searchFinished = pyqtSignal(bool) # 是否因达到上限而截断
+
+    def __init__(self, pattern, sources, limit, parent=None):
+        super().__init__(parent)
+        self.pattern = pattern
+        self.sources = sources # [(字节数据或 mmap, 起始全局行号)]
+        self.limit = limit
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        batch = []
+        count = 0
+        truncated = False
+        try:
+            for data, line in self.sources:
+                pos = 0
+                size = len(data)
+                while pos < size and not truncated:
+                    if self._cancelled:
+                        return
+                    # 按行边界切块，便于及时响应取消
+                    end = min(size, pos + SEARCH_CHUNK)
+                    if end < size:
+                        newline = data.rfind(b'\n', pos, end)
+                        end = newline + 1 if newline != -1 else (data.find(b'\n', end) + 1 or size)
+                    window = data[pos:end]
+                    for hit in iter_line_matches(window, self.pattern, line):
+                        batch.append(hit)
+                        count += 1
+                        if count >= self.limit:
+                            truncated = True
+                            break
+                        # 第一个结果立即送出，之后按批发送
+                        if count == 1 or len(batch) >= 500:
+                            self.matchesFound.emit(batch)
+                            batch = []
+                    line += window.count(b'\n')
+                    pos = end
+                if truncated:
+                    break
+            if batch:
+                self.matchesFound.emit(batch)
+            self.searchFinished.emit(truncated)
+        finally:
+            for data, _ in self.sources:
+                if hasattr(data, 'close'):
+                    data.close()
+
+
+class FindBar(QFrame):
+    """终端输出的查找栏，浮在终端右上角
+
+    完整输出由磁盘日志和终端文档组成，搜索在后台线程中进行；匹配以全局行号记录，
+    输出被裁剪进日志后行号依然有效。新输出只增量搜索新增的行，高亮只作用于可见区域。
+    """
+
+    def __init__(self, shell):
+        super().__init__(shell)
+        self.shell = shell
+        self.setObjectName("findBar")
+        self.setStyleSheet("""
+            #findBar {
+                background-color: rgba(243, 243, 243, 0.97);
+                border: 1px solid rgba(0, 0, 0, 0.12);
+                border-radius: 6px;
+            }
+        """)
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(6, 4, 4, 4)
+        layout.setSpacing(2)
+
+        self.search_edit = LineEdit(self)
+        self.search_edit.setPlaceholderText(translator.get("terminal.find", "Find"))
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setFixedWidth(220)
+        self.search_edit.textChanged.connect(lambda: self._search_timer.start())
+        layout.addWidget(self.search_edit)
+
+        self.case_button = TransparentTogglePushButton("Aa", self)
+        self.case_button.setToolTip(translator.get("terminal.find_case", "Match Case"))
+        self.case_button.setFixedWidth(36)
+        self.case_button.toggled.connect(self.start_search)
+        layout.addWidget(self.case_button)
+
+        self.regex_button = TransparentTogglePushButton(".*", self)
+        self.regex_button.setToolTip(translator.get("terminal.find_regex", "Use Regular Expression"))
+        self.regex_button.setFixedWidth(36)
+        self.regex_button.toggled.connect(self.start_search)
+        layout.addWidget(self.regex_button)
+
+        self.count_label = CaptionLabel("", self)
+        self.count_label.setMinimumWidth(80)
+        self.count_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.count_label)
+
+        self.prev_button = TransparentToolButton(FluentIcon.UP, self)
+        self.prev_button.clicked.connect(self.find_previous)
+        layout.addWidget(self.prev_button)
+
+        self.next_button = TransparentToolButton(FluentIcon.DOWN, self)
+        self.next_button.clicked.connect(self.find_next)
+        layout.addWidget(self.next_button)
+
+        self.close_button = TransparentToolButton(FluentIcon.CLOSE, self)
+        self.close_button.clicked.connect(self.close_bar)
+        layout.addWidget(self.close_button)
+
+        self.max_matches = config.get('terminal_find_max_matches', 10000)
+        self.pattern = None
+        self.matches = []
+        self.truncated = False
+        self.current = -1
+        self.worker = None
+        self._searched_line = 0 # 已搜索到的全局行号（不含）
+        self._highlight_key = None
+
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(150)
+        self._search_timer.timeout.connect(self.start_search)
+        # 新输出到达后稍后再增量搜索，避免刷屏时频繁启动线程
+        self._append_timer = QTimer(self)
+        self._append_timer.setSingleShot(True)
+        self._append_timer.setInterval(300)
+        self._append_timer.timeout.connect(self.search_appended)
+        self._highlight_timer = QTimer(self)
+        self._highlight_timer.setSingleShot(True)
+        self._highlight_timer.setInterval(30)
+        self._highlight_timer.timeout.connect(self.highlight_visible)
+
+        shell.SendScintilla(QsciScintilla.SCI_INDICSETSTYLE, FIND_INDICATOR, QsciScintilla.INDIC_ROUNDBOX)
+        shell.SendScintilla(QsciScintilla.SCI_INDICSETFORE, FIND_INDICATOR, QColor("#f0a030"))
+        shell.SendScintilla(QsciScintilla.SCI_INDICSETALPHA, FIND_INDICATOR, 110)
+        shell.SendScintilla(QsciScintilla.SCI_INDICSETUNDER, FIND_INDICATOR, True)
+        self.adjustSize()
+
+    def open_bar(self):
+        """显示查找栏，并以选中的文本作为查找内容"""
+        selected = self.shell.selectedText()
+        if selected and '\n' not in selected:
+            self.search_edit.setText(selected)
+        self.reposition()
+        self.show()
+        self.raise_()
+        self.search_edit.setFocus()
+        self.search_edit.selectAll()
+        self.start_search()
+
+    def close_bar(self):
+        self._cancel_worker()
+        self._search_timer.stop()
+        self._append_timer.stop()
+        self.hide()
+        self.pattern = None
+        self.matches = []
+        self._clear_highlights()
+        self.shell.setFocus()
+
+    def reposition(self):
+        viewport = self.shell.viewport()
+        x = viewport.x() + viewport.width() - self.width() - 8
+        self.move(max(0, x), viewport.y() + 8)
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.close_bar()
+            return
+        if event.key() in (Qt.Key.Key_Enter, Qt.Key.Key_Return):
+            # 终端习惯从最新的输出向上查找
+            if event.modifiers() & Qt.KeyboardModifier.ShiftModifier:
+                self.find_next()
+            else:
+                self.find_previous()
+            return
+        super().keyPressEvent(event)
+
+    def _cancel_worker(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.matchesFound.disconnect()
+            self.worker.searchFinished.disconnect()
+            self.worker = None
+
+    def _start_worker(self, sources):
+        # 以查找栏为父对象：取消后线程可能仍在运行，由 Qt 在其结束后释放
+        worker = OutputSearchWorker(self.pattern, sources, self.max_matches - len(self.matches), self)
+        worker.matchesFound.connect(self.on_matches_found)
+        worker.searchFinished.connect(self.on_search_finished)
+        worker.finished.connect(worker.deleteLater)
+        self.worker = worker
+        worker.start()
+
+    def start_search(self):
+        """按当前条件重新搜索全部输出"""
+        self._search_timer.stop()
+        self._append_timer.stop()
+        self._cancel_worker()
+        self.matches = []
+        self.truncated = False
+        self.current = -1
+        self.pattern = None
+
+        text = self.search_edit.text()
+        if text:
+            try:
+                self.pattern = SearchPattern(text, self.regex_button.isChecked(), self.case_button.isChecked())
+            except re.error:
+                self.count_label.setText(translator.get("terminal.find_invalid", "Invalid pattern"))
+                self._clear_highlights()
+                return
+        self.update_count()
+        self._highlight_key = None
+        self.highlight_visible()
+        if self.pattern is None:
+            return
+
+        shell = self.shell
+        log = shell.output_log
+        # 只搜索已完成的行；仍可能被 \r 改写的当前输出行留到它换行之后
+        end = shell.line_start
+        sources = []
+        snapshot = log.snapshot()
+        if snapshot is not None:
+            sources.append((snapshot, 0))
+        sources.append((bytes(shell.bytes(0, end))[:end], shell.trimmed_lines))
+        self._searched_line = shell.trimmed_lines + shell.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, end)
+        self._start_worker(sources)
+
+    def output_appended(self):
+        """终端写入了新输出"""
+        if self.pattern is not None and not self.truncated:
+            if not self._append_timer.isActive():
+                self._append_timer.start()
+        self.schedule_highlight()
+
+    def search_appended(self):
+        """只搜索上次搜索之后新增的完整行"""
+        if self.pattern is None or self.truncated:
+            return
+        if self.worker is not None:
+            # 上一次搜索尚未结束
+            self._append_timer.start()
+            return
+        shell = self.shell
+        log = shell.output_log
+        sources = []
+        if self._searched_line < log.line_count:
+            # 搜索之前已被裁剪进日志的行
+            data = log.read_bytes(self._searched_line, log.line_count - self._searched_line)
+            sources.append((data, self._searched_line))
+            self._searched_line = log.line_count
+        # 不写入磁盘日志时，搜索之前被裁剪的行已经不存在，直接跳过
+        self._searched_line = max(self._searched_line, shell.trimmed_lines)
+        first_line = self._searched_line - shell.trimmed_lines
+        end = shell.line_start
+        end_line = shell.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, end)
+        if end_line > first_line:
+            start = shell.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, first_line)
+            sources.append((bytes(shell.bytes(start, end))[:end - start], self._searched_line))
+            self._searched_line = shell.trimmed_lines + end_line
+        if sources:
+            self._start_worker(sources)
+
+    def on_matches_found(self, batch):
+        self.matches.extend(batch)
+        self.update_count()
+
+    def on_search_finished(self, truncated):
+        self.truncated = self.truncated or truncated
+        self.worker = None
+        self.update_count()
+
+    def update_count(self):
+        if self.pattern is None:
+            self.count_label.setText("")
+            return
+        total = f"{len(self.matches)}+" if self.truncated else str(len(self.matches))
+        if not self.matches:
+            self.count_label.setText(translator.get("terminal.find_none", "No results") if self.worker is None else "…")
+        elif self.current == -1:
+            self.count_label.setText(total)
+        else:
+            self.count_label.setText(f"{self.current + 1}/{total}")
+
+    def find_next(self):
+        if self.matches:
+            self.current = 0 if self.current == -1 else (self.current + 1) % len(self.matches)
+            self.go_to_match()
+
+    def find_previous(self):
+        if self.matches:
+            self.current = len(self.matches) - 1 if self.current <= 0 else self.current - 1
+            self.go_to_match()
+
+    def go_to_match(self):
+        """选中当前匹配；已裁剪进磁盘日志的匹配在完整输出视图中显示"""
+        self.update_count()
+        line, column, length = self.matches[self.current]
+        shell = self.shell
+        if line < shell.trimmed_lines:
+            if line < shell.output_log.line_count:
+                from src.ui.output_view import OutputLogDialog
+                OutputLogDialog(shell, shell.window(), (line, column, length)).exec()
+            # 否则该行已被裁剪且没有写入磁盘日志，无法显示
+            return
+        start = shell.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line - shell.trimmed_lines) + column
+        shell.SendScintilla(QsciScintilla.SCI_SETSEL, start, start + length)
+
+    def schedule_highlight(self):
+        if self.isVisible() and not self._highlight_timer.isActive():
+            self._highlight_timer.start()
+
+    def _clear_highlights(self):
+        self.shell.SendScintilla(QsciScintilla.SCI_SETINDICATORCURRENT, FIND_INDICATOR)
+        self.shell.SendScintilla(QsciScintilla.SCI_INDICATORCLEARRANGE, 0, self.shell.length())
+        self._highlight_key = None
+
+    def highlight_visible(self):
+        """只在当前可见的行中查找并高亮匹配"""
+        shell = self.shell
+        first_visible = shell.SendScintilla(QsciScintilla.SCI_GETFIRSTVISIBLELINE)
+        first = shell.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE, first_visible)
+        last = shell.SendScintilla(QsciScintilla.SCI_DOCLINEFROMVISIBLE,
+                                   first_visible + shell.SendScintilla(QsciScintilla.SCI_LINESONSCREEN))
+        start = shell.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, first)
+        end = shell.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, last)
+        key = (start, end, shell.length(), self.pattern)
+        if key == self._highlight_key:
+            return
+        self._clear_highlights()
+        self._highlight_key = key
+        if self.pattern is None or end <= start:
+            return
+        data = bytes(shell.bytes(start, end))[:end - start]
+        for count, (match_start, match_end) in enumerate(self.pattern.spans(data)):
+            if count >= MAX_VISIBLE_HIGHLIGHTS:
+                break
+            shell.SendScintilla(QsciScintilla.SCI_INDICATORFILLRANGE, start + match_start, match_end - match_start)
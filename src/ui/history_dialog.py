@@ -0,0 +1,70 @@
+import time, difflib
+from PyQt6.QtWidgets import QHBoxLayout, QListWidgetItem
+from PyQt6.QtCore import Qt
+from PyQt6.Qsci import QsciScintilla, QsciLexerDiff
+from qfluentwidgets import MessageBoxBase, SubtitleLabel, ListWidget
+from src.core.local_history import local_history
+from src.core.translator import translator
+
+
+class HistoryDialog(MessageBoxBase):
+    """文件的本地历史：左侧为保存时间线，右侧为所选版本与当前内容的差异"""
+
+    def __init__(self, file_path, current_text, parent=None):
+        super().__init__(parent)
+        self.current_text = current_text
+        self.selected_text = None
+
+        self.titleLabel = SubtitleLabel(translator.get("history.title", "Local History"), self)
+        self.viewLayout.addWidget(self.titleLabel)
+
+        layout = QHBoxLayout()
+        self.list = ListWidget(self)
+        self.list.setFixedWidth(220)
+        # 时间线只来自索引，此时不读取任何快照
+        for entry in reversed(local_history.timeline(file_path)):
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time']))
+            item = QListWidgetItem(f"{stamp}  ({entry['size']} B)")
+            item.setData(Qt.ItemDataRole.UserRole, entry)
+            self.list.addItem(item)
+        self.list.currentItemChanged.connect(self.show_entry)
+        layout.addWidget(self.list)
+
+        self.view = QsciScintilla(self)
+        self.view.setLexer(QsciLexerDiff(self.view))
+        self.view.setWrapMode(QsciScintilla.WrapMode.WrapNone)
+        self.view.setMarginWidth(1, 0)
+        self.view.setReadOnly(True)
+        self.view.setMinimumSize(700, 400)
+        layout.addWidget(self.view)
+        self.viewLayout.addLayout(layout)
+
+        self.yesButton.setText(translator.get("history.restore", "Restore This Version"))
+        self.yesButton.setEnabled(False)
+        self.cancelButton.setText(translator.get("terminal.close", "Close"))
+        if self.list.count():
+            self.list.setCurrentRow(0)
+        else:
+            self.view.setText(translator.get("history.empty", "No saved versions yet."))
+
+    def show_entry(self, item, previous=None):
+        """读取所选快照并显示与当前内容的差异"""
+        if item is None:
+            return
+        entry = item.data(Qt.ItemDataRole.UserRole)
+        try:
+            self.selected_text = local_history.read(entry['hash'])
+        except (OSError, ValueError) as e:
+            self.selected_text = None
+            self.yesButton.setEnabled(False)
+            self.view.setText(str(e))
+            return
+        diff = difflib.unified_diff(
+            self.selected_text.splitlines(keepends=True),
+            self.current_text.splitlines(keepends=True),
+            item.text(),
+            translator.get("history.current", "Current"),
+        )
+        text = "".join(line if line.endswith("\n") else line + "\n" for line in diff)
+        self.view.setText(text or translator.get("history.identical", "Identical to the current content."))
+        self.yesButton.setEnabled(True)
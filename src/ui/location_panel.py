@@ -0,0 +1,63 @@
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListWidgetItem
+from PyQt6.QtCore import Qt, pyqtSignal
+from qfluentwidgets import BodyLabel, ListWidget
+
+# 最多显示的结果数量
+MAX_LOCATIONS = 5000
+
+
+def preview_lines(locations):
+    """按文件读取一次，返回每个位置所在行的文本"""
+    lines = {}
+    previews = []
+    for path, line, column in locations:
+        if path not in lines:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    lines[path] = f.read().splitlines()
+            except OSError:
+                lines[path] = []
+        text = lines[path][line] if line < len(lines[path]) else ""
+        previews.append(text.strip())
+    return previews
+
+
+class LocationPanel(QWidget):
+    """位置列表面板（终端区域的一个标签页）：查找引用等的结果，双击跳转"""
+    openRequested = pyqtSignal(str, int, int) # 路径, 行, 列
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 4, 8, 4)
+        self.status_label = BodyLabel(self)
+        layout.addWidget(self.status_label)
+        self.list = ListWidget(self)
+        self.list.itemDoubleClicked.connect(self.open_item)
+        layout.addWidget(self.list)
+        self.root = ""
+
+    def set_locations(self, status, locations, root=""):
+        """locations 为 [(路径, 行, 列)]，行列从 0 开始；root 用于显示相对路径"""
+        self.status_label.setText(status)
+        self.clear_locations(root)
+        locations = locations[:MAX_LOCATIONS]
+        for (path, line, column), text in zip(locations, preview_lines(locations)):
+            self.add_location(path, line, column, text)
+
+    def clear_locations(self, root=""):
+        self.root = root
+        self.list.clear()
+
+    def add_location(self, path, line, column, text):
+        root = self.root
+        name = os.path.relpath(path, root) if root and path.startswith(root) else os.path.basename(path)
+        item = QListWidgetItem(f"{name}:{line + 1}:{column + 1}  {text}")
+        item.setToolTip(path)
+        item.setData(Qt.ItemDataRole.UserRole, (path, line, column))
+        self.list.addItem(item)
+
+    def open_item(self, item):
+        path, line, column = item.data(Qt.ItemDataRole.UserRole)
+        self.openRequested.emit(path, line, column)
@@ -1,10 +1,18 @@
-import os
+import os, time, zlib
 from PyQt6.QtCore import Qt, QProcess, QProcessEnvironment, QTimer
 from PyQt6.QtWidgets import QVBoxLayout, QHBoxLayout, QWidget, QSplitter, QFileDialog, QFrame
 from PyQt6.QtGui import QIcon, QShortcut, QKeySequence, QColor, QFontMetrics
-from qfluentwidgets import FluentWindow, NavigationItemPosition, FluentIcon, ToolButton, TabWidget
+from qfluentwidgets import FluentWindow, NavigationItemPosition, FluentIcon, ToolButton, TabWidget, InfoBar
 from src.core.translator import translator
-from src.ui.editor import CodeEditor
+from src.ui.editor import CodeEditor, EditorPlaceholder
+from src.core.file_saver import save_service
+from src.core.journal import recovery_journal
+from src.core.documents import document_registry
+from src.core.linter import lint_service, lintable
+from src.core.type_checker import type_check_service
+from src.core.workspace import workspace, file_cache
+from src.core.file_search import file_search
+from src.core.symbol_index import symbol_index, collect, MAX_BUFFER_PARSE
 
 class MainWindow(FluentWindow):
     def __init__(self):
@@ -38,8 +46,36 @@ class MainWindow(FluentWindow):
         self.editor_tabs.tabAddRequested.connect(self.new_file)
         self.editor_tabs.setTabsClosable(True)
         self.editor_tabs.tabCloseRequested.connect(self.close_tab)
+        # 用页面栈的信号：代码中调用 setCurrentIndex 时标签栏不会发出 currentChanged
+        self.editor_tabs.stackedWidget.currentChanged.connect(self.on_editor_tab_changed)
+        save_service.saveFinished.connect(self.on_file_saved)
+        self._hold_placeholders = False
+        self._active_page = None
+
+        # 长时间未切换到的标签页进入休眠
+        self.hibernate_timer = QTimer(self)
+        self.hibernate_timer.setInterval(60 * 1000)
+        self.hibernate_timer.timeout.connect(self.hibernate_idle_tabs)
+        self.hibernate_timer.start()
         self.right_splitter.addWidget(self.editor_tabs)
 
+        # 分屏视图：与当前标签页共用同一个文档，默认隐藏
+        self.split_view = CodeEditor()
+        # 与标签页共用文档，检查由标签页的编辑器负责
+        self.split_view.lint_enabled = False
+        self.split_view.hide()
+        self.right_splitter.addWidget(self.split_view)
+
+        # 终端区域中除终端以外的面板（类型检查、引用列表），第一次打开时创建
+        self.tool_panels = []
+        self.type_check_panel = None
+        self.location_panel = None
+        self.search_panel = None
+        # 快速打开面板 (Ctrl+P)，第一次打开时创建
+        self.quick_open = None
+        self.type_diagnostics = {} # 规范化路径 -> [(行, 列, 严重程度, 消息)]
+        type_check_service.finished.connect(self.on_type_check_finished)
+
         # 终端/输出容器
         self.terminal_container = TabWidget()
         self.terminal_container.tabBar.setTabShadowEnabled(False)
@@ -50,7 +86,35 @@ class MainWindow(FluentWindow):
         
         self.right_splitter.addWidget(self.terminal_container)
         self.right_splitter.setSizes([700, 300])
-        self.central_layout.addWidget(self.right_splitter)
+
+        # 左侧大纲面板，默认隐藏
+        from src.ui.outline_panel import OutlinePanel
+        self.outline_panel = OutlinePanel()
+        self.outline_panel.lineRequested.connect(lambda line, column: self.open_location("", line, column))
+        self.outline_panel.hide()
+        symbol_index.progress.connect(self.outline_panel.set_progress)
+        symbol_index.updated.connect(self.on_symbols_updated)
+        workspace.folderChanged.connect(self.on_workspace_changed)
+
+        # 左侧文件浏览器，打开文件夹或启动完成后才列出目录
+        from src.ui.file_explorer import FileExplorer
+        from src.config import config
+        self.file_explorer = FileExplorer()
+        self.file_explorer.fileOpenRequested.connect(self.open_file)
+        self.file_explorer.folderOpenRequested.connect(workspace.open)
+        self.file_explorer.setVisible(config.get('show_explorer', True))
+
+        self.side_splitter = QSplitter(Qt.Orientation.Vertical)
+        self.side_splitter.addWidget(self.file_explorer)
+        self.side_splitter.addWidget(self.outline_panel)
+        self.update_side_panel()
+
+        self.main_splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.main_splitter.addWidget(self.side_splitter)
+        self.main_splitter.addWidget(self.right_splitter)
+        self.main_splitter.setStretchFactor(1, 1)
+        self.main_splitter.setSizes([220, 780])
+        self.central_layout.addWidget(self.main_splitter)
         
         # 优先添加主界面
         self.addSubInterface(self.central_widget, FluentIcon.HOME.colored(QColor(0, 103, 192), QColor(0, 153, 255)), translator.get("home"))
@@ -105,8 +169,15 @@ class MainWindow(FluentWindow):
 
         # 4. 加载核心交互组件 ( InteractiveShell 导入和实例化)
         self.ensure_terminal_created()
-        self.new_file()
+        # 恢复上次打开的文件夹，后台更新它的符号索引
+        workspace.open(config.get('workspace', ''))
+        if not workspace.root:
+            self.file_explorer.set_root(os.path.expanduser('~'))
+        if not self.restore_session():
+            self.new_file()
         self.init_shortcuts()
+        # 上次异常退出时留下的未保存内容
+        QTimer.singleShot(0, self.restore_unsaved_buffers)
         
         # 5. 将非核心次要界面的初始化进一步推迟
         QTimer.singleShot(200, self.init_sub_interfaces)
@@ -122,6 +193,8 @@ class MainWindow(FluentWindow):
         terminal = InteractiveShell(self)
         terminal.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         terminal.customContextMenuRequested.connect(lambda pos: self.show_terminal_menu(pos, terminal))
+        terminal.throttledChanged.connect(lambda throttled: self.on_terminal_throttled(terminal, throttled))
+        terminal.exportFinished.connect(self.on_terminal_exported)
 
         # 如果是第一个终端，赋值给 self.terminal 以保持兼容性
         if not hasattr(self, 'terminal'):
@@ -184,14 +257,53 @@ class MainWindow(FluentWindow):
         self.shortcut_toggle_terminal = QShortcut(QKeySequence("Ctrl+J"), self)
         self.shortcut_toggle_terminal.activated.connect(self.toggle_terminal)
 
+        # 分屏 (Ctrl+\)
+        self.shortcut_split = QShortcut(QKeySequence("Ctrl+\\"), self)
+        self.shortcut_split.activated.connect(self.toggle_split_view)
+
+        # 转到定义 (F12) / 查找引用 (Shift+F12)
+        self.shortcut_definition = QShortcut(QKeySequence("F12"), self)
+        self.shortcut_definition.activated.connect(self.go_to_definition)
+        self.shortcut_references = QShortcut(QKeySequence("Shift+F12"), self)
+        self.shortcut_references.activated.connect(self.find_references)
+
+        # 在文件中查找 (Ctrl+Shift+F)
+        self.shortcut_search = QShortcut(QKeySequence("Ctrl+Shift+F"), self)
+        self.shortcut_search.activated.connect(self.show_search_panel)
+
+        # 快速打开文件 (Ctrl+P)
+        self.shortcut_quick_open = QShortcut(QKeySequence("Ctrl+P"), self)
+        self.shortcut_quick_open.activated.connect(self.show_quick_open)
+
+    def on_terminal_throttled(self, terminal, throttled):
+        """输出被限流时在终端标签上显示提示"""
+        text = translator.get("shell")
+        if throttled:
+            text = f"{text} ({translator.get('terminal.throttled', 'Throttled')})"
+        for i in range(self.terminal_container.count()):
+            if self.terminal_container.widget(i) is terminal:
+                self.terminal_container.setTabText(i, text)
+                self.update_tab_widths()
+                break
+
     def on_terminal_tab_changed(self, index):
         """当终端标签页切换时，更新当前活跃的终端引用"""
-        if index != -1:
+        if index != -1 and self.terminal_container.widget(index) not in self.tool_panels:
             self.terminal = self.terminal_container.widget(index)
 
     def handle_terminal_close(self, index):
-        # 标签上的关闭按钮 -> 如果有多个标签则关闭当前标签，否则隐藏整个面板
-        if self.terminal_container.count() > 1:
+        widget = self.terminal_container.widget(index)
+        if widget is self.type_check_panel:
+            self.close_type_check_panel()
+            return
+        if widget in self.tool_panels:
+            self.hide_tool_panel(widget)
+            return
+        # 标签上的关闭按钮 -> 如果有多个终端则关闭当前标签，否则隐藏整个面板
+        shells = self.terminal_container.count()
+        shells -= sum(1 for panel in self.tool_panels if self.terminal_container.stackedWidget.indexOf(panel) != -1)
+        if shells > 1:
+            widget.shutdown()
             self.terminal_container.removeTab(index)
         else:
             self.terminal_container.hide()
@@ -226,14 +338,59 @@ class MainWindow(FluentWindow):
         action_select_all.triggered.connect(terminal_widget.selectAll)
         menu.addAction(action_select_all)
         
+        action_find = QAction(translator.get("terminal.find", "Find"), self)
+        action_find.setShortcut("Ctrl+F")
+        action_find.triggered.connect(terminal_widget.show_find_bar)
+        menu.addAction(action_find)
+        
+        # 右键位于被切分的超长行上时，提供查看完整行的入口
+        line = terminal_widget.lineAt(pos)
+        if line != -1 and terminal_widget.full_line_at(line) is not None:
+            action_full_line = QAction(translator.get("terminal.show_full_line", "Show Full Line"), self)
+            action_full_line.triggered.connect(lambda: terminal_widget.show_full_line(line))
+            menu.addAction(action_full_line)
+        
         menu.addSeparator()
         
+        # 超出回滚上限的输出保存在磁盘日志中，可在完整输出视图中查看
+        if terminal_widget.output_log.line_count:
+            action_full_output = QAction(translator.get("terminal.show_full_output", "Show Full Output"), self)
+            action_full_output.triggered.connect(lambda: self.show_full_output(terminal_widget))
+            menu.addAction(action_full_output)
+        
+        action_export = QAction(translator.get("terminal.export", "Export Output..."), self)
+        action_export.triggered.connect(lambda: self.export_terminal_output(terminal_widget))
+        menu.addAction(action_export)
+        
         action_clear = QAction(translator.get("terminal.clear", "Clear"), self)
         action_clear.triggered.connect(terminal_widget.clear_shell)
         menu.addAction(action_clear)
         
         menu.exec(terminal_widget.mapToGlobal(pos))
 
+    def show_full_output(self, terminal):
+        from src.ui.output_view import OutputLogDialog
+        OutputLogDialog(terminal, self).exec()
+
+    def export_terminal_output(self, terminal):
+        file_path, _ = QFileDialog.getSaveFileName(self, translator.get("terminal.export", "Export Output..."), "output.txt", "Text Files (*.txt);;All Files (*)")
+        if file_path:
+            terminal.export_output(file_path)
+
+    def on_terminal_exported(self, success, message):
+        if success:
+            InfoBar.success(
+                title=translator.get("success"),
+                content=f"{translator.get('terminal.export_success', 'Output exported to')}: {message}",
+                parent=self
+            )
+        else:
+            InfoBar.error(
+                title=translator.get("error"),
+                content=f"{translator.get('terminal.export_failed', 'Failed to export output')}: {message}",
+                parent=self
+            )
+
     def calculate_tab_width(self, text):
         """根据文本内容计算标签页宽度，确保文字完整显示"""
         # 获取标签栏的字体
@@ -294,6 +451,29 @@ class MainWindow(FluentWindow):
         self.btn_new.setToolTip(f"{translator.get('new.tooltip')} (Ctrl+N)")
         self.btn_open.setToolTip(f"{translator.get('open.tooltip')} (Ctrl+O)")
         self.btn_save.setToolTip(f"{translator.get('save.tooltip')} (Ctrl+S)")
+        self.btn_history.setToolTip(translator.get('history.tooltip', 'Local History'))
+        self.btn_memory.setToolTip(translator.get('tabs.memory', 'Tab Memory'))
+        self.btn_split.setToolTip(f"{translator.get('view.split', 'Split View')} (Ctrl+\\)")
+        self.btn_type_check.setToolTip(translator.get('typecheck.title', 'Type Check'))
+        if self.type_check_panel is not None:
+            self.type_check_panel.update_texts()
+            index = self.terminal_container.stackedWidget.indexOf(self.type_check_panel)
+            if index != -1:
+                self.terminal_container.setTabText(index, translator.get('typecheck.title', 'Type Check'))
+        if self.location_panel is not None:
+            index = self.terminal_container.stackedWidget.indexOf(self.location_panel)
+            if index != -1:
+                self.terminal_container.setTabText(index, translator.get('symbols.locations', 'Locations'))
+        if self.search_panel is not None:
+            self.search_panel.update_texts()
+            index = self.terminal_container.stackedWidget.indexOf(self.search_panel)
+            if index != -1:
+                self.terminal_container.setTabText(index, translator.get('search.title', 'Search'))
+        self.btn_search.setToolTip(f"{translator.get('search.title', 'Search')} (Ctrl+Shift+F)")
+        self.btn_open_folder.setToolTip(translator.get('workspace.open', 'Open Folder'))
+        self.btn_outline.setToolTip(translator.get('outline.title', 'Outline'))
+        self.outline_panel.update_texts()
+        self.btn_explorer.setToolTip(translator.get('explorer.title', 'Files'))
         self.btn_toggle_terminal.setToolTip(f"{translator.get('view.terminal', 'Toggle Terminal')} (Ctrl+J)")
 
         # 更新未命名的编辑器标签
@@ -339,10 +519,45 @@ class MainWindow(FluentWindow):
         self.btn_save = ToolButton(FluentIcon.SAVE, self)
         self.btn_save.setToolTip(f"{translator.get('save.tooltip')} (Ctrl+S)")
         self.btn_save.clicked.connect(self.save_current_file)
+
+        self.btn_history = ToolButton(FluentIcon.HISTORY, self)
+        self.btn_history.setToolTip(translator.get('history.tooltip', 'Local History'))
+        self.btn_history.clicked.connect(self.show_local_history)
+
+        self.btn_memory = ToolButton(FluentIcon.DEVELOPER_TOOLS, self)
+        self.btn_memory.setToolTip(translator.get('tabs.memory', 'Tab Memory'))
+        self.btn_memory.clicked.connect(self.show_tab_memory)
+
+        self.btn_split = ToolButton(FluentIcon.LAYOUT, self)
+        self.btn_split.setToolTip(f"{translator.get('view.split', 'Split View')} (Ctrl+\\)")
+        self.btn_split.clicked.connect(self.toggle_split_view)
+
+        self.btn_type_check = ToolButton(FluentIcon.CERTIFICATE, self)
+        self.btn_type_check.setToolTip(translator.get('typecheck.title', 'Type Check'))
+        self.btn_type_check.clicked.connect(self.toggle_type_check_panel)
+
+        self.btn_open_folder = ToolButton(FluentIcon.FOLDER_ADD, self)
+        self.btn_open_folder.setToolTip(translator.get('workspace.open', 'Open Folder'))
+        self.btn_open_folder.clicked.connect(self.open_folder_dialog)
+
+        self.btn_explorer = ToolButton(FluentIcon.LIBRARY, self)
+        self.btn_explorer.setToolTip(translator.get('explorer.title', 'Files'))
+        self.btn_explorer.clicked.connect(self.toggle_explorer)
+
+        self.btn_outline = ToolButton(FluentIcon.ALIGNMENT, self)
+        self.btn_outline.setToolTip(translator.get('outline.title', 'Outline'))
+        self.btn_outline.clicked.connect(self.toggle_outline)
+
+        self.btn_search = ToolButton(FluentIcon.SEARCH, self)
+        self.btn_search.setToolTip(f"{translator.get('search.title', 'Search')} (Ctrl+Shift+F)")
+        self.btn_search.clicked.connect(self.show_search_panel)
         
         self.toolbar_layout.addWidget(self.btn_new)
         self.toolbar_layout.addWidget(self.btn_open)
+        self.toolbar_layout.addWidget(self.btn_open_folder)
         self.toolbar_layout.addWidget(self.btn_save)
+        self.toolbar_layout.addWidget(self.btn_history)
+        self.toolbar_layout.addWidget(self.btn_memory)
         
         separator = QFrame()
         separator.setFrameShape(QFrame.Shape.VLine)
@@ -351,6 +566,11 @@ class MainWindow(FluentWindow):
         
         self.toolbar_layout.addWidget(self.btn_run)
         self.toolbar_layout.addWidget(self.btn_toggle_terminal)
+        self.toolbar_layout.addWidget(self.btn_explorer)
+        self.toolbar_layout.addWidget(self.btn_split)
+        self.toolbar_layout.addWidget(self.btn_type_check)
+        self.toolbar_layout.addWidget(self.btn_outline)
+        self.toolbar_layout.addWidget(self.btn_search)
         self.toolbar_layout.addStretch(1)
         
         self.central_layout.addLayout(self.toolbar_layout)
@@ -364,13 +584,256 @@ class MainWindow(FluentWindow):
             # 如果没有焦点，给予焦点
             self.terminal.setFocus()
 
-    def update_editor_settings(self):
-        """更新所有打开的编辑器和终端的设置"""
-        # 更新所有编辑器标签页
+    def toggle_split_view(self):
+        """显示或隐藏分屏视图，例如同时查看长文件的开头和结尾"""
+        if self.split_view.isVisible():
+            self.split_view.hide()
+            # 不再引用标签页的文档，关闭标签页后文档可以被释放
+            self.split_view.release_document()
+        else:
+            self.split_view.show()
+            self.sync_split_view()
+
+    def toggle_type_check_panel(self):
+        """打开类型检查面板并检查已打开的 Python 文件；面板已是当前标签页时关闭它"""
+        self.ensure_terminal_created()
+        if self.type_check_panel is None:
+            from src.ui.type_check_panel import TypeCheckPanel
+            self.type_check_panel = TypeCheckPanel(self)
+            self.type_check_panel.files_provider = self.type_check_files
+            self.type_check_panel.openRequested.connect(self.open_location)
+            self.tool_panels.append(self.type_check_panel)
+        index = self.terminal_container.stackedWidget.indexOf(self.type_check_panel)
+        if index != -1 and self.terminal_container.isVisible() and self.terminal_container.currentIndex() == index:
+            self.close_type_check_panel()
+            return
+        self.show_tool_panel(self.type_check_panel, translator.get('typecheck.title', 'Type Check'))
+        if not type_check_service.enabled:
+            type_check_service.enabled = True
+            type_check_service.check(self.type_check_files())
+
+    def close_type_check_panel(self):
+        """关闭面板时停止守护进程并清除标记"""
+        self.hide_tool_panel(self.type_check_panel)
+        type_check_service.enabled = False
+        type_check_service.stop()
+        self.type_diagnostics = {}
         for i in range(self.editor_tabs.count()):
             editor = self.editor_tabs.widget(i)
             if isinstance(editor, CodeEditor):
-                editor.update_preferences()
+                editor.set_type_diagnostics([])
+
+    def type_check_files(self):
+        """已保存的 Python 文件都加入检查"""
+        return [path for path in (self.editor_tabs.tabToolTip(i) for i in range(self.editor_tabs.count())) if path]
+
+    def on_type_check_finished(self, diagnostics, error, elapsed):
+        """把检查结果分发到已打开的编辑器"""
+        if error or not type_check_service.enabled:
+            return
+        self.type_diagnostics = {}
+        for path, line, column, severity, message in diagnostics:
+            self.type_diagnostics.setdefault(document_registry.key(path), []).append((line, column, severity, message))
+        for i in range(self.editor_tabs.count()):
+            editor = self.editor_tabs.widget(i)
+            file_path = self.editor_tabs.tabToolTip(i)
+            if isinstance(editor, CodeEditor) and file_path:
+                editor.set_type_diagnostics(self.type_diagnostics.get(document_registry.key(file_path), []))
+
+    def show_tool_panel(self, panel, title):
+        """在终端区域显示面板并切换到它"""
+        self.ensure_terminal_created()
+        index = self.terminal_container.stackedWidget.indexOf(panel)
+        if index == -1:
+            index = self.terminal_container.addTab(panel, title)
+            self.update_tab_widths()
+        self.terminal_container.show()
+        self.terminal_container.setCurrentIndex(index)
+
+    def hide_tool_panel(self, panel):
+        index = self.terminal_container.stackedWidget.indexOf(panel)
+        if index != -1:
+            self.terminal_container.removeTab(index)
+            # removeTab 不删除页面，留着下次打开时复用
+            panel.hide()
+            self.update_tab_widths()
+
+    def open_location(self, file_path, line, column):
+        """打开文件并跳转到指定位置；file_path 为空时在当前标签页中跳转"""
+        if file_path:
+            self.open_file(file_path)
+        editor = self.editor_tabs.currentWidget()
+        if isinstance(editor, CodeEditor):
+            editor.setCursorPosition(line, column)
+            editor.ensureLineVisible(line)
+            editor.setFocus()
+
+    def open_folder_dialog(self):
+        path = QFileDialog.getExistingDirectory(self, translator.get('workspace.open', 'Open Folder'), workspace.root)
+        if path:
+            workspace.open(path)
+
+    def on_workspace_changed(self, root):
+        symbol_index.open(root)
+        self.file_explorer.set_root(root or os.path.expanduser('~'))
+        self.refresh_outline()
+
+    def update_side_panel(self):
+        """左侧的文件浏览器和大纲都隐藏时隐藏整个侧栏"""
+        self.side_splitter.setVisible(not self.file_explorer.isHidden() or not self.outline_panel.isHidden())
+
+    def toggle_explorer(self):
+        from src.config import config
+        visible = self.file_explorer.isHidden()
+        self.file_explorer.setVisible(visible)
+        config.set('show_explorer', visible)
+        self.update_side_panel()
+
+    def toggle_outline(self):
+        self.outline_panel.setVisible(self.outline_panel.isHidden())
+        self.update_side_panel()
+        self.refresh_outline()
+
+    def current_file(self):
+        """当前标签页的编辑器和文件路径（未命名时为空）"""
+        index = self.editor_tabs.currentIndex()
+        editor = self.editor_tabs.widget(index)
+        if not isinstance(editor, CodeEditor) or editor.loader is not None:
+            return None, ""
+        return editor, self.editor_tabs.tabToolTip(index)
+
+    def buffer_symbols(self, editor, file_path):
+        """未保存的修改或不在索引中的文件直接解析缓冲区；返回 None 表示以索引为准"""
+        if file_path and not editor.isModified() and symbol_index.is_indexed(file_path):
+            return None
+        if editor.length() > MAX_BUFFER_PARSE or not lintable(file_path):
+            return None
+        return collect(editor.get_text())
+
+    def refresh_outline(self):
+        if not self.outline_panel.isVisible():
+            return
+        editor, file_path = self.current_file()
+        if editor is None:
+            self.outline_panel.set_symbols([])
+            return
+        parsed = self.buffer_symbols(editor, file_path)
+        if parsed is not None:
+            self.outline_panel.set_symbols(sorted(parsed[0], key=lambda symbol: symbol[2]))
+        elif file_path:
+            self.outline_panel.set_symbols(symbol_index.outline(file_path))
+
+    def on_symbols_updated(self, paths):
+        _, file_path = self.current_file()
+        if file_path and os.path.abspath(file_path) in paths:
+            self.refresh_outline()
+
+    def word_at_cursor(self, editor):
+        line, index = editor.getCursorPosition()
+        return editor.wordAtLineIndex(line, index)
+
+    def go_to_definition(self):
+        """转到光标处名称的定义；有多个候选时在位置列表中列出"""
+        editor, file_path = self.current_file()
+        if editor is None:
+            return
+        name = self.word_at_cursor(editor)
+        if not name:
+            return
+        parsed = self.buffer_symbols(editor, file_path)
+        locations = []
+        if parsed is not None:
+            # 当前缓冲区中的定义优先，且以缓冲区内容为准
+            locations = [(file_path, line, column) for symbol, _, line, column, _ in parsed[0] if symbol == name]
+        key = document_registry.key(file_path) if file_path else None
+        for path, line, column, _, _ in symbol_index.definitions(name, file_path):
+            if parsed is None or document_registry.key(path) != key:
+                locations.append((path, line, column))
+        if not locations:
+            InfoBar.warning(
+                title=translator.get("symbols.definition", "Go to Definition"),
+                content=translator.get("symbols.not_found", "No definition found for '{}'.").format(name),
+                parent=self
+            )
+            return
+        if len(locations) > 1:
+            self.show_locations(translator.get("symbols.definitions_of", "Definitions of '{}': {}").format(name, len(locations)), locations)
+        self.open_location(*locations[0])
+
+    def find_references(self):
+        """在当前文件夹的索引中查找光标处名称的所有出现位置"""
+        editor, file_path = self.current_file()
+        if editor is None:
+            return
+        name = self.word_at_cursor(editor)
+        if not name:
+            return
+        locations = symbol_index.references(name)
+        parsed = self.buffer_symbols(editor, file_path)
+        if parsed is not None:
+            key = document_registry.key(file_path) if file_path else None
+            locations = [location for location in locations if document_registry.key(location[0]) != key]
+            if file_path:
+                buffer_locations = {(line, column) for symbol, _, line, column, _ in parsed[0] if symbol == name}
+                buffer_locations.update((line, column) for symbol, line, column in parsed[1] if symbol == name)
+                locations = [(file_path, line, column) for line, column in sorted(buffer_locations)] + locations
+        self.show_locations(translator.get("symbols.references_of", "References to '{}': {}").format(name, len(locations)), locations)
+
+    def show_locations(self, status, locations):
+        if self.location_panel is None:
+            from src.ui.location_panel import LocationPanel
+            self.location_panel = LocationPanel(self)
+            self.location_panel.openRequested.connect(self.open_location)
+            self.tool_panels.append(self.location_panel)
+        self.location_panel.set_locations(status, locations, workspace.root)
+        self.show_tool_panel(self.location_panel, translator.get('symbols.locations', 'Locations'))
+
+    def show_search_panel(self):
+        """在文件中查找，以编辑器中选中的文本作为查找内容"""
+        if self.search_panel is None:
+            from src.ui.search_panel import SearchPanel
+            self.search_panel = SearchPanel(self)
+            self.search_panel.openRequested.connect(self.open_location)
+            self.tool_panels.append(self.search_panel)
+        self.show_tool_panel(self.search_panel, translator.get('search.title', 'Search'))
+        editor, _ = self.current_file()
+        self.search_panel.open_panel(editor.selectedText() if editor is not None else "")
+
+    def show_quick_open(self):
+        """模糊匹配当前文件夹中的文件和最近打开的文件，选中后打开"""
+        from src.config import config
+        if self.quick_open is None:
+            from src.ui.quick_open import QuickOpenPalette
+            self.quick_open = QuickOpenPalette(self)
+            self.quick_open.fileOpenRequested.connect(self.open_file)
+        self.quick_open.open_palette(workspace.root, config.get('recent_files', []))
+
+    def add_recent_file(self, file_path):
+        from src.config import config
+        from src.core.quick_open import MAX_RECENT_FILES
+        file_path = os.path.abspath(file_path)
+        recent = [path for path in config.get('recent_files', []) if path != file_path]
+        config.set('recent_files', [file_path] + recent[:MAX_RECENT_FILES - 1])
+
+    def sync_split_view(self):
+        """让分屏视图显示当前标签页的文档（两个视图共用一份文本，编辑立即同步）"""
+        if not self.split_view.isVisible():
+            return
+        self.split_view.ensure_theme()
+        editor = self.editor_tabs.currentWidget()
+        if isinstance(editor, CodeEditor) and editor.loader is None:
+            self.split_view.share_document(editor)
+        else:
+            self.split_view.release_document()
+
+    def update_editor_settings(self):
+        """更新所有打开的编辑器和终端的设置"""
+        # 只立即更新可见的编辑器，其余标签页在切换到时再更新（on_editor_tab_changed）
+        if self.split_view.isVisible():
+            self.split_view.update_preferences()
+        editor = self.editor_tabs.currentWidget()
+        if isinstance(editor, CodeEditor):
+            editor.update_preferences()
         
         # 更新所有终端标签页
         for i in range(self.terminal_container.count()):
@@ -399,6 +862,7 @@ class MainWindow(FluentWindow):
 
         index = self.editor_tabs.addTab(editor, name)
         self.editor_tabs.setCurrentIndex(index)
+        recovery_journal.attach(editor, name)
         # 此时没有 toolTip (没有文件路径)，save_current_file 会处理这种情况
         # 更新标签页宽度
         self.update_tab_widths()
@@ -415,17 +879,17 @@ class MainWindow(FluentWindow):
             return
 
         # 检查是否已打开
-        for i in range(self.editor_tabs.count()):
-            if self.editor_tabs.tabToolTip(i) == file_path:
-                self.editor_tabs.setCurrentIndex(i)
-                return
+        page = document_registry.page(file_path)
+        if page is not None:
+            self.editor_tabs.setCurrentWidget(page)
+            self.add_recent_file(file_path)
+            return
 
-        # 先读取文件内容
+        # 先读取文件内容；超过阈值的大文件在后台分块加载
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            size, content = self.read_file(file_path)
         except Exception as e:
-            self.terminal.append(f"Error opening file: {e}")
+            self.terminal.append_output(f"Error opening file: {e}\n")
             return
 
         # 检查是否应该复用当前标签页（如果是未命名且为空）
@@ -443,21 +907,321 @@ class MainWindow(FluentWindow):
         # 如果复用为真，使用当前标签页，否则添加新标签页
         if reuse:
             editor = self.editor_tabs.widget(current_index)
-            editor.set_text(content)
+            self.fill_editor(editor, file_path, size, content)
             self.editor_tabs.setTabText(current_index, os.path.basename(file_path))
             self.editor_tabs.setTabToolTip(current_index, file_path)
+            document_registry.register(file_path, editor)
+            recovery_journal.set_meta(editor, os.path.basename(file_path), file_path)
+            recovery_journal.mark_clean(editor)
             # 确保复用的标签页是当前标签页（应该已经是了）
             self.editor_tabs.setCurrentIndex(current_index)
         else:
             # 创建新编辑器
             editor = CodeEditor()
-            editor.set_text(content)
+            self.fill_editor(editor, file_path, size, content)
             index = self.editor_tabs.addTab(editor, os.path.basename(file_path))
             self.editor_tabs.setTabToolTip(index, file_path)
+            document_registry.register(file_path, editor)
             self.editor_tabs.setCurrentIndex(index)
+            recovery_journal.attach(editor, os.path.basename(file_path), file_path)
+        self.add_recent_file(file_path)
         # 更新标签页宽度
         self.update_tab_widths()
 
+    def save_session(self):
+        """记录打开的文件及各自的光标、滚动位置，下次启动时恢复"""
+        from src.config import config
+        if not config.get('restore_session', True) or not hasattr(self, 'editor_tabs'):
+            return
+        files = []
+        current = 0
+        for i in range(self.editor_tabs.count()):
+            file_path = self.editor_tabs.tabToolTip(i)
+            widget = self.editor_tabs.widget(i)
+            if not file_path or not isinstance(widget, (CodeEditor, EditorPlaceholder)):
+                continue
+            if i == self.editor_tabs.currentIndex():
+                current = len(files)
+            files.append({'path': file_path, **widget.view_state()})
+        config.set('session', {'files': files, 'current': current})
+
+    def restore_session(self):
+        """恢复上次打开的文件；标签页先以占位页的形式出现，激活时才读取文件和创建编辑器
+
+        返回是否恢复了至少一个标签页。
+        """
+        from src.config import config
+        if not config.get('restore_session', True):
+            return False
+        session = config.get('session') or {}
+        entries = [entry for entry in session.get('files', []) if os.path.isfile(entry.get('path', ''))]
+        if not entries:
+            return False
+        # 添加标签页时不创建编辑器，最后只激活当前的一个
+        self._hold_placeholders = True
+        for entry in entries:
+            state = {key: entry[key] for key in ('line', 'index', 'first_line') if key in entry}
+            placeholder = EditorPlaceholder(entry['path'], state)
+            index = self.editor_tabs.addTab(placeholder, os.path.basename(entry['path']))
+            self.editor_tabs.setTabToolTip(index, entry['path'])
+            document_registry.register(entry['path'], placeholder)
+        self._hold_placeholders = False
+        current = min(max(session.get('current', 0), 0), len(entries) - 1)
+        self.editor_tabs.setCurrentIndex(current)
+        self.materialize_tab(current)
+        self.update_tab_widths()
+        return True
+
+    def on_editor_tab_changed(self, index):
+        if self._hold_placeholders:
+            return
+        # 记录离开上一个标签页的时间，用于判断是否空闲
+        if self._active_page is not None:
+            self._active_page.last_active = time.monotonic()
+        self.materialize_tab(index)
+        self._active_page = self.editor_tabs.widget(index)
+        if isinstance(self._active_page, CodeEditor):
+            self._active_page.ensure_theme()
+        self.sync_split_view()
+        self.refresh_outline()
+
+    def _replace_page(self, index, widget):
+        """直接替换页面栈中的页面，标签本身保持不变；替换过程中当前页会短暂变化"""
+        stack = self.editor_tabs.stackedWidget
+        old = stack.widget(index)
+        was_current = stack.currentIndex() == index
+        widget.setProperty('routeKey', old.property('routeKey'))
+        document_registry.replace(old, widget)
+        self._hold_placeholders = True
+        stack.insertWidget(index, widget)
+        stack.removeWidget(old)
+        if was_current:
+            stack.setCurrentIndex(index)
+            self._active_page = widget
+        self._hold_placeholders = False
+        old.deleteLater()
+
+    def materialize_tab(self, index):
+        """把占位页替换为真正的编辑器（读取文件、语法高亮都在此时才进行）"""
+        placeholder = self.editor_tabs.widget(index)
+        if not isinstance(placeholder, EditorPlaceholder):
+            return
+        if placeholder.hibernated:
+            self.wake_tab(index)
+            return
+        file_path = placeholder.file_path
+        try:
+            size, content = self.read_file(file_path)
+        except Exception as e:
+            if hasattr(self, 'terminal'):
+                self.terminal.append_output(f"Error opening file: {e}\n")
+            self.editor_tabs.removeTab(index)
+            placeholder.deleteLater()
+            return
+        editor = CodeEditor()
+        self.fill_editor(editor, file_path, size, content)
+        self._replace_page(index, editor)
+        editor.restore_view_state(placeholder.view_state())
+        recovery_journal.attach(editor, os.path.basename(file_path), file_path)
+
+    def hibernate_tab(self, index, drop_undo=False):
+        """释放后台标签页的编辑器控件，只保留内容和光标、滚动位置
+
+        有撤销历史时保留文档（撤销历史在其中）；drop_undo 为 True 时，已保存的标签页丢弃撤销历史，只保留压缩后的文本。
+        """
+        editor = self.editor_tabs.widget(index)
+        if not isinstance(editor, CodeEditor) or editor.loader is not None or index == self.editor_tabs.currentIndex():
+            return False
+        placeholder = EditorPlaceholder(self.editor_tabs.tabToolTip(index), editor.view_state())
+        placeholder.size = editor.length()
+        placeholder.read_only_file = editor.read_only_file
+        placeholder.modified = editor.isModified()
+        placeholder.last_active = getattr(editor, 'last_active', time.monotonic())
+        if (editor.isUndoAvailable() or editor.isRedoAvailable()) and not (drop_undo and not placeholder.modified):
+            # Scintilla 无法导出撤销历史，保留文档本身，只释放控件（样式、换行、绘制缓存）
+            placeholder.document = editor.document()
+        else:
+            placeholder.compressed = zlib.compress(bytes(editor.bytes(0, placeholder.size))[:placeholder.size], 1)
+        recovery_journal.rebind(editor, placeholder)
+        lint_service.forget(editor)
+        self._replace_page(index, placeholder)
+        return True
+
+    def wake_tab(self, index):
+        """用休眠时保存的内容重新创建编辑器"""
+        placeholder = self.editor_tabs.widget(index)
+        editor = CodeEditor()
+        editor.read_only_file = placeholder.read_only_file
+        editor.apply_size_limits(placeholder.size)
+        if placeholder.document is not None:
+            # 文档中保留了撤销历史和修改状态
+            editor.setDocument(placeholder.document)
+        else:
+            editor.set_text(zlib.decompress(placeholder.compressed).decode('utf-8'))
+            editor.SendScintilla(editor.SCI_EMPTYUNDOBUFFER)
+            editor.setModified(placeholder.modified)
+        # 休眠时丢弃了检查结果（lint_service.forget），重新显示类型检查结果并重新检查
+        self.set_lint_enabled(editor, placeholder.file_path)
+        editor.set_type_diagnostics(self.type_diagnostics.get(document_registry.key(placeholder.file_path), []))
+        editor.setReadOnly(placeholder.read_only_file)
+        self._replace_page(index, editor)
+        editor.restore_view_state(placeholder.view_state())
+        recovery_journal.rebind(placeholder, editor)
+
+    def hibernate_idle_tabs(self, idle_seconds=None):
+        """休眠超过 tab_hibernate_after 秒未被切换到的标签页（0 表示不休眠）
+
+        已保存的标签页超过 tab_drop_undo_after 秒（0 表示从不）未被切换到时丢弃撤销历史，只保留压缩后的文本。
+        """
+        from src.config import config
+        if idle_seconds is None:
+            idle_seconds = config.get('tab_hibernate_after', 600)
+            if idle_seconds <= 0:
+                return
+        drop_undo_after = config.get('tab_drop_undo_after', 3600)
+        now = time.monotonic()
+        for i in range(self.editor_tabs.count()):
+            widget = self.editor_tabs.widget(i)
+            if i == self.editor_tabs.currentIndex():
+                continue
+            if isinstance(widget, EditorPlaceholder):
+                if (widget.document is not None and not widget.modified and drop_undo_after > 0
+                        and now - widget.last_active >= drop_undo_after):
+                    widget.compress()
+                continue
+            if not isinstance(widget, CodeEditor):
+                continue
+            if not hasattr(widget, 'last_active'):
+                widget.last_active = now
+            idle = now - widget.last_active
+            if idle >= idle_seconds:
+                self.hibernate_tab(i, drop_undo=drop_undo_after > 0 and idle >= drop_undo_after)
+
+    def show_tab_memory(self):
+        """显示每个标签页估算的内存占用，可以立即休眠所有后台标签页"""
+        from src.ui.tab_memory_dialog import TabMemoryDialog
+        rows = []
+        for i in range(self.editor_tabs.count()):
+            widget = self.editor_tabs.widget(i)
+            if isinstance(widget, CodeEditor):
+                state = "active"
+            elif isinstance(widget, EditorPlaceholder) and widget.document is not None:
+                state = "hibernated_undo"
+            elif isinstance(widget, EditorPlaceholder) and widget.hibernated:
+                state = "hibernated"
+            else:
+                state = "unloaded"
+            rows.append((self.editor_tabs.tabText(i), state, widget.memory_usage()))
+        dialog = TabMemoryDialog(rows, self)
+        if dialog.exec():
+            self.hibernate_idle_tabs(idle_seconds=0)
+
+    def read_file(self, file_path):
+        """返回 (文件大小, 内容)；超过大文件阈值时内容为 None，由 fill_editor 在后台加载"""
+        from src.config import config
+        size = os.path.getsize(file_path)
+        if size > config.get('large_file_threshold', 5 * 1024 * 1024):
+            return size, None
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return size, f.read()
+
+    def fill_editor(self, editor, file_path, size, content):
+        editor.apply_size_limits(size)
+        self.set_lint_enabled(editor, file_path)
+        if content is None:
+            self.load_file_async(editor, file_path)
+        else:
+            editor.set_text(content)
+            editor.set_type_diagnostics(self.type_diagnostics.get(document_registry.key(file_path), []))
+
+    def set_lint_enabled(self, editor, file_path):
+        """只检查 Python 文件；复用或另存为其他类型时清除已有标记"""
+        editor.lint_enabled = lintable(file_path)
+        if editor.lint_enabled:
+            editor.schedule_lint()
+        else:
+            editor.clear_diagnostics()
+
+    def load_file_async(self, editor, file_path):
+        """在后台线程中分块加载大文件，编辑器显示加载进度"""
+        from src.config import config
+        from src.core.file_loader import FileLoadWorker
+        # 可选：按原样读取字节并只读打开
+        read_only = config.get('large_file_readonly', False)
+        editor.read_only_file = read_only
+        worker = FileLoadWorker(file_path, read_only, editor)
+        editor.begin_loading(worker)
+        worker.finished.connect(lambda success, error: self.on_file_loaded(editor, success, error))
+        worker.start()
+
+    def on_file_loaded(self, editor, success, error):
+        if success:
+            recovery_journal.mark_clean(editor)
+            # 加载期间分屏视图不显示该文档，完成后再同步
+            self.sync_split_view()
+            return
+        self.terminal.append_output(f"Error opening file: {error}\n")
+        # 加载失败时关闭对应的标签页
+        for i in range(self.editor_tabs.count()):
+            if self.editor_tabs.widget(i) is editor:
+                self.close_tab(i)
+                break
+
+    def restore_unsaved_buffers(self):
+        """询问是否恢复上次异常退出时未保存的内容"""
+        entries = recovery_journal.recoverable()
+        if not entries:
+            return
+        from qfluentwidgets import MessageBox
+        box = MessageBox(
+            translator.get("recovery.title", "Restore Unsaved Work"),
+            translator.get("recovery.content", "{} unsaved buffer(s) from the last session were found. Restore them?").format(len(entries)),
+            self
+        )
+        restore = box.exec()
+        for journal_path, meta, text in entries:
+            recovery_journal.discard(journal_path)
+            if not restore:
+                continue
+            if self.restore_into_open_tab(meta.get('path', ''), text):
+                continue
+            editor = CodeEditor()
+            editor.lint_enabled = lintable(meta.get('path', ''))
+            editor.set_text(text)
+            title = meta.get('title') or translator.get("editor.untitled", "Untitled")
+            index = self.editor_tabs.addTab(editor, title)
+            if meta.get('path'):
+                self.editor_tabs.setTabToolTip(index, meta['path'])
+                if document_registry.page(meta['path']) is None:
+                    document_registry.register(meta['path'], editor)
+            self.editor_tabs.setCurrentIndex(index)
+            # 恢复的内容仍未保存，继续记录
+            recovery_journal.attach(editor, title, meta.get('path', ''), dirty=True)
+        self.update_tab_widths()
+
+    def restore_into_open_tab(self, file_path, text):
+        """文件已在标签页中打开（恢复会话时的占位页）时，把恢复的内容放入该标签页，而不是再打开一个
+
+        返回是否已放入。
+        """
+        page = document_registry.page(file_path) if file_path else None
+        if page is None:
+            return False
+        index = self.editor_tabs.stackedWidget.indexOf(page)
+        if isinstance(page, EditorPlaceholder):
+            self.materialize_tab(index)
+            page = self.editor_tabs.widget(index)
+        if not isinstance(page, CodeEditor) or page.loader is not None:
+            # 仍在后台加载的大文件：另开一个标签页显示恢复的内容
+            return False
+        # 整体替换而不是 setText：保留撤销历史，可以撤销回磁盘上的内容；修改由日志继续记录
+        page.selectAll()
+        page.replaceSelectedText(text)
+        page.setCursorPosition(0, 0)
+        page.setModified(True)
+        self.editor_tabs.setCurrentIndex(index)
+        return True
+
     def save_current_file(self):
         self.ensure_terminal_created()
         index = self.editor_tabs.currentIndex()
@@ -467,6 +1231,11 @@ class MainWindow(FluentWindow):
         editor = self.editor_tabs.widget(index)
         file_path = self.editor_tabs.tabToolTip(index)
 
+        if editor.read_only_file or editor.loader is not None:
+            # 只读打开或仍在加载的大文件不能保存
+            self.terminal.append_output(f"{translator.get('file.read_only', 'File is read-only')}: {file_path}\n")
+            return
+
         if not file_path:
             # 另存为
             file_filter = translator.get('file.python_files', 'Python Files (*.py)')
@@ -475,25 +1244,74 @@ class MainWindow(FluentWindow):
                 return
             self.editor_tabs.setTabText(index, os.path.basename(file_path))
             self.editor_tabs.setTabToolTip(index, file_path)
+            document_registry.register(file_path, editor)
+            recovery_journal.set_meta(editor, os.path.basename(file_path), file_path)
+            self.set_lint_enabled(editor, file_path)
             # 更新标签页宽度
             self.update_tab_widths()
 
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(editor.get_text())
-            self.terminal.append(f"{translator.get('file.saved', 'Saved')}: {file_path}")
-        except Exception as e:
-            self.terminal.append(f"{translator.get('file.save_error', 'Error saving file')}: {e}")
+        # 界面线程只取文本快照，写入在后台线程中完成
+        # 同时记下恢复日志的修改计数，保存完成时据此判断内容是否仍是最新的
+        save_service.save(file_path, editor.get_text(), (editor, recovery_journal.seq(editor)))
+
+    def on_file_saved(self, owner, file_path, success, error, elapsed):
+        """后台保存完成，报告结果和耗时"""
+        editor, seq = owner
+        editor.save_latency = elapsed
+        if success:
+            recovery_journal.mark_clean(editor, seq)
+            if type_check_service.enabled:
+                # 守护进程只重新检查改动的部分
+                type_check_service.check([file_path])
+            symbol_index.update_file(file_path)
+            # 目录监视器不报告文件内容的变化
+            file_cache.invalidate(file_path)
+            self.terminal.append_output(f"{translator.get('file.saved', 'Saved')}: {file_path} ({elapsed * 1000:.0f} ms)\n")
+        else:
+            self.terminal.append_output(f"{translator.get('file.save_error', 'Error saving file')}: {error}\n")
+
+    def show_local_history(self):
+        """查看当前文件的保存历史，可以与当前内容对比并恢复某个版本"""
+        index = self.editor_tabs.currentIndex()
+        if index == -1:
+            return
+        editor = self.editor_tabs.widget(index)
+        file_path = self.editor_tabs.tabToolTip(index)
+        if not file_path:
+            InfoBar.warning(
+                title=translator.get("history.title", "Local History"),
+                content=translator.get("history.unsaved", "Save the file first to start its history."),
+                parent=self
+            )
+            return
+        from src.ui.history_dialog import HistoryDialog
+        dialog = HistoryDialog(file_path, editor.get_text(), self)
+        if dialog.exec() and dialog.selected_text is not None:
+            # 作为一次普通编辑替换全文，可以撤销
+            editor.beginUndoAction()
+            editor.selectAll()
+            editor.replaceSelectedText(dialog.selected_text)
+            editor.endUndoAction()
 
     def close_tab(self, index):
+        widget = self.editor_tabs.widget(index)
+        if isinstance(widget, CodeEditor):
+            widget.cancel_loading()
+            lint_service.forget(widget)
+        recovery_journal.detach(widget)
+        document_registry.unregister(widget)
         self.editor_tabs.removeTab(index)
+        # 立即销毁页面及其文档，长时间使用时内存不会不断增长
+        if self._active_page is widget:
+            self._active_page = None
+        widget.deleteLater()
 
     def run_current_script(self):
         try:
             self.ensure_terminal_created()
             index = self.editor_tabs.currentIndex()
             if index == -1:
-                self.terminal.append(translator.get("run.no_file", "No file open to run."))
+                self.terminal.append_output(translator.get("run.no_file", "No file open to run.") + "\n")
                 return
                 
             # 获取编辑器内容
@@ -532,7 +1350,7 @@ class MainWindow(FluentWindow):
                         script_path_to_run = temp.name
                         is_temp = True
                     except Exception as e2:
-                        self.terminal.append(f"Error creating temp file: {e2}")
+                        self.terminal.append_output(f"Error creating temp file: {e2}\n")
                         return
             else:
                 # 未保存的文件
@@ -543,7 +1361,7 @@ class MainWindow(FluentWindow):
                     script_path_to_run = temp.name
                     is_temp = True
                 except Exception as e:
-                    self.terminal.append(f"Error creating temp file: {e}")
+                    self.terminal.append_output(f"Error creating temp file: {e}\n")
                     return
 
             self.terminal.stop_interpreter() # 停止当前的 REPL 进程
@@ -558,7 +1376,7 @@ class MainWindow(FluentWindow):
             from src.core.interpreter import InterpreterManager
             interpreter = InterpreterManager.get_interpreter()
             if not interpreter:
-                 self.terminal.append("Error: No Python interpreter configured.")
+                 self.terminal.append_output("Error: No Python interpreter configured.\n")
                  return
                  
             # 如果已经有进程在运行，先停止它
@@ -604,9 +1422,11 @@ class MainWindow(FluentWindow):
             print(f"CRASH IN RUN: {crash_err}")
             traceback.print_exc()
             if hasattr(self, 'terminal'):
-                self.terminal.append(f"Critical error: {crash_err}")
+                self.terminal.append_output(f"Critical error: {crash_err}\n")
 
     def process_finished(self, process, temp_path=None):
+        # 先补读限流期间留在进程缓冲中的输出，再显示退出码
+        self.terminal.release_flow()
         try:
             # 检查 C++ 对象是否还存在
             if process:
@@ -631,6 +1451,22 @@ class MainWindow(FluentWindow):
 
     def closeEvent(self, event):
         """窗口关闭时停止正在运行的进程"""
+        self.save_session()
+        # 等待尚未写完的保存和恢复日志
+        save_service.wait()
+        recovery_journal.shutdown()
+        lint_service.shutdown()
+        type_check_service.shutdown()
+        symbol_index.close()
+        file_search.shutdown()
+        self.file_explorer.shutdown()
+        if self.quick_open is not None:
+            self.quick_open.shutdown()
+        from src.ui.shell import BaseShell
+        for i in range(self.terminal_container.count()):
+            widget = self.terminal_container.widget(i)
+            if isinstance(widget, BaseShell):
+                widget.shutdown()
         if self.process and self.process.state() != QProcess.ProcessState.NotRunning:
             try:
                 self.process.terminate()
@@ -642,30 +1478,9 @@ class MainWindow(FluentWindow):
         super().closeEvent(event)
 
     def handle_stdout(self):
-        # 优化：批量读取，减少 GUI 刷新频率，缓解卡顿
-        data = self.process.readAllStandardOutput()
-        if data.isEmpty():
-            return
-            
-        try:
-            # 优先使用 utf-8 
-            stdout = bytes(data).decode("utf-8")
-        except UnicodeDecodeError:
-            # 备选使用 cp936 (GBK)
-            stdout = bytes(data).decode("cp936", errors="ignore")
-        
-        self.terminal.append_output(stdout)
+        # 由终端批量读取并按流增量解码；输出积压过多时终端会暂停读取（限流）
+        self.terminal.read_process_output(self.process, 'stdout')
 
     def handle_stderr(self):
-        data = self.process.readAllStandardError()
-        if data.isEmpty():
-            return
-            
-        try:
-            # 优先使用 utf-8
-            stderr = bytes(data).decode("utf-8")
-        except UnicodeDecodeError:
-            # 备选使用 cp936 (GBK)
-            stderr = bytes(data).decode("cp936", errors="ignore")
-        
-        self.terminal.append_output(stderr)
\ No newline at end of file
+        # stderr 单独解码并以错误颜色显示
+        self.terminal.read_process_output(self.process, 'stderr')
\ No newline at end of file
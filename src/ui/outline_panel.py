@@ -0,0 +1,56 @@
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTreeWidgetItem
+from PyQt6.QtCore import Qt, pyqtSignal
+from qfluentwidgets import BodyLabel, TreeWidget
+from src.core.translator import translator
+
+# 大纲中各类符号的前缀
+KIND_PREFIX = {'class': 'C', 'function': 'f', 'method': 'm', 'variable': 'v'}
+
+
+class OutlinePanel(QWidget):
+    """大纲面板：按嵌套关系显示当前文件的类、函数和模块级变量，单击跳转"""
+    lineRequested = pyqtSignal(int, int) # 行, 列
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 4, 4, 4)
+        self.status_label = BodyLabel(self)
+        layout.addWidget(self.status_label)
+        self.tree = TreeWidget(self)
+        self.tree.setHeaderHidden(True)
+        self.tree.itemClicked.connect(self.open_item)
+        layout.addWidget(self.tree)
+        self.update_texts()
+
+    def update_texts(self):
+        self.status_label.setText(translator.get("outline.title", "Outline"))
+
+    def set_progress(self, done, total):
+        if done < total:
+            self.status_label.setText(translator.get("outline.indexing", "Indexing {}/{}").format(done, total))
+        else:
+            self.update_texts()
+
+    def set_symbols(self, symbols):
+        """symbols 为按行排序的 [(名称, 类型, 行, 列, 所在的类或函数)]"""
+        self.tree.clear()
+        parents = {} # 完整名称 -> 节点
+        for name, kind, line, column, container in symbols:
+            parent = parents.get(container)
+            if container and parent is None:
+                # 函数内部的定义不单独显示
+                continue
+            item = QTreeWidgetItem([f"{KIND_PREFIX.get(kind, '?')}  {name}"])
+            item.setData(0, Qt.ItemDataRole.UserRole, (line, column))
+            if parent is None:
+                self.tree.addTopLevelItem(item)
+            else:
+                parent.addChild(item)
+            if kind == 'class':
+                parents[f"{container}.{name}" if container else name] = item
+        self.tree.expandAll()
+
+    def open_item(self, item):
+        line, column = item.data(0, Qt.ItemDataRole.UserRole)
+        self.lineRequested.emit(line, column)
@@ -0,0 +1,129 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter
+from PyQt6.QtWidgets import QAbstractScrollArea
+from qfluentwidgets import MessageBoxBase, SubtitleLabel
+from src.config import config
+from src.core.translator import translator
+
+# 单行最多绘制的字符数，超长行只影响水平滚动范围
+MAX_PAINT_CHARS = 4096
+
+
+class OutputLogView(QAbstractScrollArea):
+    """只读的完整输出视图：前半部分来自磁盘日志，后半部分是终端当前的内容
+
+    只读取并绘制可见的几十行，输出有上亿行时滚动依然流畅。
+    """
+
+    def __init__(self, log, tail_lines, parent=None):
+        super().__init__(parent)
+        self.log = log
+        self.tail_lines = tail_lines
+
+        font_size = config.get('terminal_font_size', config.get('font_size', 12))
+        self.setFont(QFont(config.get('font_family', 'Consolas'), font_size))
+        metrics = QFontMetrics(self.font())
+        self.line_height = metrics.lineSpacing()
+        self.ascent = metrics.ascent()
+        self.char_width = max(1, metrics.horizontalAdvance('M'))
+
+        self.paper = QColor(config.get('theme_color', '#ffffff'))
+        brightness = (self.paper.red() * 299 + self.paper.green() * 587 + self.paper.blue() * 114) / 1000
+        self.ink = QColor("#D4D4D4") if brightness < 128 else QColor("#000000")
+
+        self._max_chars = 0
+        self.highlight = None # (行号, 行内字节偏移, 字节长度)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self._update_scrollbars()
+
+    def line_count(self):
+        return self.log.line_count + len(self.tail_lines)
+
+    def lines(self, first, count):
+        """读取 [first, first + count) 行，跨越日志与当前内容的边界"""
+        result = []
+        log_count = self.log.line_count
+        if first < log_count:
+            result = self.log.read_lines(first, min(count, log_count - first))
+        tail_first = max(0, first - log_count)
+        result.extend(self.tail_lines[tail_first:tail_first + count - len(result)])
+        return result
+
+    def visible_line_count(self):
+        return max(1, self.viewport().height() // self.line_height)
+
+    def scroll_to_line(self, line):
+        """滚动使指定行位于视图顶部附近"""
+        self.verticalScrollBar().setValue(max(0, line - self.visible_line_count() // 3))
+
+    def set_highlight(self, line, column, length):
+        """高亮一处查找结果并滚动到该行"""
+        self.highlight = (line, column, length)
+        self.scroll_to_line(line)
+        self.viewport().update()
+
+    def _update_scrollbars(self):
+        visible = self.visible_line_count()
+        vbar = self.verticalScrollBar()
+        vbar.setRange(0, max(0, self.line_count() - visible))
+        vbar.setPageStep(visible)
+        hbar = self.horizontalScrollBar()
+        hbar.setRange(0, max(0, self._max_chars * self.char_width - self.viewport().width()))
+        hbar.setPageStep(self.viewport().width())
+        hbar.setSingleStep(self.char_width * 4)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), self.paper)
+        painter.setPen(self.ink)
+        painter.setFont(self.font())
+
+        first = self.verticalScrollBar().value()
+        x = -self.horizontalScrollBar().value()
+        widest = self._max_chars
+        for row, text in enumerate(self.lines(first, self.visible_line_count() + 1)):
+            widest = max(widest, min(len(text), MAX_PAINT_CHARS))
+            if self.highlight and self.highlight[0] == first + row:
+                _, column, length = self.highlight
+                # 查找结果以字节偏移表示，换算为字符位置
+                data = text.encode('utf-8')
+                start = len(data[:column].decode('utf-8', errors='ignore'))
+                end = start + len(data[column:column + length].decode('utf-8', errors='ignore'))
+                metrics = painter.fontMetrics()
+                left = x + metrics.horizontalAdvance(text[:start])
+                width = metrics.horizontalAdvance(text[start:end])
+                painter.fillRect(left, row * self.line_height, width, self.line_height, QColor(240, 160, 48, 110))
+            painter.drawText(x, row * self.line_height + self.ascent, text[:MAX_PAINT_CHARS])
+        painter.end()
+
+        if widest != self._max_chars:
+            # 水平滚动范围随看到过的最长行增长
+            self._max_chars = widest
+            self._update_scrollbars()
+
+
+class OutputLogDialog(MessageBoxBase):
+    """查看终端的完整输出（包括已写入磁盘的部分）"""
+
+    def __init__(self, shell, parent=None, highlight=None):
+        super().__init__(parent)
+        self.titleLabel = SubtitleLabel(translator.get("terminal.full_output", "Full Output"), self)
+        self.viewLayout.addWidget(self.titleLabel)
+
+        shell.flush_all_output()
+        # 终端开头从日志读回的行已经在日志中
+        self.view = OutputLogView(shell.output_log, shell.text().split('\n')[shell.logged_lines():], self)
+        self.view.setMinimumSize(900, 450)
+        if highlight:
+            self.view.set_highlight(*highlight)
+        else:
+            self.view.verticalScrollBar().setValue(self.view.verticalScrollBar().maximum())
+        self.viewLayout.addWidget(self.view)
+
+        self.yesButton.hide()
+        self.cancelButton.setText(translator.get("terminal.close", "Close"))
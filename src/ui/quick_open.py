@@ -0,0 +1,147 @@
+import os
+from PyQt6.QtCore import Qt, QEvent, pyqtSignal
+from PyQt6.QtWidgets import QFrame, QVBoxLayout, QListWidgetItem, QApplication
+from qfluentwidgets import LineEdit, ListWidget, CaptionLabel, isDarkTheme
+from src.core.quick_open import QuickOpenMatcher
+from src.core.translator import translator
+
+
+class QuickOpenPalette(QFrame):
+    """快速打开（Ctrl+P）：浮在窗口上方，输入时模糊匹配当前文件夹中的文件和最近打开的文件
+
+    匹配在后台线程中进行，连续输入时只处理最新的查找内容；过期的结果直接丢弃。
+    """
+    fileOpenRequested = pyqtSignal(str)
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setObjectName("quickOpen")
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+        layout.setSpacing(4)
+
+        self.search_edit = LineEdit(self)
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.request_match)
+        self.search_edit.installEventFilter(self)
+        layout.addWidget(self.search_edit)
+
+        self.list = ListWidget(self)
+        self.list.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.list.itemClicked.connect(self.open_item)
+        layout.addWidget(self.list)
+
+        self.status_label = CaptionLabel("", self)
+        layout.addWidget(self.status_label)
+
+        self.matcher = QuickOpenMatcher(self)
+        self.matcher.matched.connect(self.on_matched)
+        self.matcher.indexed.connect(self.on_indexed)
+        self.root = ""
+        self.recent = []
+        self._previous_focus = None
+        QApplication.instance().focusChanged.connect(self.on_focus_changed)
+        self.hide()
+
+    def open_palette(self, root, recent):
+        """显示面板；root 为当前文件夹（可以为空），recent 为最近打开的文件（最近的在前）"""
+        if root != self.root or not root:
+            self.status_label.setText("" if root else translator.get("search.no_folder", "Open a folder to search in it."))
+        self.root = root
+        self.recent = recent
+        self._previous_focus = QApplication.focusWidget()
+        self.search_edit.setPlaceholderText(translator.get("quick_open.placeholder", "Search files by name"))
+        self.setStyleSheet(f"""
+            #quickOpen {{
+                background-color: {'rgba(43, 43, 43, 0.98)' if isDarkTheme() else 'rgba(243, 243, 243, 0.98)'};
+                border: 1px solid rgba(0, 0, 0, 0.18);
+                border-radius: 8px;
+            }}
+        """)
+        self.reposition()
+        self.show()
+        self.raise_()
+        self.search_edit.setFocus()
+        self.search_edit.selectAll()
+        self.request_match()
+        # 先用现有的索引显示结果，再在后台重新遍历文件夹（只重新列出有变化的目录）
+        self.matcher.refresh(root)
+
+    def close_palette(self, restore_focus=True):
+        self.hide()
+        if restore_focus and self._previous_focus is not None:
+            try:
+                self._previous_focus.setFocus()
+            except RuntimeError:
+                pass
+        self._previous_focus = None
+
+    def reposition(self):
+        window = self.parentWidget()
+        width = min(640, max(320, window.width() - 80))
+        height = min(420, max(200, window.height() - 120))
+        self.setFixedSize(width, height)
+        self.move((window.width() - width) // 2, 40)
+
+    def request_match(self):
+        self.matcher.match(self.search_edit.text(), self.root, self.recent)
+
+    def on_matched(self, text, results):
+        if text != self.search_edit.text() or not self.isVisible():
+            return
+        self.list.setUpdatesEnabled(False)
+        self.list.clear()
+        recent_text = translator.get("quick_open.recent", "recently opened")
+        for path, shown, is_recent in results:
+            name = os.path.basename(shown)
+            folder = os.path.dirname(shown)
+            label = f"{name}    {folder}" if folder else name
+            if is_recent:
+                label += f"    ({recent_text})"
+            item = QListWidgetItem(label)
+            item.setToolTip(path)
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            self.list.addItem(item)
+        if self.list.count():
+            self.list.setCurrentRow(0)
+        self.list.setUpdatesEnabled(True)
+
+    def on_indexed(self, count):
+        self.status_label.setText(translator.get("quick_open.files", "{} file(s)").format(count))
+
+    def move_selection(self, step):
+        count = self.list.count()
+        if count:
+            row = min(max(self.list.currentRow() + step, 0), count - 1)
+            self.list.setCurrentRow(row)
+
+    def open_item(self, item=None):
+        item = item or self.list.currentItem()
+        if item is None:
+            return
+        path = item.data(Qt.ItemDataRole.UserRole)
+        self.close_palette(restore_focus=False)
+        self.fileOpenRequested.emit(path)
+
+    def eventFilter(self, obj, event):
+        if obj is self.search_edit and event.type() == QEvent.Type.KeyPress:
+            key = event.key()
+            if key == Qt.Key.Key_Escape:
+                self.close_palette()
+                return True
+            if key in (Qt.Key.Key_Enter, Qt.Key.Key_Return):
+                self.open_item()
+                return True
+            steps = {Qt.Key.Key_Down: 1, Qt.Key.Key_Up: -1, Qt.Key.Key_PageDown: 10, Qt.Key.Key_PageUp: -10}
+            if key in steps:
+                self.move_selection(steps[key])
+                return True
+        return super().eventFilter(obj, event)
+
+    def on_focus_changed(self, old, new):
+        # 点击面板以外的地方时关闭
+        if self.isVisible() and new is not None and not self.isAncestorOf(new):
+            self.close_palette(restore_focus=False)
+
+    def shutdown(self):
+        self.matcher.stop()
@@ -0,0 +1,108 @@
+import re
+from PyQt6.QtWidgets import QHBoxLayout
+from PyQt6.QtCore import QTimer
+from qfluentwidgets import LineEdit, TransparentTogglePushButton, TransparentToggleToolButton, FluentIcon
+from src.config import config
+from src.core.file_search import file_search, MAX_RESULTS
+from src.core.workspace import workspace
+from src.core.translator import translator
+from src.ui.location_panel import LocationPanel
+
+
+class SearchPanel(LocationPanel):
+    """在文件中查找：搜索当前文件夹，结果陆续显示，修改查找内容时取消上一次搜索"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        header = QHBoxLayout()
+        header.setSpacing(2)
+
+        self.search_edit = LineEdit(self)
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(lambda: self._search_timer.start())
+        self.search_edit.returnPressed.connect(self.start_search)
+        header.addWidget(self.search_edit, 1)
+
+        self.case_button = TransparentTogglePushButton("Aa", self)
+        self.case_button.setFixedWidth(36)
+        self.case_button.toggled.connect(self.start_search)
+        header.addWidget(self.case_button)
+
+        self.regex_button = TransparentTogglePushButton(".*", self)
+        self.regex_button.setFixedWidth(36)
+        self.regex_button.toggled.connect(self.start_search)
+        header.addWidget(self.regex_button)
+
+        # 三元组索引：重复搜索大的文件夹时只读取可能匹配的文件
+        self.index_button = TransparentToggleToolButton(FluentIcon.SPEED_HIGH, self)
+        self.index_button.setChecked(config.get('search_use_index', True))
+        self.index_button.toggled.connect(self.on_index_toggled)
+        header.addWidget(self.index_button)
+        self.layout().insertLayout(0, header)
+
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(300)
+        self._search_timer.timeout.connect(self.start_search)
+        self.job = None
+        self.update_texts()
+
+    def update_texts(self):
+        self.search_edit.setPlaceholderText(translator.get("search.placeholder", "Find in Files"))
+        self.case_button.setToolTip(translator.get("terminal.find_case", "Match Case"))
+        self.regex_button.setToolTip(translator.get("terminal.find_regex", "Use Regular Expression"))
+        self.index_button.setToolTip(translator.get("search.use_index", "Use Search Index"))
+
+    def open_panel(self, text=""):
+        if text and '\n' not in text:
+            self.search_edit.setText(text)
+        self.search_edit.setFocus()
+        self.search_edit.selectAll()
+
+    def on_index_toggled(self, checked):
+        config.set('search_use_index', checked)
+        self.start_search()
+
+    def _cancel_job(self):
+        if self.job is not None:
+            self.job.resultsFound.disconnect()
+            self.job.completed.disconnect()
+            self.job = None
+        file_search.cancel()
+
+    def start_search(self):
+        self._search_timer.stop()
+        self._cancel_job()
+        self.clear_locations(workspace.root)
+        text = self.search_edit.text()
+        if not text:
+            self.status_label.setText("")
+            return
+        if not workspace.root:
+            self.status_label.setText(translator.get("search.no_folder", "Open a folder to search in it."))
+            return
+        pattern = text if self.regex_button.isChecked() else re.escape(text)
+        flags = 0 if self.case_button.isChecked() else re.IGNORECASE
+        try:
+            re.compile(pattern, flags)
+        except re.error:
+            self.status_label.setText(translator.get("terminal.find_invalid", "Invalid pattern"))
+            return
+        self.status_label.setText(translator.get("search.searching", "Searching..."))
+        self.job = file_search.search(workspace.root, pattern, flags, self.index_button.isChecked())
+        self.job.resultsFound.connect(self.on_results_found)
+        self.job.completed.connect(self.on_search_completed)
+
+    def on_results_found(self, results):
+        self.list.setUpdatesEnabled(False)
+        for path, line, column, length, text in results:
+            self.add_location(path, line, column, text)
+        self.list.setUpdatesEnabled(True)
+        self.status_label.setText(translator.get("search.searching", "Searching...") + f" {self.list.count()}")
+
+    def on_search_completed(self, files, matches, elapsed):
+        status = translator.get("search.results", "{} result(s), {} file(s) searched").format(matches, files)
+        if matches >= MAX_RESULTS:
+            status += " " + translator.get("search.truncated", "(limit reached)")
+        self.status_label.setText(f"{status} ({elapsed:.2f} s)")
+        self.job = None
@@ -1,17 +1,36 @@
 import os, subprocess, platform
+from collections import deque
 from PyQt6.QtWidgets import QWidget
+from qfluentwidgets import MessageBoxBase, SubtitleLabel
 from PyQt6.Qsci import QsciScintilla, QsciLexerPython, QsciLexerBatch
-from PyQt6.QtGui import QColor, QFont, QPainter, QPixmap
-from PyQt6.QtCore import Qt, QProcess, QProcessEnvironment, QEvent
+from PyQt6.QtGui import QColor, QFont
+from PyQt6.QtCore import Qt, QProcess, QProcessEnvironment, QEvent, QTimer, QThread, pyqtSignal
 from src.config import config
+from src.ui.background import background_cache
 from src.core.interpreter import InterpreterManager
 from src.core.translator import translator
+from src.core.output_log import OutputLog
+from src.ui.find_bar import FindBar
+from src.core.terminal import OutputRenderer, StreamDecoder, ansi_color_rgb, ANSI_RED, suspend_process, resume_process
 
 # 检测操作系统
 IS_WINDOWS = platform.system() == 'Windows'
 IS_LINUX = platform.system() == 'Linux'
 
+# ANSI 颜色使用的指示器：INDIC_TEXTFORE 只改变文字颜色，不受词法分析器着色影响
+ANSI_INDICATOR = 20
+SC_INDICFLAG_VALUEFORE = 1
+# 超长行被切分后，续行在符号栏显示的标记
+CONTINUATION_MARKER = 1
+# 滚动到顶部时每次从磁盘日志读回的行数
+PAGE_LINES = 1000
+
 class BaseShell(QsciScintilla):
+    # 输出限流状态变化（True 表示积压过多、已暂停读取）
+    throttledChanged = pyqtSignal(bool)
+    # 导出输出完成：是否成功, 目标路径或错误信息
+    exportFinished = pyqtSignal(bool, str)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         
@@ -19,7 +38,8 @@ class BaseShell(QsciScintilla):
         self.font_family = config.get('font_family', 'Consolas')
         
         # 启用自动换行，避免水平滚动
-        self.setWrapMode(QsciScintilla.WrapMode.WrapWord)
+        self.wrap_mode = QsciScintilla.WrapMode.WrapWord
+        self.setWrapMode(self.wrap_mode)
         
         # 去掉行号，更像终端
         self.setMarginWidth(0, 0)
@@ -38,6 +58,18 @@ class BaseShell(QsciScintilla):
         self.history = []
         self.history_index = 0
         self.last_pos = 0
+        # 终端语义渲染：文档中 [line_start, last_pos) 是可被 \r 等改写的当前输出行
+        # 超长行（如打印的大列表、JSON）按固定长度切分为多行，避免单行换行计算卡住界面
+        self.renderer = OutputRenderer(config.get('terminal_max_line_length', 8192))
+        self.line_start = 0
+        # 每个输出流一个增量解码器，多字节字符跨越读取边界时不会乱码
+        self._decoders = {}
+        self._colors_used = False
+        self.is_dark = False
+        self.SendScintilla(QsciScintilla.SCI_INDICSETSTYLE, ANSI_INDICATOR, QsciScintilla.INDIC_TEXTFORE)
+        self.SendScintilla(QsciScintilla.SCI_INDICSETFLAGS, ANSI_INDICATOR, SC_INDICFLAG_VALUEFORE)
+        self.markerDefine(QsciScintilla.MarkerSymbol.BottomLeftCorner, CONTINUATION_MARKER)
+        self.setMarkerForegroundColor(QColor("#808080"), CONTINUATION_MARKER)
         
         # 补全状态初始化
         self.completing = False
@@ -46,39 +78,380 @@ class BaseShell(QsciScintilla):
         self.completion_start_pos = 0
         self.completion_token = ""
 
+        # 输出缓冲：readyRead 只负责入队，按帧合并后一次性写入控件
+        self._pending_output = deque()
+        self._pending_size = 0
+        self.flush_budget_chars = config.get('terminal_flush_budget_chars', 1024 * 1024)
+        self.flush_budget_lines = config.get('terminal_flush_budget_lines', 20000)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(config.get('terminal_flush_interval', 16))
+        self._flush_timer.timeout.connect(self.flush_output)
+
+        # 大量输出时 Scintilla 会对每一行同步计算换行，成为吞吐瓶颈。
+        # 输出积压期间暂停换行，积压清空一段时间后再恢复（恢复时按需延迟换行）
+        self._wrap_suspended = False
+        self._wrap_restore_timer = QTimer(self)
+        self._wrap_restore_timer.setSingleShot(True)
+        self._wrap_restore_timer.setInterval(250)
+        self._wrap_restore_timer.timeout.connect(self._restore_wrap)
+
+        # 回滚缓冲上限：超出后从顶部批量裁剪，保证长时间运行时内存平稳
+        self.scrollback_lines = config.get('terminal_scrollback_lines', 10000)
+        self.scrollback_bytes = config.get('terminal_scrollback_bytes', 8 * 1024 * 1024)
+        # 超出回滚上限的行写入磁盘日志，完整输出仍可查看、搜索和导出
+        self.spill_to_disk = config.get('terminal_spill_to_disk', True)
+        self.output_log = OutputLog()
+        # 从顶部裁剪掉的行数，即文档第一行在全部输出中的行号（不写入磁盘日志时也照常累加）
+        self.trimmed_lines = 0
+        self._export_worker = None
+        # 查找栏（按 Ctrl+F 时创建）
+        self.find_bar = None
+        self.SCN_UPDATEUI.connect(self._on_update_ui)
+        # 流量控制：积压超过高水位时暂停读取管道（可选暂停子进程），降到低水位以下再恢复，
+        # 使内存占用由配置决定，而不是由子进程输出多快决定
+        self.flow_high_water = config.get('terminal_flow_high_water', 16 * 1024 * 1024)
+        self.flow_low_water = config.get('terminal_flow_low_water', 4 * 1024 * 1024)
+        self.flow_suspend_child = config.get('terminal_flow_suspend_child', True)
+        self.throttled = False
+        self._suspended_pid = None
+        self._deferred_reads = {}
+
+        # 终端不需要撤销输出，关闭撤销记录以免其随输出无限增长
+        self.SendScintilla(QsciScintilla.SCI_SETUNDOCOLLECTION, 0)
+
+        # 背景图在后台生成完成后重绘
+        background_cache.updated.connect(self.viewport().update)
+
         # 应用初始偏好设置
         self.update_preferences()
 
-    def append_output(self, text):
-        self.SendScintilla(QsciScintilla.SCI_GOTOPOS, self.length())
-        self.append(text)
-        self.last_pos = self.length()
+    def decode_output(self, data, stream='stdout'):
+        """用该流的增量解码器解码一段原始输出"""
+        decoder = self._decoders.get(stream)
+        if decoder is None:
+            decoder = self._decoders[stream] = StreamDecoder()
+        return decoder.decode(bytes(data))
+
+    def feed_output(self, data, stream='stdout'):
+        """解码原始输出并加入缓冲，stderr 以红色显示"""
+        self.append_output(self.decode_output(data, stream), stream)
+
+    def append_output(self, text, stream='stdout'):
+        """将输出加入缓冲，最多每帧刷新一次到控件"""
+        if not text:
+            return
+        self._pending_output.append((text, ANSI_RED if stream == 'stderr' else None))
+        self._pending_size += len(text)
+        if not self.throttled and self._pending_size >= self.flow_high_water:
+            self.throttle()
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def read_process_output(self, process, stream='stdout'):
+        """读取脚本进程的一个输出流；限流期间不读取，恢复后再补读"""
+        if self._defer_read((process, stream), lambda: self.read_process_output(process, stream)):
+            return
+        try:
+            data = process.readAllStandardError() if stream == 'stderr' else process.readAllStandardOutput()
+        except RuntimeError:
+            # 进程对象已被删除
+            return
+        if not data.isEmpty():
+            self.feed_output(data, stream)
+
+    def _defer_read(self, key, callback):
+        """限流期间记录待读取的来源，返回 True 表示本次不读取"""
+        if not self.throttled:
+            return False
+        self._deferred_reads[key] = callback
+        return True
+
+    def throttle(self):
+        """积压达到高水位：停止读取管道，并按配置暂停子进程"""
+        if self.throttled:
+            return
+        self.throttled = True
+        if self.flow_suspend_child:
+            try:
+                pid = self.process.processId()
+            except RuntimeError:
+                pid = 0
+            # 管道写满后子进程本就会阻塞，但 QProcess 仍会把管道读入自身缓冲；暂停子进程才能真正限住内存
+            if pid and suspend_process(pid):
+                self._suspended_pid = pid
+        self.throttledChanged.emit(True)
+
+    def release_flow(self):
+        """解除限流：恢复子进程并补读限流期间到达的输出"""
+        if not self.throttled:
+            return
+        self.throttled = False
+        if self._suspended_pid:
+            resume_process(self._suspended_pid)
+            self._suspended_pid = None
+        self.throttledChanged.emit(False)
+        reads = list(self._deferred_reads.values())
+        self._deferred_reads.clear()
+        for read in reads:
+            read()
+
+    def flush_output(self):
+        """按字符/行数预算把缓冲的输出写入控件，剩余部分留到下一帧"""
+        if not self._pending_output:
+            return
+
+        # 相邻且属于同一输出流的块合并为一次写入
+        groups = []
+        size = 0
+        lines = 0
+        while self._pending_output and size < self.flush_budget_chars and lines < self.flush_budget_lines:
+            text, color = self._pending_output.popleft()
+            remaining = self.flush_budget_chars - size
+            if len(text) > remaining:
+                # 单块过大时拆分，剩余部分放回队首
+                self._pending_output.appendleft((text[remaining:], color))
+                text = text[:remaining]
+            if groups and groups[-1][1] == color:
+                groups[-1][0].append(text)
+            else:
+                groups.append(([text], color))
+            size += len(text)
+            lines += text.count('\n')
+        self._pending_size -= size
+
+        if (self._pending_output or lines > 1000) and not self._wrap_suspended:
+            # 一帧写不完或单帧行数过多，说明输出正在刷屏
+            self._wrap_suspended = True
+            self.setWrapMode(QsciScintilla.WrapMode.WrapNone)
+        if self._wrap_suspended:
+            self._wrap_restore_timer.start()
+
+        for chunks, color in groups:
+            self._write_output("".join(chunks), color)
+
+        if self.find_bar is not None and self.find_bar.isVisible():
+            self.find_bar.output_appended()
+        if self.throttled and self._pending_size <= self.flow_low_water:
+            self.release_flow()
+        if self._pending_output:
+            self._flush_timer.start()
+
+    def _restore_wrap(self):
+        if self._wrap_suspended:
+            self._wrap_suspended = False
+            self.setWrapMode(self.wrap_mode)
+
+    def flush_all_output(self):
+        """立即写入全部缓冲输出（用于需要同步读取文档的场景）"""
+        self._flush_timer.stop()
+        while self._pending_output:
+            self.flush_output()
+        self._flush_timer.stop()
+
+    def discard_pending_output(self):
+        """丢弃尚未写入的缓冲输出"""
+        self._flush_timer.stop()
+        self._pending_output.clear()
+        self._pending_size = 0
+
+    def _write_output(self, text, color=None):
+        # 只改写当前输出行并追加新行；输出位于输入区之前，用户尚未提交的输入保持在末尾不被打断
+        committed, line, runs = self.renderer.feed(text, color)
+        committed_data = committed.encode('utf-8')
+        data = committed_data + line.encode('utf-8')
+        start = self.line_start
+        first_line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, start)
+        # 在行首插入换行时 Scintilla 会把该行的标记挤到后面的行，先取下续行标记，替换后再放回
+        continuation = self.markersAtLine(first_line) & (1 << CONTINUATION_MARKER)
+        if continuation:
+            self.markerDelete(first_line, CONTINUATION_MARKER)
+        self.SendScintilla(QsciScintilla.SCI_SETTARGETRANGE, start, self.last_pos)
+        self.SendScintilla(QsciScintilla.SCI_REPLACETARGET, len(data), data)
+        if runs or self._colors_used:
+            self._apply_color_runs(start, committed + line, data, runs)
+        if continuation:
+            self.markerAdd(first_line, CONTINUATION_MARKER)
+        if self.renderer.soft_breaks:
+            for index in self.renderer.soft_breaks:
+                self.markerAdd(first_line + index + 1, CONTINUATION_MARKER)
+        self.line_start += len(committed_data)
+        self.last_pos = self.line_start + len(data) - len(committed_data)
+        self.trim_scrollback()
         self.SendScintilla(QsciScintilla.SCI_GOTOPOS, self.length())
 
+    def _apply_color_runs(self, start, text, data, runs):
+        """用指示器为刚写入的文本上色，区间为字符偏移，需换算为字节偏移"""
+        self.SendScintilla(QsciScintilla.SCI_SETINDICATORCURRENT, ANSI_INDICATOR)
+        # 插入的文本可能继承相邻区间的颜色，先清除
+        self.SendScintilla(QsciScintilla.SCI_INDICATORCLEARRANGE, start, len(data))
+        if not runs:
+            return
+        self._colors_used = True
+
+        ascii_only = len(data) == len(text)
+        char_pos = 0
+        byte_pos = 0
+        for run_start, run_end, color in runs:
+            if ascii_only:
+                byte_start, byte_end = run_start, run_end
+            else:
+                byte_start = byte_pos + len(text[char_pos:run_start].encode('utf-8'))
+                byte_end = byte_start + len(text[run_start:run_end].encode('utf-8'))
+                char_pos, byte_pos = run_end, byte_end
+            r, g, b = ansi_color_rgb(color, self.is_dark)
+            # Scintilla 的颜色为 BGR 顺序
+            self.SendScintilla(QsciScintilla.SCI_SETINDICATORVALUE, QsciScintilla.SC_INDICVALUEBIT | (b << 16) | (g << 8) | r)
+            self.SendScintilla(QsciScintilla.SCI_INDICATORFILLRANGE, start + byte_start, byte_end - byte_start)
+
+    def trim_scrollback(self):
+        """超出回滚上限时从顶部批量删除旧行，并同步修正输入区与补全偏移"""
+        line_count = self.SendScintilla(QsciScintilla.SCI_GETLINECOUNT)
+        length = self.length()
+        # 留出 10% 余量，避免每次输出都触发裁剪
+        if line_count <= self.scrollback_lines * 1.1 and length <= self.scrollback_bytes * 1.1:
+            return
+
+        first_line = max(0, line_count - self.scrollback_lines)
+        if length - self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, first_line) > self.scrollback_bytes:
+            first_line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, length - self.scrollback_bytes) + 1
+        # 不裁剪当前输出行和输入区
+        first_line = min(first_line, self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, self.last_pos))
+        cut = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, first_line)
+        if cut <= 0:
+            return
+
+        if self.spill_to_disk:
+            # 滚动到顶部时读回的行已经在日志中，不再重复写入
+            logged = min(first_line, self.logged_lines())
+            skip = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, logged) if logged else 0
+            # bytes() 返回的数据末尾带有结束符
+            self.output_log.append(bytes(self.bytes(skip, cut))[:cut - skip])
+        continuation = self.markersAtLine(first_line) & (1 << CONTINUATION_MARKER)
+        self.SendScintilla(QsciScintilla.SCI_DELETERANGE, 0, cut)
+        if not continuation:
+            # 被删除行上的标记会合并到新的首行
+            self.markerDelete(0, CONTINUATION_MARKER)
+        self.trimmed_lines += first_line
+        self.last_pos -= cut
+        self.line_start -= cut
+        self.completion_start_pos = max(0, self.completion_start_pos - cut)
+
+    def logged_lines(self):
+        """文档开头已经在磁盘日志中的行数（滚动到顶部时从日志读回的更早输出）"""
+        return max(0, self.output_log.line_count - self.trimmed_lines)
+
+    def page_in_older_output(self):
+        """滚动到顶部时从磁盘日志读回更早的一页输出，全部输出都可以在终端中向上滚动查看
+
+        读回的行在下次裁剪时直接删除（日志中已有），文档大小仍由回滚上限决定。
+        """
+        count = min(PAGE_LINES, self.trimmed_lines)
+        if not count or self.trimmed_lines > self.output_log.line_count:
+            # 没有更早的输出，或者没有写入磁盘日志
+            return
+        first = self.trimmed_lines - count
+        data = bytes(self.output_log.read_bytes(first, count))
+        # 在行首插入时 Scintilla 把原有的标记（续行标记）连同文本一起后移
+        self.SendScintilla(QsciScintilla.SCI_INSERTTEXT, 0, data)
+        self.trimmed_lines = first
+        self.last_pos += len(data)
+        self.line_start += len(data)
+        self.completion_start_pos += len(data)
+        # 保持原来看到的内容位于顶部
+        self.SendScintilla(QsciScintilla.SCI_SETFIRSTVISIBLELINE,
+                           self.SendScintilla(QsciScintilla.SCI_VISIBLEFROMDOCLINE, count))
+
+    def full_line_at(self, line):
+        """返回被切分的超长行的完整内容；该行未被切分时返回 None"""
+        mask = 1 << CONTINUATION_MARKER
+        first = line
+        while first > 0 and self.markersAtLine(first) & mask:
+            first -= 1
+        last = line
+        line_count = self.lines()
+        while last + 1 < line_count and self.markersAtLine(last + 1) & mask:
+            last += 1
+        if first == last:
+            return None
+        start = self.positionFromLineIndex(first, 0)
+        end = self.SendScintilla(QsciScintilla.SCI_GETLINEENDPOSITION, last)
+        return self.text(start, end).replace('\r', '').replace('\n', '')
+
+    def show_full_line(self, line):
+        """在对话框中查看被切分的超长行"""
+        text = self.full_line_at(line)
+        if text is not None:
+            FullLineDialog(text, self.window()).exec()
+
+    def last_output_line(self):
+        """返回最后一行输出（包含尚未刷新的缓冲），不含用户输入"""
+        tail = []
+        for text, _ in reversed(self._pending_output):
+            index = text.rfind('\n')
+            if index != -1:
+                tail.append(text[index + 1:])
+                return "".join(reversed(tail))
+            tail.append(text)
+        tail.append(self.renderer.line)
+        return "".join(reversed(tail))
+
+    def reset_output(self):
+        """清空文档后重置输出缓冲与渲染状态"""
+        self.discard_pending_output()
+        self.renderer.reset()
+        self._decoders.clear()
+        self.output_log.clear()
+        self.trimmed_lines = 0
+        self.last_pos = self.line_start = self.length()
+        self.release_flow()
+        if self.find_bar is not None and self.find_bar.isVisible():
+            self.find_bar.start_search()
+
+    def show_find_bar(self):
+        """显示输出查找栏"""
+        if self.find_bar is None:
+            self.find_bar = FindBar(self)
+        self.find_bar.open_bar()
+
+    def _on_update_ui(self, updated):
+        # 滚动或内容变化后重新高亮可见区域内的匹配
+        if self.find_bar is not None and self.find_bar.isVisible():
+            self.find_bar.schedule_highlight()
+        if updated & QsciScintilla.SC_UPDATE_V_SCROLL and self.firstVisibleLine() == 0:
+            self.page_in_older_output()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.find_bar is not None:
+            self.find_bar.reposition()
+
+    def export_output(self, path):
+        """把完整输出（磁盘日志 + 当前文档）导出到文件，在后台线程中复制"""
+        if self._export_worker and self._export_worker.isRunning():
+            return
+        self.flush_all_output()
+        # 文档大小受回滚上限限制，在界面线程中复制很快；开头从日志读回的行不重复导出
+        start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, self.logged_lines())
+        length = self.length()
+        tail = bytes(self.bytes(start, length))[:length - start]
+        self._export_worker = OutputExportWorker(self.output_log.snapshot(), tail, path)
+        self._export_worker.finished.connect(self.exportFinished)
+        self._export_worker.start()
+
+    def shutdown(self):
+        """关闭终端前取消并等待尚未完成的导出"""
+        if self._export_worker is not None:
+            self._export_worker.cancel()
+            self._export_worker.wait()
+            self._export_worker = None
+
     def paintEvent(self, event):
         # 先让 Scintilla 绘制其内容（包括文字和默认背景色）
         super().paintEvent(event)
         
-        # 获取背景图片路径
-        bg_image_path = config.get('background_image', '')
-        if bg_image_path and os.path.exists(bg_image_path):
-            painter = QPainter(self.viewport())
-            pixmap = QPixmap(bg_image_path)
-            if not pixmap.isNull():
-                # 使用透明度绘制，使文字依然可见
-                opacity = config.get('background_opacity', 0.3)
-                painter.setOpacity(opacity)
-                
-                # 缩放图片以适应窗口，保持比例
-                scaled_pixmap = pixmap.scaled(self.viewport().size(), 
-                                            Qt.AspectRatioMode.KeepAspectRatioByExpanding, 
-                                            Qt.TransformationMode.SmoothTransformation)
-                
-                # 居中绘制
-                x = (self.viewport().width() - scaled_pixmap.width()) // 2
-                y = (self.viewport().height() - scaled_pixmap.height()) // 2
-                painter.drawPixmap(x, y, scaled_pixmap)
-            painter.end()
+        # 背景图由全局缓存在后台生成，这里只贴图
+        background_cache.paint(self.viewport())
 
     def _is_dark(self, color):
         """判断颜色是否为深色"""
@@ -95,6 +468,7 @@ class BaseShell(QsciScintilla):
         theme_color_str = config.get('theme_color', '#ffffff')
         theme_color = QColor(theme_color_str)
         is_dark = self._is_dark(theme_color)
+        self.is_dark = is_dark
         default_fg = QColor("#D4D4D4") if is_dark else QColor("#000000")
         
         # 1. 启用 DirectWrite 以修复 Windows 上的字体缩放和渲染问题
@@ -154,19 +528,9 @@ class BaseShell(QsciScintilla):
         self.update()
 
     def read_output(self):
-        data = self.internal_process.readAll()
-        try:
-            # 优先使用 utf-8
-            text = bytes(data).decode("utf-8")
-        except UnicodeDecodeError:
-            if IS_WINDOWS:
-                # Windows 备选使用 cp936
-                text = bytes(data).decode("cp936", errors="ignore")
-            else:
-                # Linux 备选使用 latin-1
-                text = bytes(data).decode("latin-1", errors="ignore")
-            
-        self.append_output(text)
+        if self._defer_read(self.internal_process, self.read_output):
+            return
+        self.feed_output(self.internal_process.readAll())
 
     def event(self, event):
         if event.type() in (QEvent.Type.KeyPress, QEvent.Type.ShortcutOverride) and \
@@ -181,6 +545,10 @@ class BaseShell(QsciScintilla):
         return False
 
     def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_F and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            self.show_find_bar()
+            return
+
         # 重置补全状态（除非按的是 Tab）
         if event.key() not in (Qt.Key.Key_Tab, Qt.Key.Key_Backtab):
             self.completing = False
@@ -211,11 +579,8 @@ class BaseShell(QsciScintilla):
         import re
         
         # 1. 获取当前输入行内容
-        # 注意：self.text() 返回 unicode 字符串，但 self.last_pos 和 SCI_GETCURRENTPOS 是 UTF-8 字节偏移量
-        # 如果终端有中文输出，直接切片会导致索引错位。必须先转换为 bytes 处理。
-        full_text_unicode = self.text()
-        full_text_bytes = full_text_unicode.encode('utf-8')
-        
+        # 注意：self.last_pos 和 SCI_GETCURRENTPOS 是 UTF-8 字节偏移量，
+        # 只通过范围接口读取输入区，耗时与上方输出的多少无关
         cursor_pos = self.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS)
         
         # 相对位置 (字节)
@@ -231,13 +596,8 @@ class BaseShell(QsciScintilla):
             return
 
         # 3. 开始新的补全
-        # 获取光标前的字节内容并解码
-        try:
-            current_input_bytes = full_text_bytes[self.last_pos:cursor_pos]
-            text_before_cursor = current_input_bytes.decode('utf-8')
-        except UnicodeDecodeError:
-            # 如果解码失败（比如只输入了一半的字节），可能无法补全
-            return
+        # 获取光标前的输入内容
+        text_before_cursor = self.input_text(cursor_pos)
             
         # 查找最后一个空格
         last_space_index = text_before_cursor.rfind(' ')
@@ -270,15 +630,8 @@ class BaseShell(QsciScintilla):
             ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
             return ansi_escape.sub('', text)
         
-        # 尝试从最后一行中寻找 shell prompt
-        # self.last_pos 是字节位置，所以要用 bytes 切片
-        try:
-            prompt_text = full_text_bytes[:self.last_pos].decode('utf-8', errors='ignore')
-        except:
-            prompt_text = ""
-            
-        lines = prompt_text.split('\n')
-        for line in reversed(lines):
+        # 尝试从输入区之前的几行中寻找 shell prompt
+        for line in self.prompt_lines():
             line_clean = strip_ansi(line.strip())
             if not line_clean: 
                 continue
@@ -353,18 +706,27 @@ class BaseShell(QsciScintilla):
         current_pos = self.SendScintilla(QsciScintilla.SCI_GETCURRENTPOS)
         self.SendScintilla(QsciScintilla.SCI_SETSEL, self.completion_start_pos, current_pos)
         self.replaceSelectedText(new_text)
-        # 更新光标位置
-        self.SendScintilla(QsciScintilla.SCI_GOTOPOS, self.completion_start_pos + len(new_text))
+        # 更新光标位置（字节偏移）
+        self.SendScintilla(QsciScintilla.SCI_GOTOPOS, self.completion_start_pos + len(new_text.encode('utf-8')))
+
+    def input_text(self, end=None):
+        """读取输入区 [last_pos, end) 的文本，end 默认为文档末尾"""
+        if end is None:
+            end = self.length()
+        if end <= self.last_pos:
+            return ""
+        return self.text(self.last_pos, end)
+
+    def prompt_lines(self, max_lines=20):
+        """从输入区所在行开始向上逐行返回提示符附近的文本（最多 max_lines 行）"""
+        line = self.SendScintilla(QsciScintilla.SCI_LINEFROMPOSITION, self.last_pos)
+        line_start = self.SendScintilla(QsciScintilla.SCI_POSITIONFROMLINE, line)
+        yield self.text(line_start, self.last_pos)
+        for index in range(line - 1, max(-1, line - max_lines), -1):
+            yield self.text(index)
 
     def handle_enter(self):
-        full_text = self.text()
-        # 处理编码问题：转换为 bytes 后再切片
-        try:
-            full_text_bytes = full_text.encode('utf-8')
-            user_input_bytes = full_text_bytes[self.last_pos:]
-            user_input = user_input_bytes.decode('utf-8').strip()
-        except:
-            user_input = full_text[self.last_pos:].strip() # Fallback
+        user_input = self.input_text().strip()
 
         self.append("\n")
         
@@ -375,24 +737,86 @@ class BaseShell(QsciScintilla):
         else:
             self.process.write(b"\n")
         
-        self.last_pos = self.length()
+        # 用户输入连同换行成为历史内容，之后的输出从新的一行开始
+        self.renderer.reset()
+        self.last_pos = self.line_start = self.length()
         self.SendScintilla(QsciScintilla.SCI_GOTOPOS, self.length())
         
     def clear_shell(self, start_repl=True):
         self.clear()
+        self.reset_output()
         if start_repl:
             self.start_process()
 
     def set_active_process(self, process=None):
         """设置当前接收输入的进程。如果为 None，则恢复为内部进程。"""
+        # 切换前解除限流，避免旧进程一直处于暂停状态
+        self.release_flow()
         if process:
             self.process = process
         else:
             self.process = self.internal_process
+        # 新进程的输出流从头开始解码
+        self._decoders.clear()
 
     def start_process(self):
         pass
 
+class OutputExportWorker(QThread):
+    finished = pyqtSignal(bool, str) # 成功, 路径或错误信息
+
+    def __init__(self, snapshot, tail, path):
+        super().__init__()
+        self.snapshot = snapshot
+        self.tail = tail
+        self.path = path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            with open(self.path, 'wb') as f:
+                if self.snapshot is not None:
+                    # 日志按块直接写出，不经过文本解码
+                    chunk = 1024 * 1024
+                    for offset in range(0, len(self.snapshot), chunk):
+                        if self._cancelled:
+                            break
+                        f.write(self.snapshot[offset:offset + chunk])
+                f.write(self.tail)
+            if self._cancelled:
+                # 终端关闭时取消，不留下不完整的文件
+                os.remove(self.path)
+                return
+            self.finished.emit(True, self.path)
+        except OSError as e:
+            if not self._cancelled:
+                self.finished.emit(False, str(e))
+        finally:
+            if self.snapshot is not None:
+                self.snapshot.close()
+
+class FullLineDialog(MessageBoxBase):
+    """不换行地显示一整行超长输出"""
+
+    def __init__(self, text, parent=None):
+        super().__init__(parent)
+        self.titleLabel = SubtitleLabel(translator.get("terminal.full_line", "Full Line"), self)
+        self.viewLayout.addWidget(self.titleLabel)
+
+        self.view = QsciScintilla(self)
+        self.view.setWrapMode(QsciScintilla.WrapMode.WrapNone)
+        self.view.setMarginWidth(1, 0)
+        self.view.setText(text)
+        self.view.setReadOnly(True)
+        self.view.setMinimumSize(900, 300)
+        self.viewLayout.addWidget(self.view)
+
+        self.yesButton.hide()
+        self.cancelButton.setText(translator.get("terminal.close", "Close"))
+
 class InteractiveShell(BaseShell):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -415,6 +839,7 @@ class InteractiveShell(BaseShell):
 
     def stop_interpreter(self):
         """停止当前的交互式 Python 解释器"""
+        self.release_flow()
         if self.internal_process.state() != QProcess.ProcessState.NotRunning:
             self.internal_process.kill()
             self.internal_process.waitForFinished()
@@ -422,7 +847,7 @@ class InteractiveShell(BaseShell):
     def start_process(self):
         if not self.interpreter or not os.path.exists(self.interpreter):
             error_msg = translator.get("shell.interpreter_not_found", "Error: Python interpreter not found")
-            self.append(f"{error_msg}: {self.interpreter}\n")
+            self.append_output(f"{error_msg}: {self.interpreter}\n")
             return
             
         if self.internal_process.state() != QProcess.ProcessState.NotRunning:
@@ -444,27 +869,21 @@ class InteractiveShell(BaseShell):
             version = translator.get("shell.python_fallback", "Python")
             
         self.append_output(f"{version} ({self.interpreter})\n{self.prompt}")
-        self.last_pos = self.length()
+        self.flush_all_output()
 
     def read_output(self):
-        data = self.internal_process.readAll()
-        try:
-            # 优先使用 utf-8
-            text = bytes(data).decode("utf-8")
-        except UnicodeDecodeError:
-            # 备选使用 cp936
-            text = bytes(data).decode("cp936", errors="ignore")
+        if self._defer_read(self.internal_process, self.read_output):
+            return
+        text = self.decode_output(self.internal_process.readAll())
             
         if "Ctrl click to launch VS Code Native REPL" in text:
             return
             
         text_stripped = text.strip()
         if text_stripped == ">>>" or text_stripped.endswith(">>>"):
-            line_count = self.lines()
-            if line_count > 0:
-                last_line = self.text(line_count - 1).strip()
-                if last_line == ">>>" or last_line.endswith(">>>"):
-                    return
+            last_line = self.last_output_line().strip()
+            if last_line == ">>>" or last_line.endswith(">>>"):
+                return
 
         self.append_output(text)
 
@@ -513,7 +932,7 @@ class SystemShell(BaseShell):
         self.internal_process.waitForStarted()
         
         self.clear() # 使用 clear 而不是 setText("")
-        self.last_pos = self.length()
+        self.reset_output()
         
         # 补全状态
         self.completing = False
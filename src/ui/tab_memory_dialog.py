@@ -0,0 +1,50 @@
+from PyQt6.QtWidgets import QTableWidgetItem, QHeaderView
+from qfluentwidgets import MessageBoxBase, SubtitleLabel, BodyLabel, TableWidget
+from src.core.translator import translator
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class TabMemoryDialog(MessageBoxBase):
+    """每个编辑器标签页估算的内存占用"""
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+        self.titleLabel = SubtitleLabel(translator.get("tabs.memory", "Tab Memory"), self)
+        self.viewLayout.addWidget(self.titleLabel)
+
+        states = {
+            "active": translator.get("tabs.active", "Active"),
+            "hibernated": translator.get("tabs.hibernated", "Hibernated"),
+            "hibernated_undo": translator.get("tabs.hibernated_undo", "Hibernated (undo kept)"),
+            "unloaded": translator.get("tabs.unloaded", "Not loaded"),
+        }
+        self.table = TableWidget(self)
+        self.table.setColumnCount(3)
+        self.table.setRowCount(len(rows))
+        self.table.setHorizontalHeaderLabels([
+            translator.get("tabs.name", "Tab"),
+            translator.get("tabs.state", "State"),
+            translator.get("tabs.memory_usage", "Memory"),
+        ])
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for row, (name, state, size) in enumerate(rows):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            self.table.setItem(row, 1, QTableWidgetItem(states[state]))
+            self.table.setItem(row, 2, QTableWidgetItem(format_size(size)))
+        self.table.setMinimumSize(520, 300)
+        self.viewLayout.addWidget(self.table)
+
+        total = sum(size for _, _, size in rows)
+        self.totalLabel = BodyLabel(f"{translator.get('tabs.total', 'Total')}: {format_size(total)}", self)
+        self.viewLayout.addWidget(self.totalLabel)
+
+        self.yesButton.setText(translator.get("tabs.hibernate_now", "Hibernate Background Tabs"))
+        self.cancelButton.setText(translator.get("terminal.close", "Close"))
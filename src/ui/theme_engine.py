@@ -0,0 +1,187 @@
+from PyQt6.Qsci import QsciScintilla, QsciLexerPython
+from PyQt6.QtGui import QColor, QFont
+from src.config import config
+
+STYLE_DEFAULT = 32
+
+
+def is_dark(color):
+    """判断颜色是否为深色"""
+    # 使用亮度公式
+    brightness = (color.red() * 299 + color.green() * 587 + color.blue() * 114) / 1000
+    return brightness < 128
+
+
+def _rgb(color):
+    # Scintilla 的颜色格式为 0xBBGGRR
+    return color.red() | color.green() << 8 | color.blue() << 16
+
+
+class StyleTable:
+    """一种主题色 + 字体组合下 Python 语法高亮的全部样式
+
+    只在组合第一次出现时用一个模板编辑器计算一次，之后每个编辑器直接把表中的值
+    通过 SCI_STYLESET* 发给 Scintilla，不再为每个编辑器、每种样式重新创建字体和颜色。
+    """
+
+    def __init__(self, key):
+        self.key = key
+        theme_color_str, self.font_family, self.font_size = key
+        theme_color = QColor(theme_color_str)
+        dark = is_dark(theme_color)
+        self.paper = _rgb(theme_color)
+        self.paper_color = theme_color
+        self.default_fg = _rgb(QColor("#D4D4D4") if dark else QColor("#000000"))
+        self.font_name = self.font_family.encode('utf-8')
+
+        template = self._template_editor(theme_color, dark)
+        # 每个样式的 (前景色, 背景色, 字号, 加粗, 斜体, 行尾填充)，从模板编辑器中读出最终取值
+        self.styles = []
+        for style in range(128):
+            self.styles.append((style,) + tuple(template.SendScintilla(message, style) for message in (
+                QsciScintilla.SCI_STYLEGETFORE, QsciScintilla.SCI_STYLEGETBACK, QsciScintilla.SCI_STYLEGETSIZE,
+                QsciScintilla.SCI_STYLEGETBOLD, QsciScintilla.SCI_STYLEGETITALIC, QsciScintilla.SCI_STYLEGETEOLFILLED,
+            )))
+        template.deleteLater()
+
+        # 光标和行高亮
+        if dark:
+            self.caret_fg = QColor("white")
+            self.caret_line_bg = QColor(60, 60, 60, 100)
+        else:
+            self.caret_fg = QColor("black")
+            self.caret_line_bg = QColor("#e8e8ff")
+
+    def _template_editor(self, theme_color, dark):
+        """按主题配置一个不显示的编辑器及其词法分析器"""
+        template = QsciScintilla()
+        lexer = QsciLexerPython(template)
+        template.setLexer(lexer)
+        template.SendScintilla(QsciScintilla.SCI_STYLESETFONT, STYLE_DEFAULT, self.font_name)
+        template.SendScintilla(QsciScintilla.SCI_STYLESETSIZE, STYLE_DEFAULT, self.font_size)
+        template.SendScintilla(QsciScintilla.SCI_STYLESETBACK, STYLE_DEFAULT, self.paper)
+        template.SendScintilla(QsciScintilla.SCI_STYLESETFORE, STYLE_DEFAULT, self.default_fg)
+        template.SendScintilla(QsciScintilla.SCI_STYLECLEARALL)
+
+        font = QFont(self.font_family, self.font_size)
+        lexer.setDefaultFont(font)
+        lexer.setFont(font)
+        for i in range(128):
+            lexer.setFont(font, i)
+
+        font_bold = QFont(self.font_family, self.font_size, QFont.Weight.Bold)
+        font_italic_bold = QFont(self.font_family, self.font_size, QFont.Weight.Bold)
+        font_italic_bold.setItalic(True)
+
+        # 根据背景亮度调整颜色
+        if dark:
+            # 深色背景下的颜色
+            keyword_color = QColor("#C586C0")   # 浅紫色
+            class_color = QColor("#4EC9B0")     # 青色
+            func_color = QColor("#DCDCAA")      # 浅黄色
+            string_color = QColor("#CE9178")    # 橙红色
+            comment_color = QColor("#6A9955")   # 浅绿色
+            number_color = QColor("#B5CEA8")    # 浅绿
+            operator_color = QColor("#D4D4D4")  # 浅灰
+            identifier_color = QColor("#9CDCFE") # 天蓝色
+            default_fg = QColor("#D4D4D4")
+        else:
+            # 浅色背景下的颜色
+            keyword_color = QColor("#AF00DB")
+            class_color = QColor("#267F99")
+            func_color = QColor("#795E26")
+            string_color = QColor("#A31515")
+            comment_color = QColor("#008000")
+            number_color = QColor("#098658")
+            operator_color = QColor("#0000FF")
+            identifier_color = QColor("#001080")
+            default_fg = QColor("#000000")
+
+        lexer.setDefaultColor(default_fg)
+        lexer.setColor(keyword_color, QsciLexerPython.Keyword)
+        lexer.setFont(font_bold, QsciLexerPython.Keyword)
+
+        lexer.setColor(class_color, QsciLexerPython.ClassName)
+        lexer.setFont(font_bold, QsciLexerPython.ClassName)
+
+        lexer.setColor(func_color, QsciLexerPython.FunctionMethodName)
+        lexer.setFont(font_bold, QsciLexerPython.FunctionMethodName)
+
+        lexer.setColor(string_color, QsciLexerPython.SingleQuotedString)
+        lexer.setColor(string_color, QsciLexerPython.DoubleQuotedString)
+        lexer.setColor(string_color, QsciLexerPython.TripleSingleQuotedString)
+        lexer.setColor(string_color, QsciLexerPython.TripleDoubleQuotedString)
+        lexer.setColor(string_color, QsciLexerPython.UnclosedString)
+        lexer.setFont(font_bold, QsciLexerPython.SingleQuotedString)
+
+        lexer.setColor(comment_color, QsciLexerPython.Comment)
+        lexer.setColor(comment_color, QsciLexerPython.CommentBlock)
+        lexer.setFont(font_italic_bold, QsciLexerPython.Comment)
+        lexer.setFont(font_italic_bold, QsciLexerPython.CommentBlock)
+
+        lexer.setColor(number_color, QsciLexerPython.Number)
+        lexer.setFont(font_bold, QsciLexerPython.Number)
+
+        lexer.setColor(operator_color, QsciLexerPython.Operator)
+        lexer.setFont(font_bold, QsciLexerPython.Operator)
+
+        lexer.setColor(identifier_color, QsciLexerPython.Identifier)
+        lexer.setFont(font_bold, QsciLexerPython.Identifier)
+
+        lexer.setColor(keyword_color, QsciLexerPython.Decorator)
+        lexer.setFont(font_bold, QsciLexerPython.Decorator)
+
+        template.setPaper(theme_color)
+        lexer.setDefaultPaper(theme_color)
+        for i in range(128):
+            lexer.setPaper(theme_color, i)
+        return template
+
+    def apply(self, editor):
+        """把样式表发给编辑器；样式编号不变，不需要重新词法分析"""
+        send = editor.SendScintilla
+        editor.setPaper(self.paper_color)
+        # 先设置默认样式 (style 32) 并清除所有样式，让其余样式继承背景色和字体
+        send(QsciScintilla.SCI_STYLESETFONT, STYLE_DEFAULT, self.font_name)
+        send(QsciScintilla.SCI_STYLESETSIZE, STYLE_DEFAULT, self.font_size)
+        send(QsciScintilla.SCI_STYLESETBACK, STYLE_DEFAULT, self.paper)
+        send(QsciScintilla.SCI_STYLESETFORE, STYLE_DEFAULT, self.default_fg)
+        send(QsciScintilla.SCI_STYLECLEARALL)
+        # 调用提示等特殊样式不受清除影响，颜色每个都发送；字体属性与默认样式相同时不必再发送
+        if QsciScintilla.lexer(editor) is not None:
+            for style, fore, back, size, bold, italic, eol_fill in self.styles:
+                send(QsciScintilla.SCI_STYLESETFORE, style, fore)
+                send(QsciScintilla.SCI_STYLESETBACK, style, back)
+                if size != self.font_size:
+                    send(QsciScintilla.SCI_STYLESETSIZE, style, size)
+                if bold:
+                    send(QsciScintilla.SCI_STYLESETBOLD, style, bold)
+                if italic:
+                    send(QsciScintilla.SCI_STYLESETITALIC, style, italic)
+                if eol_fill:
+                    send(QsciScintilla.SCI_STYLESETEOLFILLED, style, eol_fill)
+        editor.setCaretForegroundColor(self.caret_fg)
+        editor.setCaretLineBackgroundColor(self.caret_line_bg)
+
+
+class ThemeEngine:
+    """按 (主题色, 字体, 字号) 缓存样式表；编辑器记录已应用的组合，隐藏的标签页显示时再更新"""
+
+    def __init__(self):
+        self._tables = {}
+
+    def key(self):
+        return (config.get('theme_color', '#ffffff'), config.get('font_family', 'Consolas'), config.get('font_size', 12))
+
+    def table(self):
+        key = self.key()
+        table = self._tables.get(key)
+        if table is None:
+            # 只保留最近用过的几种组合（在设置界面里调整时会产生很多）
+            if len(self._tables) >= 8:
+                self._tables.pop(next(iter(self._tables)))
+            table = self._tables[key] = StyleTable(key)
+        return table
+
+
+theme_engine = ThemeEngine()
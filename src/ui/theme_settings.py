@@ -5,6 +5,7 @@ from PyQt6.QtGui import QColor, QPixmap, QPainter, QBrush, QPen
 from qfluentwidgets import SubtitleLabel, CaptionLabel, CardWidget, FlowLayout, TransparentToolButton, SwitchButton, setTheme, Theme, BodyLabel, isDarkTheme
 from src.config import config
 from src.core.translator import translator
+from src.ui.background import background_cache
 
 class ThemeColorButton(TransparentToolButton):
     """主题颜色选择按钮"""
@@ -184,6 +185,8 @@ class ThemeSettingsInterface(QWidget):
         self.update() # 刷新当前界面以更新颜色按钮文字颜色
 
     def update_app_theme(self):
+        # 背景图或底色改变，丢弃已生成的背景位图
+        background_cache.invalidate()
         main_window = self.window()
         if hasattr(main_window, 'update_editor_settings'):
             main_window.update_editor_settings()
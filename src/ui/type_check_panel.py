@@ -0,0 +1,70 @@
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QListWidgetItem
+from PyQt6.QtCore import Qt, pyqtSignal
+from qfluentwidgets import BodyLabel, PushButton, ListWidget
+from src.core.type_checker import type_check_service, MYPY_MISSING
+from src.core.translator import translator
+
+
+class TypeCheckPanel(QWidget):
+    """类型检查面板：显示 dmypy 的检查结果，双击跳转到对应位置"""
+    openRequested = pyqtSignal(str, int, int) # 路径, 行, 列
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(8, 4, 8, 4)
+
+        header = QHBoxLayout()
+        self.status_label = BodyLabel(self)
+        header.addWidget(self.status_label, 1)
+        self.btn_check = PushButton(self)
+        self.btn_check.clicked.connect(self.check_requested)
+        header.addWidget(self.btn_check)
+        layout.addLayout(header)
+
+        self.list = ListWidget(self)
+        self.list.itemDoubleClicked.connect(self.open_item)
+        layout.addWidget(self.list)
+
+        # 由主窗口设置：返回当前应加入检查的文件
+        self.files_provider = lambda: []
+        type_check_service.started.connect(self.on_started)
+        type_check_service.finished.connect(self.on_finished)
+        self.update_texts()
+
+    def update_texts(self):
+        self.btn_check.setText(translator.get("typecheck.run", "Check Now"))
+        if not self.list.count() and type_check_service.process is None:
+            self.status_label.setText(translator.get("typecheck.hint", "Save a Python file to check it."))
+
+    def check_requested(self):
+        type_check_service.check(self.files_provider())
+
+    def on_started(self):
+        self.status_label.setText(translator.get("typecheck.checking", "Checking..."))
+
+    def on_finished(self, diagnostics, error, elapsed):
+        self.list.clear()
+        if error == MYPY_MISSING:
+            self.status_label.setText(translator.get(
+                "typecheck.not_installed", "mypy is not installed for the current interpreter. Install it in the Library Manager."))
+            return
+        if error:
+            self.status_label.setText(f"{translator.get('typecheck.failed', 'Type check failed')}: {error.splitlines()[-1]}")
+            return
+        count = sum(1 for diagnostic in diagnostics if diagnostic[3] == 'error')
+        if count:
+            status = translator.get("typecheck.errors", "{} error(s)").format(count)
+        else:
+            status = translator.get("typecheck.ok", "No type errors")
+        self.status_label.setText(f"{status} ({elapsed:.2f} s)")
+        for path, line, column, severity, message in diagnostics:
+            item = QListWidgetItem(f"{os.path.basename(path)}:{line + 1}:{column + 1}  {severity}: {message}")
+            item.setToolTip(path)
+            item.setData(Qt.ItemDataRole.UserRole, (path, line, column))
+            self.list.addItem(item)
+
+    def open_item(self, item):
+        path, line, column = item.data(Qt.ItemDataRole.UserRole)
+        self.openRequested.emit(path, line, column)